@@ -1,7 +1,19 @@
-from flask import Flask, jsonify, request, render_template
+from functools import wraps
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context, make_response
 from flask_cors import CORS
-from map_helper.o3_map_generator import ozone_main
-from map_helper.esri_map_helper import landcover_main
+from map_helper.boundary_registry import get_boundary_registry
+from map_helper.geometry_simplify import boundaries_for_client, parse_boundary_options
+from ee_session import ee_session
+from ee_gateway import ee_gateway
+from result_cache import result_cache, cache_key
+from config import Settings
+from datasets import get_processor_class, mint_tile_url
+from streaming import stream_format, stream_layers, MIMETYPES
+from jobs import job_manager
+from compact import compact_maps_response, COMPACT
+from compression import compress_response
+from tile_store import tile_store, TileProxy
+from metrics import observe_stage, start_request, count_cache_lookup, metrics_payload, JSON_SERIALIZATION
 
 app = Flask(__name__, 
             template_folder='frontend/templates',
@@ -9,7 +21,111 @@ app = Flask(__name__,
 
 CORS(app)
 
+# Tiles are fetched from Earth Engine once and then served from the local store
+tile_proxy = TileProxy(tile_store, mint_tile_url, timeout=Settings.TILE_UPSTREAM_TIMEOUT)
+
+# Initialize Earth Engine once at startup instead of on every request
+ee_session.warm_up()
+
+# Parse the boundary file once so the first request does not pay for it
+try:
+    get_boundary_registry(Settings.BOUNDARIES_GEOJSON)
+except Exception as e:
+    print(f"Boundary preload failed: {str(e)}")
+
+def _boundary_options_error(options):
+    """Error message for invalid zoom / simplify_level / boundary_format options, or None."""
+    try:
+        parse_boundary_options(
+            options.get('zoom'), options.get('simplify_level'), options.get('boundary_format')
+        )
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _client_boundaries(options, geojson_data):
+    """
+    Simplify / encode the region GeoJSON for the map view.
+
+    options may carry 'zoom' (map zoom level), 'simplify_level' (0-4, wins over
+    zoom) and 'boundary_format' ('geojson' or 'topojson'). Without them the full
+    resolution GeoJSON is returned as before.
+    """
+    if not geojson_data:
+        return geojson_data, None
+    return boundaries_for_client(
+        get_boundary_registry(Settings.BOUNDARIES_GEOJSON),
+        geojson_data,
+        zoom=options.get('zoom'),
+        level=options.get('simplify_level'),
+        boundary_format=options.get('boundary_format')
+    )
+
+
+def _processor_options(data, default_deadline=None):
+    """
+    Map processor options taken from a generate_maps / jobs body.
+
+    'latency_budget' (seconds) lets the processor coarsen the reduction scale of
+    large regions so the statistics come back in about that time. 'deadline'
+    (seconds, default default_deadline) bounds the whole request: whatever is not
+    done by then is reported in 'timed_out' instead of being waited for.
+    """
+    options = {}
+    if data.get('latency_budget') is not None:
+        budget = float(data['latency_budget'])
+        if budget <= 0:
+            raise ValueError("latency_budget must be a positive number of seconds")
+        options['latency_budget'] = budget
+    deadline = data.get('deadline', default_deadline)
+    if deadline is not None:
+        deadline = float(deadline)
+        if deadline <= 0:
+            raise ValueError("deadline must be a positive number of seconds")
+        options['deadline'] = deadline
+    return options
+
+
+def _request_deadline():
+    """Default deadline of synchronous map requests (Settings.REQUEST_DEADLINE, 0 disables it)."""
+    return Settings.REQUEST_DEADLINE or None
+
+
+def tracked(endpoint):
+    """
+    Record a view's latency and in-flight count, labelled by the body's dataset.
+
+    Streamed (NDJSON / SSE) responses count until the server closes them after
+    the last chunk, so their latency covers the whole stream.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True) or {}
+            finish = start_request(endpoint, data.get('dataset'))
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                finish()
+                raise
+            if response.is_streamed:
+                response.call_on_close(finish)
+            else:
+                finish()
+            return response
+        return wrapper
+    return decorator
+
+
+@app.after_request
+def compress(response):
+    """gzip / brotli buffered responses for clients that accept it."""
+    return compress_response(response, request.headers.get('Accept-Encoding'), Settings.COMPRESSION_MIN_SIZE)
+
+
 @app.route('/api/generate_maps', methods=['POST'])
+@tracked('generate_maps')
 def generate_maps():
     #get the request data
     data = request.json
@@ -19,25 +135,63 @@ def generate_maps():
     end_year = data.get('end_year')
     selected_regions = data.get('selected_regions')
 
+    options_error = _boundary_options_error(data)
+    if options_error is not None:
+        return jsonify({'error': options_error}), 400
+
     try:
         print(f"Generating maps for {dataset} from {start_year} to {end_year} for regions: {selected_regions}")
 
-        #generate the maps
-        #if-else statements based on datasets
-        if dataset == 'Ozone':
-            urls, stats, legends, geojson_data, selected_regions = ozone_main(selected_regions, start_year, end_year)
-            print(legends)
-        elif dataset == 'Land Cover':
-            urls, stats, legends, geojson_data, selected_regions = landcover_main(selected_regions, start_year, end_year)
-            print(legends)
+        #stream each layer as soon as it is ready when NDJSON / SSE is requested
+        fmt = stream_format(data, request.headers.get('Accept'))
+        if fmt is not None:
+            processor = get_processor_class(dataset)(
+                selected_regions, start_year, end_year, **_processor_options(data, _request_deadline())
+            )
+            return Response(
+                stream_with_context(stream_layers(
+                    processor, selected_regions, fmt,
+                    shape_boundaries=lambda geojson: _client_boundaries(data, geojson)
+                )),
+                mimetype=MIMETYPES[fmt],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
 
-        return jsonify({
+        #opt-in columnar layout with boundaries referenced by id
+        if data.get('response_format') == COMPACT:
+            processor = get_processor_class(dataset)(
+                selected_regions, start_year, end_year, **_processor_options(data, _request_deadline())
+            )
+            urls, stats, _ = processor.generate_urls()
+            response = compact_maps_response(processor, urls, stats, processor.errors, processor.legends())
+            with observe_stage(JSON_SERIALIZATION, dataset):
+                return jsonify(response)
+
+        #generate the maps with the dataset's processor
+        processor = get_processor_class(dataset)(
+            selected_regions, start_year, end_year, **_processor_options(data, _request_deadline())
+        )
+        urls, stats, geojson_data = processor.generate_urls()
+        legends = processor.legends()
+        errors = processor.errors
+        print(legends)
+
+        geojson_data, simplification = _client_boundaries(data, geojson_data)
+        response = {
             'urls': urls,
             'legends': legends,
             'geojson_data': geojson_data,
             'selected_regions': selected_regions,
-            'stats': stats
-        })
+            'stats': stats,
+            'reduction': processor.reduction,
+            'errors': errors,
+            'timed_out': processor.timed_out,
+            'failed': processor.failed
+        }
+        if simplification is not None:
+            response['simplification'] = simplification
+        with observe_stage(JSON_SERIALIZATION, dataset):
+            return jsonify(response)
     
     except Exception as e:
         print(f"Error generating maps: {str(e)}")
@@ -46,6 +200,149 @@ def generate_maps():
         })
 
 
+@app.route('/api/boundaries', methods=['GET'])
+def boundaries():
+    """
+    Region boundaries by shapeID (?ids=ID1,ID2), as referenced by compact responses.
+
+    Takes the same zoom / simplify_level / boundary_format options as
+    /api/generate_maps. Responses carry an ETag derived from the boundary file
+    version, the ids and the options, and answer If-None-Match with 304.
+    """
+    ids = [shape_id for shape_id in request.args.get('ids', '').split(',') if shape_id]
+    if not ids:
+        return jsonify({'error': 'ids is required'}), 400
+    options_error = _boundary_options_error(request.args)
+    if options_error is not None:
+        return jsonify({'error': options_error}), 400
+    registry = get_boundary_registry(Settings.BOUNDARIES_GEOJSON)
+    features = [registry.get_by_id(shape_id) for shape_id in ids]
+    missing = [shape_id for shape_id, feature in zip(ids, features) if feature is None]
+    if missing:
+        return jsonify({'error': 'unknown boundary ids', 'missing': missing}), 404
+
+    etag = cache_key(
+        ids=ids,
+        version=registry.version,
+        zoom=request.args.get('zoom'),
+        simplify_level=request.args.get('simplify_level'),
+        boundary_format=request.args.get('boundary_format')
+    )
+    # Compare before building the body so revalidation stays cheap
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        geojson_data, simplification = _client_boundaries(
+            request.args, {"type": "FeatureCollection", "features": features}
+        )
+        body = {'geojson_data': geojson_data}
+        if simplification is not None:
+            body['simplification'] = simplification
+        response = jsonify(body)
+    # Weak: the compressed and identity encodings of the body differ byte-wise
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = f"public, max-age={Settings.BOUNDARIES_MAX_AGE}"
+    return response
+
+
+@app.route('/tiles/<layer>/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def tile(layer, z, x, y):
+    """Proxy one map tile, re-minting the Earth Engine map ID if it has expired."""
+    status, data, content_type = tile_proxy.get_tile(layer, z, x, y)
+    count_cache_lookup('tile', status)
+    if status == 'unknown_layer':
+        return jsonify({'error': 'unknown tile layer'}), 404
+    if status == 'upstream_error':
+        return jsonify({'error': 'tile unavailable upstream'}), 502
+    response = Response(data, mimetype=content_type)
+    response.headers['Cache-Control'] = f"public, max-age={Settings.TILE_MAX_AGE}"
+    response.headers['X-Tile-Cache'] = status
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage latency, Earth Engine errors, cache lookups, in-flight requests."""
+    payload, content_type = metrics_payload()
+    return Response(payload, content_type=content_type)
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a map generation job; takes the same body as /api/generate_maps."""
+    data = request.json
+    try:
+        job = job_manager.submit(
+            data.get('dataset'),
+            data.get('selected_regions'),
+            data.get('start_year'),
+            data.get('end_year'),
+            **_processor_options(data)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = jsonify({'job_id': job.id, 'status': job.status})
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response, 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status with the urls / stats computed so far; accepts ?zoom=&simplify_level=&boundary_format=."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    options_error = _boundary_options_error(request.args)
+    if options_error is not None:
+        return jsonify({'error': options_error}), 400
+    data = job.to_dict()
+    if data.get('geojson_data'):
+        data['geojson_data'], simplification = _client_boundaries(request.args, data['geojson_data'])
+        if simplification is not None:
+            data['simplification'] = simplification
+    return jsonify(data)
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once the Earth Engine session is usable, 503 otherwise."""
+    if not ee_session.is_ready():
+        ee_session.warm_up()
+    status = ee_session.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+def _admin_authorized():
+    """Admin endpoints need the X-Admin-Token header to match Settings.ADMIN_TOKEN."""
+    return bool(Settings.ADMIN_TOKEN) and request.headers.get('X-Admin-Token') == Settings.ADMIN_TOKEN
+
+
+@app.route('/api/admin/cache', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and entry counts of the tile URL / statistics cache."""
+    if not _admin_authorized():
+        return jsonify({'error': 'unauthorized'}), 403
+    return jsonify(dict(result_cache.stats(), tiles=tile_store.stats()))
+
+
+@app.route('/api/admin/ee', methods=['GET'])
+def ee_gateway_stats():
+    """Concurrency limit, retry / quota counters and throughput of the Earth Engine call gateway."""
+    if not _admin_authorized():
+        return jsonify({'error': 'unauthorized'}), 403
+    return jsonify(ee_gateway.stats())
+
+
+@app.route('/api/admin/cache/purge', methods=['POST'])
+def purge_cache():
+    """Drop cached entries; pass {"kind": "tile_url"} or {"kind": "stats"} to purge only one kind."""
+    if not _admin_authorized():
+        return jsonify({'error': 'unauthorized'}), 403
+    data = request.get_json(silent=True) or {}
+    purged = result_cache.purge(data.get('kind'))
+    return jsonify({'purged': purged})
+
+
 @app.route('/')
 def index():
     """Render the main page for the visualization."""
@@ -0,0 +1,42 @@
+"""
+pytest setup for the tests next to the Earth Engine stand-in.
+
+Run from backend-apps/gee-service:
+    python -m pytest benchmarks
+
+ee is replaced by fake_ee.py with zero latency, and the service settings
+point at synthetic districts and temporary cache files, so the tests need
+neither Earth Engine credentials nor the boundary file.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, SERVICE_DIR)
+
+import fake_ee  # noqa: E402
+from run import synthetic_boundaries  # noqa: E402
+
+# Settings reads the environment at import time, so configure it before any service import
+REPLAYER = fake_ee.install({"calls": {}}, time_scale=0)
+_TEMP_DIR = tempfile.mkdtemp(prefix="gee-service-tests-")
+os.environ.update({
+    "CACHE_ENABLED": "false",
+    "CACHE_DB_PATH": os.path.join(_TEMP_DIR, "results.sqlite3"),
+    "TILE_PROXY": "false",
+    "TILE_DB_PATH": os.path.join(_TEMP_DIR, "tiles.mbtiles"),
+    "BOUNDARIES_GEOJSON": synthetic_boundaries(4),
+    "ADMIN_TOKEN": ""
+})
+
+
+@pytest.fixture
+def replayer():
+    """The stand-in's round-trip counter, reset for the test."""
+    REPLAYER.reset()
+    return REPLAYER
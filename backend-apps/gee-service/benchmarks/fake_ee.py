@@ -0,0 +1,251 @@
+"""
+Stand-in for the ee module that replays recorded round-trip latencies.
+
+Earth Engine objects are lazy: building an image or a reducer costs nothing and
+only getInfo (computeValue), getMapId and Initialize reach the servers. The fake
+keeps that split. Graph-building calls return FakeNode objects that track just
+enough (band names, reducer outputs, collection sizes) to fabricate a plausibly
+shaped result, and the three round trips sleep for a latency drawn from the
+recording and are counted.
+"""
+import sys
+import json
+import time
+import random
+import threading
+import types
+
+# Round-trip kinds, as stored in recordings and reported by the benchmark
+INITIALIZE = "initialize"
+GET_MAP_ID = "getMapId"
+COMPUTE_VALUE = "computeValue"
+
+
+class Replayer:
+    """Draws latencies from a recording and counts round trips (thread-safe)."""
+
+    def __init__(self, recording, seed=0, time_scale=1.0):
+        self.calls = recording["calls"]
+        self.time_scale = time_scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.round_trips = {INITIALIZE: 0, GET_MAP_ID: 0, COMPUTE_VALUE: 0}
+            self.payload_bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.round_trips), self.payload_bytes
+
+    def round_trip(self, kind, payload_bytes=0):
+        """
+        Sleep like one recorded call of this kind.
+
+        The recorded samples are split into a fixed part and a size-dependent
+        part (ms_per_kb); the replayed latency keeps a random sample's fixed part
+        and adds the size-dependent part of the fabricated payload.
+        """
+        profile = self.calls.get(kind, {})
+        samples = profile.get("latency_ms") or [0]
+        sizes = profile.get("payload_bytes") or [0] * len(samples)
+        ms_per_kb = profile.get("ms_per_kb", 0.0)
+        with self._lock:
+            index = self._random.randrange(len(samples))
+            self.round_trips[kind] += 1
+            self.payload_bytes += payload_bytes
+        fixed = max(samples[index] - ms_per_kb * sizes[index] / 1024, 0.0)
+        latency_ms = fixed + ms_per_kb * payload_bytes / 1024
+        time.sleep(latency_ms / 1000 * self.time_scale)
+
+
+class FakeNode:
+    """Any lazily built Earth Engine object (image, collection, reducer, geometry, ...)."""
+
+    def __init__(self, replayer, bands=None, outputs=None, size=None, op=None):
+        self._replayer = replayer
+        self.bands = list(bands or [])
+        self.outputs = list(outputs or [])
+        self.size_hint = size
+        self.op = op
+
+    def _derive(self, **changes):
+        values = {"bands": self.bands, "outputs": self.outputs, "size": self.size_hint, "op": None}
+        values.update(changes)
+        return FakeNode(self._replayer, **values)
+
+    def __getattr__(self, name):
+        # Unknown graph-building methods keep the node's shape
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._derive()
+
+    # Images and collections
+    def select(self, *bands, **kwargs):
+        names = bands[0] if len(bands) == 1 and isinstance(bands[0], list) else list(bands)
+        return self._derive(bands=[name for name in names if isinstance(name, str)] or self.bands)
+
+    def rename(self, *names):
+        names = names[0] if len(names) == 1 and isinstance(names[0], list) else list(names)
+        return self._derive(bands=names)
+
+    def remap(self, *args, **kwargs):
+        return self._derive(bands=["remapped"])
+
+    def mosaic(self):
+        return self._derive(bands=self.bands or ["b1"])
+
+    def map(self, func):
+        func(FakeNode(self._replayer))
+        return self._derive()
+
+    # Reducers
+    def combine(self, other, **kwargs):
+        return self._derive(outputs=self.outputs + other.outputs)
+
+    # Round trips
+    def reduceRegion(self, **kwargs):
+        return self._derive(op=("reduceRegion", kwargs.get("reducer")))
+
+    def reduceRegions(self, collection=None, reducer=None, **kwargs):
+        return self._derive(op=("reduceRegions", reducer), size=collection.size_hint if collection else 0)
+
+    def getMapId(self, vis_params=None):
+        self._replayer.round_trip(GET_MAP_ID, 200)
+        map_id = f"projects/earthengine-legacy/maps/fake-{random.getrandbits(48):012x}"
+        url_format = f"https://earthengine.googleapis.com/v1/{map_id}/tiles/{{z}}/{{x}}/{{y}}"
+        return {"mapid": map_id, "token": "", "tile_fetcher": types.SimpleNamespace(url_format=url_format)}
+
+    def getInfo(self):
+        result = self._fabricate()
+        self._replayer.round_trip(COMPUTE_VALUE, len(json.dumps(result)))
+        return result
+
+    def _fabricate(self):
+        """A result shaped like Earth Engine's for the recorded operation."""
+        if self.op is None:
+            return {}
+        operation, reducer = self.op
+        outputs = reducer.outputs if reducer is not None else ["mean"]
+        bands = self.bands or ["b1"]
+        if operation == "reduceRegion":
+            return {band: _value(outputs[0]) for band in bands}
+        features = []
+        for index in range(self.size_hint or 0):
+            properties = {"region_index": index}
+            for band in bands:
+                for output in outputs:
+                    if len(outputs) == 1:
+                        name = output if len(bands) == 1 else band
+                    else:
+                        name = output if len(bands) == 1 else f"{band}_{output}"
+                    properties[name] = _value(output)
+            features.append({"type": "Feature", "geometry": None, "properties": properties})
+        return {"type": "FeatureCollection", "features": features}
+
+
+def _value(output):
+    """Plausible value of one reducer output."""
+    if output == "histogram":
+        return {str(value): random.randint(0, 50000) for value in range(1, 10)}
+    if output == "count":
+        return random.randint(100, 100000)
+    if output == "mode":
+        return random.randint(1, 9)
+    return round(random.uniform(0.12, 0.15), 6)
+
+
+def _reducer(replayer, output):
+    return lambda *args, **kwargs: FakeNode(replayer, outputs=[output])
+
+
+def build_module(replayer):
+    """Create the fake ee module bound to a replayer."""
+    ee = types.ModuleType("ee")
+
+    def node(*args, **kwargs):
+        return FakeNode(replayer)
+
+    def feature_collection(features=None, *args, **kwargs):
+        return FakeNode(replayer, size=len(features) if isinstance(features, list) else None)
+
+    def image_collection(*args, **kwargs):
+        return FakeNode(replayer)
+
+    def cat(images):
+        bands = []
+        for image in images:
+            bands.extend(image.bands)
+        return FakeNode(replayer, bands=bands)
+
+    def initialize(*args, **kwargs):
+        replayer.round_trip(INITIALIZE)
+
+    class EEException(Exception):
+        pass
+
+    ee.EEException = EEException
+    ee.Initialize = initialize
+    ee.ServiceAccountCredentials = lambda *args, **kwargs: types.SimpleNamespace(
+        token="fake-token", expiry=None, refresh=lambda request: None
+    )
+    ee.ImageCollection = image_collection
+    ee.Feature = node
+    ee.FeatureCollection = feature_collection
+    ee.Geometry = node
+    ee.Number = node
+    ee.String = node
+    ee.Dictionary = node
+    ee.Date = types.SimpleNamespace(fromYMD=node)
+    ee.List = types.SimpleNamespace(sequence=node)
+    ee.Filter = types.SimpleNamespace(inList=node, eq=node, date=node)
+    ee.Algorithms = types.SimpleNamespace(If=node)
+    ee.Reducer = types.SimpleNamespace(
+        mean=_reducer(replayer, "mean"),
+        mode=_reducer(replayer, "mode"),
+        count=_reducer(replayer, "count"),
+        sum=_reducer(replayer, "sum"),
+        frequencyHistogram=_reducer(replayer, "histogram"),
+        fixedHistogram=_reducer(replayer, "histogram")
+    )
+
+    def image(value=None, *args, **kwargs):
+        # ee.Image(...) is also used as a cast of computed objects
+        return value if isinstance(value, FakeNode) else FakeNode(replayer)
+
+    image.cat = cat
+    image.constant = node
+    image.pixelArea = lambda: FakeNode(replayer, bands=["area"])
+    ee.Image = image
+    return ee
+
+
+def install(recording, seed=0, time_scale=1.0):
+    """
+    Put the fake ee module in sys.modules. Must run before the
+    service modules are imported.
+
+    Returns:
+        Replayer: Use reset() / snapshot() around each measured run.
+    """
+    replayer = Replayer(recording, seed=seed, time_scale=time_scale)
+    sys.modules["ee"] = build_module(replayer)
+    try:
+        import google.auth.transport.requests  # noqa: F401
+    except ImportError:
+        # Only imported by ee_session; the fake credentials never refresh
+        google = types.ModuleType("google")
+        auth = types.ModuleType("google.auth")
+        transport = types.ModuleType("google.auth.transport")
+        requests_module = types.ModuleType("google.auth.transport.requests")
+        requests_module.Request = lambda: None
+        google.auth, auth.transport, transport.requests = auth, transport, requests_module
+        sys.modules.update({
+            "google": google,
+            "google.auth": auth,
+            "google.auth.transport": transport,
+            "google.auth.transport.requests": requests_module
+        })
+    return replayer
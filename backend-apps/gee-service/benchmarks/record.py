@@ -0,0 +1,97 @@
+"""
+Record Earth Engine round-trip latencies for the benchmark stand-in.
+
+Runs the real processors against live Earth Engine (credentials from .env) and
+times every ee.data.computeValue (getInfo), ee.data.getMapId and ee.Initialize
+call. The samples, and a per-KB latency slope for computeValue fitted over the
+payload sizes, are written in the format benchmarks/fake_ee.py replays.
+
+Usage (from backend-apps/gee-service):
+    python benchmarks/record.py --regions Pune,Nashik --years 2019,2020 --output benchmarks/recordings/mine.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+import ee  # noqa: E402
+
+_samples = {"initialize": [], "getMapId": [], "computeValue": []}
+_lock = threading.Lock()
+
+
+def _timed(kind, func, measure_payload):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        payload = len(json.dumps(result, default=str)) if measure_payload else 0
+        with _lock:
+            _samples[kind].append((round(elapsed_ms, 1), payload))
+        return result
+    return wrapper
+
+
+def ms_per_kb(samples):
+    """Least-squares slope of latency over payload size, never negative."""
+    if len(samples) < 2:
+        return 0.0
+    xs = [payload / 1024 for _, payload in samples]
+    ys = [latency for latency, _ in samples]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+    return round(max(slope, 0.0), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="Land Cover,Ozone")
+    parser.add_argument("--regions", required=True, help="Comma-separated region names")
+    parser.add_argument("--years", required=True, help="start,end year")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    os.chdir(SERVICE_DIR)
+    # Every call must reach Earth Engine to be recorded
+    os.environ["CACHE_ENABLED"] = "false"
+    ee.data.computeValue = _timed("computeValue", ee.data.computeValue, True)
+    ee.data.getMapId = _timed("getMapId", ee.data.getMapId, True)
+    ee.Initialize = _timed("initialize", ee.Initialize, False)
+
+    from datasets import get_processor_class
+    start_year, end_year = (int(year) for year in args.years.split(","))
+    regions = [region.strip() for region in args.regions.split(",")]
+    for dataset in args.datasets.split(","):
+        processor = get_processor_class(dataset.strip())(regions, start_year, end_year)
+        processor.generate_urls()
+        print(f"Recorded {dataset}: {sum(len(samples) for samples in _samples.values())} calls so far")
+
+    calls = {}
+    for kind, samples in _samples.items():
+        calls[kind] = {"latency_ms": [latency for latency, _ in samples]}
+        if kind != "initialize":
+            calls[kind]["payload_bytes"] = [payload for _, payload in samples]
+            calls[kind]["ms_per_kb"] = ms_per_kb(samples)
+    recording = {
+        "description": f"Recorded {datetime.now(timezone.utc).date()} for {args.datasets} "
+                       f"over {len(regions)} regions, {start_year}-{end_year}",
+        "calls": calls
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(recording, f, indent=2)
+    print(f"Recording written to {output}")
+
+
+if __name__ == "__main__":
+    main()
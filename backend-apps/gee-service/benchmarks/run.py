@@ -0,0 +1,228 @@
+"""
+Benchmark landcover_main / ozone_main / no2_main against the recorded Earth Engine stand-in.
+
+Usage (from backend-apps/gee-service):
+    python benchmarks/run.py --regions 1,5,20 --years 1,3 --repeat 5 --output benchmarks/results/latest.json
+    python benchmarks/run.py --compare benchmarks/results/baseline.json
+
+No Earth Engine credentials are needed: ee is replaced by
+benchmarks/fake_ee.py, which sleeps like the recorded round trips.
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, SERVICE_DIR)
+
+import fake_ee  # noqa: E402
+
+# First year with data for each dataset
+DATASET_START_YEARS = {"Land Cover": 2017, "Ozone": 2019, "NO2": 2019}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def synthetic_boundaries(count, vertices=400):
+    """
+    Write a grid of circular districts near Pune to a temporary GeoJSON file.
+
+    Used when the real boundary file is not available (e.g. a Git LFS pointer).
+    """
+    features = []
+    columns = math.ceil(math.sqrt(count))
+    for index in range(count):
+        cx = 73.0 + (index % columns) * 0.3
+        cy = 18.0 + (index // columns) * 0.3
+        ring = [[cx + 0.12 * math.cos(2 * math.pi * step / vertices),
+                 cy + 0.12 * math.sin(2 * math.pi * step / vertices)] for step in range(vertices)]
+        ring.append(ring[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"shapeName": f"District {index:03d}", "shapeID": f"SYN-{index:03d}"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}
+        })
+    handle, path = tempfile.mkstemp(suffix=".geojson", prefix="benchmark-boundaries-")
+    with os.fdopen(handle, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return path
+
+
+def usable_boundaries(path):
+    """True if the file parses as GeoJSON with features."""
+    try:
+        with open(path) as f:
+            return bool(json.load(f).get("features"))
+    except Exception:
+        return False
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_case(main, replayer, regions, start_year, end_year, repeat):
+    """Time repeat calls of a *_main function; returns the aggregated measurements."""
+    latencies, round_trips, payloads, peaks, errors = [], [], [], [], 0
+    for _ in range(repeat):
+        replayer.reset()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = main(regions, start_year, end_year)
+            errors += len(result[-1])
+        except Exception as e:
+            logging.error(f"Benchmark run failed: {str(e)}")
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        trips, payload = replayer.snapshot()
+        round_trips.append(trips)
+        payloads.append(payload)
+
+    return {
+        "runs": repeat,
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "max_ms": round(max(latencies), 1),
+        "round_trips": {kind: max(trips[kind] for trips in round_trips) for kind in round_trips[0]},
+        "payload_bytes": max(payloads),
+        "peak_memory_mb": round(max(peaks) / (1024 * 1024), 2),
+        "errors": errors
+    }
+
+
+def compare(results, baseline_path):
+    """Print p50/p95 and round-trip changes against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = {
+            (case["dataset"], case["regions"], case["years"]): case for case in json.load(f)["results"]
+        }
+    print(f"\nCompared with {baseline_path}:")
+    for case in results:
+        old = baseline.get((case["dataset"], case["regions"], case["years"]))
+        if old is None:
+            continue
+        trips = sum(case["round_trips"].values())
+        old_trips = sum(old["round_trips"].values())
+        print(f"  {case['dataset']:<10} regions={case['regions']:<3} years={case['years']:<2} "
+              f"p50 {old['p50_ms']:>9.1f} -> {case['p50_ms']:>9.1f} ms  "
+              f"p95 {old['p95_ms']:>9.1f} -> {case['p95_ms']:>9.1f} ms  "
+              f"round trips {old_trips} -> {trips}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", default=os.path.join(BENCHMARK_DIR, "recordings", "default.json"))
+    parser.add_argument("--datasets", default="Land Cover,Ozone", help="Comma-separated dataset names")
+    parser.add_argument("--regions", default="1,5,20", help="Comma-separated region counts")
+    parser.add_argument("--years", default="1,3", help="Comma-separated year range lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--boundaries", default=None,
+                        help="GeoJSON with the regions (default: Settings.BOUNDARIES_GEOJSON, "
+                             "or synthetic districts if that file is not usable)")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Multiply every replayed latency, e.g. 0.1 for a quick smoke run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    # Paths are relative to where the command was run, not the service directory
+    for name in ("recording", "boundaries", "output", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    with open(args.recording) as f:
+        recording = json.load(f)
+    replayer = fake_ee.install(recording, seed=args.seed, time_scale=args.time_scale)
+
+    region_counts = [int(value) for value in args.regions.split(",")]
+    year_ranges = [int(value) for value in args.years.split(",")]
+    datasets = [value.strip() for value in args.datasets.split(",")]
+
+    # Settings reads the environment at import time, so configure it first
+    os.chdir(SERVICE_DIR)
+    os.environ["CACHE_ENABLED"] = "true" if args.cache else "false"
+    os.environ["TILE_PROXY"] = "false"
+    if not args.cache:
+        os.environ["CACHE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="benchmark-cache-"), "results.sqlite3")
+    boundaries = args.boundaries or os.getenv("BOUNDARIES_GEOJSON", "../../boundaries/datasets/ADM4.geojson")
+    synthetic = not usable_boundaries(boundaries)
+    if synthetic:
+        boundaries = synthetic_boundaries(max(region_counts))
+    os.environ["BOUNDARIES_GEOJSON"] = boundaries
+
+    from map_helper.boundary_registry import get_boundary_registry
+    from map_helper.esri_map_helper import landcover_main
+    from map_helper.o3_map_generator import ozone_main
+    from map_helper.map_generator import no2_main
+    logging.getLogger().setLevel(logging.WARNING)
+    mains = {"Land Cover": landcover_main, "Ozone": ozone_main, "NO2": no2_main}
+
+    names = [feature["properties"]["shapeName"] for feature in get_boundary_registry(boundaries).features]
+    results = []
+    for dataset in datasets:
+        for region_count in region_counts:
+            for years in year_ranges:
+                start_year = DATASET_START_YEARS[dataset]
+                case = {"dataset": dataset, "regions": region_count, "years": years}
+                case.update(run_case(
+                    mains[dataset], replayer, names[:region_count], start_year, start_year + years - 1, args.repeat
+                ))
+                results.append(case)
+                print(f"{dataset:<10} regions={region_count:<3} years={years:<2} "
+                      f"p50={case['p50_ms']:>9.1f} ms  p95={case['p95_ms']:>9.1f} ms  "
+                      f"round trips={sum(case['round_trips'].values()):<4} "
+                      f"peak={case['peak_memory_mb']:.1f} MB  errors={case['errors']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "recording": os.path.relpath(args.recording, SERVICE_DIR),
+            "boundaries": "synthetic" if synthetic else boundaries,
+            "cache": args.cache,
+            "time_scale": args.time_scale,
+            "repeat": args.repeat,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measure cold start of the gee-service app: import time and resident memory.
+
+Each run imports the app in a fresh interpreter (what a gunicorn worker or a
+restarted dev server pays) and reports the wall-clock import time, RSS after
+the import and which heavy notebook packages ended up loaded.
+
+Usage (from backend-apps/gee-service):
+    python benchmarks/startup.py --repeat 5
+    python benchmarks/startup.py --repeat 5 --also geemap    # the old import path, for comparison
+    python benchmarks/startup.py --fake-ee                     # without earthengine-api installed
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Packages that should not be needed to serve requests
+HEAVY_MODULES = ["geemap", "ipyleaflet", "ipywidgets", "folium", "matplotlib", "IPython", "plotly"]
+
+# Runs in the child interpreter; prints one JSON line
+_CHILD = """
+import os, sys, json, time, resource
+start = time.perf_counter()
+if {fake_ee}:
+    sys.path.insert(0, {benchmark_dir!r})
+    import fake_ee
+    fake_ee.install({{"calls": {{}}}})
+for name in {also!r}:
+    __import__(name)
+import {module}
+elapsed = time.perf_counter() - start
+
+rss_kb = None
+try:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = peak // 1024 if sys.platform == "darwin" else peak
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure(module, also, fake_ee):
+    code = _CHILD.format(
+        fake_ee=fake_ee, benchmark_dir=BENCHMARK_DIR, also=also, module=module, heavy=HEAVY_MODULES
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=SERVICE_DIR, env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--also", default="", help="Comma-separated modules imported first, e.g. geemap")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fake-ee", action="store_true", help="Replace ee with benchmarks/fake_ee.py")
+    parser.add_argument("--output", default=None, help="Write the measurements as JSON to this file")
+    args = parser.parse_args()
+    also = [name.strip() for name in args.also.split(",") if name.strip()]
+
+    # The first run warms the OS file cache; it is not counted
+    measure(args.module, also, args.fake_ee)
+    runs = [measure(args.module, also, args.fake_ee) for _ in range(args.repeat)]
+    report = {
+        "module": args.module,
+        "also": also,
+        "fake_ee": args.fake_ee,
+        "runs": args.repeat,
+        "import_seconds_median": round(statistics.median(run["import_seconds"] for run in runs), 3),
+        "import_seconds_max": round(max(run["import_seconds"] for run in runs), 3),
+        "rss_mb_median": round(statistics.median(run["rss_mb"] for run in runs), 1),
+        "modules_loaded": runs[-1]["modules"],
+        "heavy_modules_loaded": runs[-1]["heavy"]
+    }
+    print(f"import {', '.join(also + [args.module])}: "
+          f"{report['import_seconds_median']:.3f} s median ({report['import_seconds_max']:.3f} s max), "
+          f"RSS {report['rss_mb_median']:.1f} MB, {report['modules_loaded']} modules, "
+          f"heavy: {', '.join(report['heavy_modules_loaded']) or 'none'}")
+    if args.output:
+        output = os.path.abspath(args.output)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""zoom / simplify_level / boundary_format validation of the boundary endpoints."""
+import pytest
+
+
+@pytest.fixture
+def client():
+    import app as app_module
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("query", [
+    "zoom=abc", "zoom=1.5", "zoom=-1", "zoom=99", "simplify_level=x", "simplify_level=9",
+    "boundary_format=svg",
+])
+def test_invalid_boundary_options_are_rejected(client, query):
+    response = client.get(f"/api/boundaries?ids=SYN-000&{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("query", ["zoom=8", "simplify_level=2", "boundary_format=topojson", ""])
+def test_valid_boundary_options(client, query):
+    assert client.get(f"/api/boundaries?ids=SYN-000&{query}").status_code == 200
+
+
+@pytest.mark.parametrize("options", [{"zoom": "abc"}, {"zoom": 1.5}, {"simplify_level": [1]}])
+def test_generate_maps_rejects_invalid_options(client, options):
+    body = dict({"dataset": "Ozone", "start_year": 2019, "end_year": 2019,
+                 "selected_regions": ["District 000"]}, **options)
+    assert client.post("/api/generate_maps", json=body).status_code == 400
+
+
+def test_job_status_rejects_invalid_options(client):
+    job = client.post("/api/jobs", json={"dataset": "Ozone", "start_year": 2019, "end_year": 2019,
+                                         "selected_regions": ["District 000"]}).get_json()
+    assert client.get(f"/api/jobs/{job['job_id']}?zoom=1.5").status_code == 400
+    assert client.get(f"/api/jobs/{job['job_id']}?zoom=5").status_code == 200
@@ -0,0 +1,153 @@
+"""Earth Engine call gateway (ee_gateway.py): error classes, AIMD, retries and deadlines."""
+import os
+import time
+import threading
+import importlib.util
+
+import pytest
+
+from ee_gateway import EEGateway, DeadlineExceeded, deadline_scope, classify_error, QUOTA, TRANSIENT
+
+MEASUREMENTS_GATEWAY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "data-pipeline", "measurements", "ee_gateway.py"
+)
+
+
+class EEException(Exception):
+    pass
+
+
+class HttpError(Exception):
+    def __init__(self, status):
+        super().__init__("request failed")
+        self.resp = type("Response", (), {"status": status})()
+
+
+@pytest.mark.parametrize("message", [
+    "Too many pixels in the region. Found 15000000, but maxPixels allows only 10000000.",
+    "Geometry has an area of 4290 km2, which is too large for this reducer.",
+    "Image.select: Pattern 'B5000' did not match any bands.",
+])
+def test_numbers_in_deterministic_errors_are_not_statuses(message):
+    assert classify_error(EEException(message)) is None
+
+
+@pytest.mark.parametrize("error, kind", [
+    (EEException("<HttpError 429 when requesting https://earthengine.googleapis.com/...>"), QUOTA),
+    (EEException("Too many concurrent aggregations."), QUOTA),
+    (EEException("Earth Engine memory quota exceeded."), QUOTA),
+    (EEException("503 Server Error: Service Unavailable for url: ..."), TRANSIENT),
+    (EEException("Request failed with status code: 502"), TRANSIENT),
+    (EEException("Internal error."), TRANSIENT),
+    (ConnectionError("reset by peer"), TRANSIENT),
+    (HttpError(429), QUOTA),
+    (HttpError(504), TRANSIENT),
+    (HttpError(400), None),
+    (EEException("Collection.loadTable: Table not found."), None),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def failing(errors):
+    """A call that raises the given errors in turn, then returns "ok"."""
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return func, calls
+
+
+def test_transient_errors_are_retried():
+    gateway = EEGateway(base_delay=0.001, max_retries=3)
+    func, calls = failing([EEException("Internal error."), EEException("Internal error.")])
+    assert gateway.call(func) == "ok"
+    assert len(calls) == 3
+    stats = gateway.stats()
+    assert (stats["retries"], stats["transient_errors"], stats["succeeded"], stats["failed"]) == (2, 2, 1, 0)
+
+
+def test_deterministic_errors_are_raised_at_once():
+    gateway = EEGateway(base_delay=0.001)
+    func, calls = failing([EEException("Too many pixels in the region. Found 15000000.")])
+    with pytest.raises(EEException):
+        gateway.call(func)
+    assert len(calls) == 1
+    assert gateway.stats()["concurrency_limit"] == 4
+
+
+def test_retries_stop_at_the_limit():
+    gateway = EEGateway(base_delay=0.001, max_retries=2)
+    func, calls = failing([EEException("Internal error.")] * 5)
+    with pytest.raises(EEException):
+        gateway.call(func)
+    assert len(calls) == 3
+    assert gateway.stats()["failed"] == 1
+
+
+def test_aimd_limit():
+    gateway = EEGateway(initial_concurrency=8, max_concurrency=10, base_delay=0.001)
+    func, _ = failing([EEException("Quota exceeded.")])
+    gateway.call(func)
+    # Halved (8 -> 4), then raised by 1/limit for the success
+    assert gateway.stats()["concurrency_limit"] == 4.25
+    for _ in range(100):
+        gateway.call(lambda: None)
+    assert gateway.stats()["concurrency_limit"] == 10
+
+
+def test_a_burst_of_quota_errors_halves_once():
+    gateway = EEGateway(initial_concurrency=8, min_concurrency=1, base_delay=10.0)
+    for _ in range(5):
+        gateway._on_quota_error()
+    stats = gateway.stats()
+    assert (stats["quota_errors"], stats["concurrency_limit"]) == (5, 4)
+
+
+def test_backoff_is_capped():
+    gateway = EEGateway(base_delay=1.0, max_delay=5.0)
+    assert all(0 <= gateway._backoff(attempt) <= 5.0 for attempt in range(20))
+
+
+def test_no_slot_after_the_deadline():
+    gateway = EEGateway(initial_concurrency=1, max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+    holder = threading.Thread(target=gateway.call, args=(hold,))
+    holder.start()
+    started.wait(5)
+    try:
+        with deadline_scope(time.monotonic() + 0.05):
+            with pytest.raises(DeadlineExceeded):
+                gateway.call(lambda: None)
+    finally:
+        release.set()
+        holder.join()
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_no_retry_past_the_deadline():
+    gateway = EEGateway(max_retries=5)
+    gateway._backoff = lambda attempt: 1.0
+    func, calls = failing([EEException("Internal error.")] * 5)
+    with deadline_scope(time.monotonic() + 0.5):
+        with pytest.raises(EEException):
+            gateway.call(func)
+    assert len(calls) == 1
+    assert gateway.stats()["retries"] == 0
+
+
+def test_measurement_scripts_share_the_gateway():
+    spec = importlib.util.spec_from_file_location("measurements_ee_gateway", MEASUREMENTS_GATEWAY)
+    shim = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(shim)
+    import ee_gateway
+    assert os.path.samefile(shim.GATEWAY_PATH, ee_gateway.__file__)
+    assert shim.EEGateway.call.__code__.co_code == EEGateway.call.__code__.co_code
@@ -0,0 +1,130 @@
+"""Background map jobs and the merging of identical in-flight units (jobs.py)."""
+import time
+
+import pytest
+
+from jobs import SingleFlight, MapJob, JobManager, DONE, FAILED, RUNNING
+from map_helper.o3_map_generator import OzoneMapProcessor
+
+REGIONS = ["District 000", "District 001"]
+
+
+def wait_finished(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return job
+
+
+def test_single_flight_leader_and_followers():
+    flight = SingleFlight()
+    owned, shared = flight.claim({"a", "b"})
+    assert set(owned) == {"a", "b"} and shared == {}
+    owned_again, shared_again = flight.claim({"b", "c"})
+    assert set(owned_again) == {"c"} and set(shared_again) == {"b"}
+
+    flight.resolve("b", {"stats": 1})
+    assert shared_again["b"].result(timeout=1) == {"stats": 1}
+    # Once resolved, the next claim leads again
+    assert set(flight.claim({"b"})[0]) == {"b"}
+
+
+def test_single_flight_leader_failure_reaches_followers():
+    flight = SingleFlight()
+    flight.claim({"a"})
+    _, shared = flight.claim({"a"})
+    flight.resolve("a", error=RuntimeError("Earth Engine said no"))
+    with pytest.raises(RuntimeError, match="Earth Engine said no"):
+        shared["a"].result(timeout=1)
+    assert flight.in_flight() == 0
+    # Resolving twice or resolving an unknown unit is harmless
+    flight.resolve("a", {"stats": 1})
+    flight.resolve("missing")
+
+
+def test_map_job_results_have_the_generate_urls_shape():
+    job = MapJob("Ozone", REGIONS, 2019, 2019)
+    job.keys = ["A", "B", "C", "D"]
+    job.add_result({"key": "A", "url": "u", "stats": None})
+    job.add_result({"key": "B", "url": "u", "stats": None, "error": "statistics: too slow", "timed_out": True})
+    job.add_result({"key": "C", "url": None, "stats": 3, "error": "map ID failed"})
+    data = job.to_dict()
+    assert data["urls"] == {"A": "u", "B": "u"}
+    assert data["stats"] == {"A": None, "C": 3}
+    assert (data["timed_out"], data["failed"]) == (["B"], ["C"])
+    assert (data["completed"], data["total"]) == (3, 4)
+    assert "geojson_data" not in data
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2, retention=60)
+    yield manager
+    manager.shutdown()
+
+
+def test_job_matches_generate_urls(manager):
+    urls, stats, geojson = OzoneMapProcessor(REGIONS, 2019, 2019).generate_urls()
+    job = wait_finished(manager.submit("Ozone", REGIONS, 2019, 2019))
+    data = job.to_dict()
+    assert data["status"] == DONE
+    # The stand-in's values are random; the keys and their order are what must match
+    assert (list(data["urls"]), list(data["stats"])) == (list(urls), list(stats))
+    assert data["geojson_data"] == geojson
+    assert manager.single_flight.in_flight() == 0
+
+
+def unit_ids(regions):
+    return OzoneMapProcessor(regions, 2019, 2019).unit_ids()
+
+
+def wait_for_own_units(job, count, timeout=10):
+    """Wait until the job has computed its own units and only waits on the leader."""
+    deadline = time.monotonic() + timeout
+    while job.to_dict()["completed"] < count:
+        assert time.monotonic() < deadline, "job did not compute its own units"
+        time.sleep(0.01)
+
+
+def test_units_in_flight_elsewhere_are_taken_from_their_leader(manager):
+    ids = unit_ids(REGIONS)
+    leader_key = next(iter(ids))
+    # Another job leads the first unit
+    manager.single_flight.claim({ids[leader_key]})
+    job = manager.submit("Ozone", REGIONS, 2019, 2019)
+    wait_for_own_units(job, len(ids) - 1)
+    assert job.status == RUNNING
+
+    manager.single_flight.resolve(ids[leader_key], {"key": "other name", "url": "leader-url", "stats": 0.5})
+    data = wait_finished(job).to_dict()
+    assert data["status"] == DONE
+    # Re-keyed to this job's name for the unit
+    assert data["urls"][leader_key] == "leader-url" and data["stats"][leader_key] == 0.5
+
+
+def test_leader_failure_is_reported_by_the_follower(manager):
+    ids = unit_ids(REGIONS)
+    leader_key = next(iter(ids))
+    manager.single_flight.claim({ids[leader_key]})
+    job = manager.submit("Ozone", REGIONS, 2019, 2019)
+    wait_for_own_units(job, len(ids) - 1)
+    manager.single_flight.resolve(ids[leader_key], error=RuntimeError("leader failed"))
+    data = wait_finished(job).to_dict()
+    assert data["status"] == DONE
+    assert data["errors"] == {leader_key: "leader failed"}
+    assert data["failed"] == [leader_key]
+    assert leader_key not in data["stats"] and leader_key not in data["urls"]
+
+
+def test_failing_job_releases_its_units(manager, monkeypatch):
+    def broken(self, only_keys=None):
+        yield from ()
+        raise RuntimeError("quota exhausted")
+    monkeypatch.setattr(OzoneMapProcessor, "iter_layers", broken)
+    ids = unit_ids(REGIONS)
+    job = wait_finished(manager.submit("Ozone", REGIONS, 2019, 2019))
+    assert (job.status, job.error) == (FAILED, "quota exhausted")
+    assert manager.single_flight.in_flight() == 0
+    # A later claim leads instead of waiting on the failed job
+    assert set(manager.single_flight.claim(set(ids.values()))[0]) == set(ids.values())
@@ -0,0 +1,51 @@
+"""Regions selected by shapeID whose shapeName is shared with another boundary."""
+import json
+import tempfile
+
+import pytest
+
+from config import Settings
+from map_helper import base_processor
+from map_helper.esri_map_helper import LandCoverMapProcessor
+
+
+def square(x, y):
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + 0.1, y], [x + 0.1, y + 0.1], [x, y + 0.1], [x, y]]]}
+
+
+@pytest.fixture
+def duplicate_names(monkeypatch):
+    """Two boundaries named "Haveli" (it is a taluka name in more than one district)."""
+    features = [
+        {"type": "Feature", "properties": {"shapeName": "Haveli", "shapeID": "PUNE-HAVELI"}, "geometry": square(73, 18)},
+        {"type": "Feature", "properties": {"shapeName": "Haveli", "shapeID": "OTHER-HAVELI"}, "geometry": square(74, 18)},
+    ]
+    path = tempfile.mkstemp(suffix=".geojson", prefix="duplicate-names-")[1]
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    monkeypatch.setattr(Settings, "BOUNDARIES_GEOJSON", path)
+
+
+def test_second_feature_of_a_shared_name_is_known(duplicate_names, monkeypatch):
+    recipes = []
+    monkeypatch.setattr(base_processor.tile_store, "register_layer",
+                        lambda layer, url, recipe: recipes.append(recipe))
+    processor = LandCoverMapProcessor(["OTHER-HAVELI"], 2019, 2019)
+    processor.tile_proxy = True
+    features, _, units, region_ids = processor._prepare()
+
+    assert processor._is_known(features[0])
+    assert region_ids[0]["shapeID"] == "OTHER-HAVELI"
+    # Neither decomposed into districts nor inlined as a custom geometry
+    assert processor._compositions_map == {}
+    assert processor.layout()[0] == [{"name": "Haveli", "id": "OTHER-HAVELI"}]
+    processor._client_url(units[0], "layer", "https://upstream/{z}/{x}/{y}")
+    assert recipes[0]["region"] == "OTHER-HAVELI"
+
+
+def test_custom_geometry_is_not_known(duplicate_names):
+    processor = LandCoverMapProcessor([square(75, 18)], 2019, 2019)
+    features, _, _, region_ids = processor._prepare()
+    assert not processor._is_known(features[0])
+    assert "geometry" in region_ids[0]
+    assert processor.layout()[0] == [{"name": "Custom Region", "id": None}]
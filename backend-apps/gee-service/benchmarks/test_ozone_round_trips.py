@@ -0,0 +1,58 @@
+"""Earth Engine round trips of an ozone request (map_helper/o3_map_generator.py)."""
+import datasets
+from config import Settings
+from fake_ee import GET_MAP_ID, COMPUTE_VALUE
+from map_helper import base_processor
+from map_helper.o3_map_generator import OzoneMapProcessor
+
+
+def round_trips(replayer, regions, start_year, end_year):
+    replayer.reset()
+    processor = OzoneMapProcessor(regions, start_year, end_year)
+    urls, stats, _ = processor.generate_urls()
+    assert not processor.errors
+    trips, _ = replayer.snapshot()
+    return len(urls), len(stats), trips
+
+
+def test_statistics_of_all_months_take_one_call(replayer):
+    one_year = round_trips(replayer, ["District 000", "District 001"], 2019, 2019)
+    three_years = round_trips(replayer, ["District 000", "District 001"], 2019, 2021)
+
+    assert one_year[:2] == (24, 24)
+    assert three_years[:2] == (72, 72)
+    assert one_year[2][COMPUTE_VALUE] == three_years[2][COMPUTE_VALUE] == 1
+
+
+def test_tiles_take_one_map_id_per_month(replayer):
+    # One layer per month clipped to all selected regions, shared by their keys
+    regions = ["District 000", "District 001", "District 002"]
+    replayer.reset()
+    urls, _, _ = OzoneMapProcessor(regions, 2019, 2020).generate_urls()
+    assert replayer.snapshot()[0][GET_MAP_ID] == 24
+    assert len(urls) == 3 * 24
+    for month in ("2019-01", "2020-12"):
+        assert len({urls[f"{region} - {month}"] for region in regions}) == 1
+    assert urls["District 000 - 2019-01"] != urls["District 000 - 2019-02"]
+
+
+def test_shared_layers_can_be_turned_off(replayer, monkeypatch):
+    monkeypatch.setattr(Settings, "SHARED_TILE_LAYERS", False)
+    _, _, trips = round_trips(replayer, ["District 000", "District 001"], 2019, 2020)
+    assert trips[GET_MAP_ID] == 2 * 24
+
+
+def test_proxied_shared_layer_is_reminted_for_all_regions(replayer, monkeypatch):
+    registered = {}
+    monkeypatch.setattr(base_processor.tile_store, "register_layer",
+                        lambda layer, url, recipe: registered.setdefault(layer, []).append(recipe))
+    processor = OzoneMapProcessor(["District 000", "District 001"], 2019, 2019)
+    processor.tile_proxy = True
+    urls, _, _ = processor.generate_urls()
+    assert len(registered) == 12 and len(set(urls.values())) == 12
+    recipe = registered[next(iter(registered))][0]
+    assert recipe["regions"] == ["SYN-000", "SYN-001"] and "region" not in recipe
+
+    replayer.reset()
+    assert datasets.mint_tile_url(recipe).startswith("https://")
+    assert replayer.snapshot()[0][GET_MAP_ID] == 1
@@ -0,0 +1,61 @@
+"""Latency budget -> reduction scale mapping (map_helper/reduction_scale.py)."""
+from map_helper.reduction_scale import approximate_area_m2, choose_reduction, MAX_TILE_SCALE
+
+PIXELS_PER_SECOND = 2e7
+
+# Roughly the area of Maharashtra
+LARGE_REGION_M2 = 3.08e11
+# Roughly one district
+DISTRICT_M2 = 1.0e9
+
+
+def test_large_region_is_coarsened_until_it_fits():
+    reduction = choose_reduction(LARGE_REGION_M2, 1, 10, 1.0, PIXELS_PER_SECOND)
+    assert reduction["scale"] == 160
+    assert reduction["native_scale"] == 10
+    assert reduction["estimated_pixels"] <= PIXELS_PER_SECOND
+
+
+def test_generous_budget_keeps_the_native_scale():
+    reduction = choose_reduction(DISTRICT_M2, 3, 10, 60.0, PIXELS_PER_SECOND)
+    assert reduction["scale"] == 10
+    assert reduction["tile_scale"] == 1
+
+
+def test_more_bands_need_a_coarser_scale():
+    one = choose_reduction(DISTRICT_M2, 1, 10, 0.5, PIXELS_PER_SECOND)
+    seven = choose_reduction(DISTRICT_M2, 7, 10, 0.5, PIXELS_PER_SECOND)
+    assert one["scale"] == 10
+    assert seven["scale"] == 40
+
+
+def test_tile_scale_grows_with_pixels_and_is_capped():
+    reduction = choose_reduction(LARGE_REGION_M2, 1, 10, 1000.0, PIXELS_PER_SECOND)
+    assert reduction["scale"] == 10
+    assert reduction["tile_scale"] == MAX_TILE_SCALE
+
+
+def test_area_of_a_one_degree_square_at_the_equator():
+    square = {"type": "Polygon", "coordinates": [[[0, -0.5], [1, -0.5], [1, 0.5], [0, 0.5], [0, -0.5]]]}
+    assert abs(approximate_area_m2(square) - 1.2364e10) / 1.2364e10 < 0.01
+
+
+def test_processor_applies_the_budget_to_scale_and_cache_key():
+    from map_helper.esri_map_helper import LandCoverMapProcessor
+    from map_helper.boundary_registry import get_boundary_registry
+    from config import Settings
+
+    names = [feature["properties"]["shapeName"]
+             for feature in get_boundary_registry(Settings.BOUNDARIES_GEOJSON).features]
+    native = LandCoverMapProcessor(names, 2019, 2021)
+    budgeted = LandCoverMapProcessor(names, 2019, 2021, latency_budget=0.1)
+    _, _, native_units, native_ids = native._prepare()
+    _, _, budgeted_units, budgeted_ids = budgeted._prepare()
+
+    assert native.reduction == {"scale": 10, "tile_scale": native.TILE_SCALE}
+    assert budgeted.reduction["scale"] > 10
+    assert budgeted.SCALE == budgeted.reduction["scale"]
+    assert budgeted.TILE_SCALE == budgeted.reduction["tile_scale"]
+    # Coarse statistics never stand in for native ones
+    assert native._cache_key("stats", native_ids[0], native_units[0]) != \
+        budgeted._cache_key("stats", budgeted_ids[0], budgeted_units[0])
@@ -0,0 +1,49 @@
+"""gee_request_seconds / gee_requests_in_flight of regular and streamed requests (metrics.py)."""
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+BODY = {"dataset": "Ozone", "start_year": 2019, "end_year": 2019, "selected_regions": ["District 000"]}
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def request_count():
+    return sample("gee_request_seconds_count", endpoint="generate_maps", dataset="Ozone")
+
+
+def in_flight():
+    return sample("gee_requests_in_flight", endpoint="generate_maps")
+
+
+@pytest.fixture
+def client():
+    import app as app_module
+    return app_module.app.test_client()
+
+
+def test_regular_request_is_recorded_when_it_returns(client):
+    count = request_count()
+    assert client.post("/api/generate_maps", json=BODY).status_code == 200
+    assert request_count() == count + 1
+    assert in_flight() == 0
+
+
+def test_streamed_request_is_recorded_when_the_stream_closes(client):
+    count = request_count()
+    total = sample("gee_request_seconds_sum", endpoint="generate_maps", dataset="Ozone")
+    response = client.post("/api/generate_maps", json=dict(BODY, stream="ndjson"), buffered=False)
+    # The view has returned, but the stream is still open
+    assert in_flight() == 1
+    assert request_count() == count
+
+    time.sleep(0.2)
+    lines = b"".join(response.response).splitlines()
+    response.close()
+    assert lines
+    assert in_flight() == 0
+    assert request_count() == count + 1
+    assert sample("gee_request_seconds_sum", endpoint="generate_maps", dataset="Ozone") - total >= 0.2
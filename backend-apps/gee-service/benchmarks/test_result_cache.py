@@ -0,0 +1,111 @@
+"""Tile URL / statistics cache (result_cache.py) and how the processors use it."""
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import result_cache as result_cache_module
+from result_cache import ResultCache, cache_key, TILE_URL, STATS
+from map_helper import base_processor
+from map_helper.base_processor import LayerUnit
+from map_helper.o3_map_generator import OzoneMapProcessor
+from fake_ee import GET_MAP_ID, COMPUTE_VALUE
+
+
+@pytest.fixture
+def cache_path():
+    return os.path.join(tempfile.mkdtemp(prefix="result-cache-"), "results.sqlite3")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(result_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_cache_key_ignores_dict_order():
+    assert cache_key(a=1, b={"x": 1, "y": [1, 2]}) == cache_key(b={"y": [1, 2], "x": 1}, a=1)
+    assert cache_key(a=1) != cache_key(a=2)
+
+
+def test_memory_then_disk_hits(cache_path):
+    cache = ResultCache(cache_path)
+    cache.set(STATS, "k", {"value": 1.5})
+    assert cache.get(STATS, "k") == {"value": 1.5}
+    # Another worker on the host only has the SQLite tier
+    other = ResultCache(cache_path)
+    assert other.get(STATS, "k") == {"value": 1.5}
+    assert other.get(STATS, "k") == {"value": 1.5}
+    assert other.stats()["counters"][STATS] == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+
+def test_entries_expire_in_both_tiers(cache_path, clock):
+    cache = ResultCache(cache_path)
+    cache.set(TILE_URL, "url", "https://tiles/{z}/{x}/{y}", ttl=60)
+    cache.set(STATS, "stat", {"value": 2}, ttl=None)
+    clock[0] += 59
+    assert cache.get(TILE_URL, "url") is not None
+    assert ResultCache(cache_path).get(TILE_URL, "url") is not None
+    clock[0] += 1
+    assert cache.get(TILE_URL, "url") is None
+    assert ResultCache(cache_path).get(TILE_URL, "url") is None
+    # ttl=None never expires
+    clock[0] += 10 ** 9
+    assert cache.get(STATS, "stat") == {"value": 2}
+
+
+def test_memory_tier_is_bounded(cache_path):
+    cache = ResultCache(cache_path, max_entries=2)
+    for key in "abc":
+        cache.set(STATS, key, key)
+    assert cache.stats()["memory_entries"] == 2
+    # The evicted entry is still on disk
+    assert cache.get(STATS, "a") == "a"
+    assert cache.stats()["counters"][STATS]["disk_hits"] == 1
+
+
+def test_purge_by_kind(cache_path):
+    cache = ResultCache(cache_path)
+    cache.set(STATS, "s", 1)
+    cache.set(TILE_URL, "t", "url")
+    assert cache.purge(TILE_URL) == 1
+    assert cache.get(TILE_URL, "t") is None
+    assert cache.get(STATS, "s") == 1
+    assert cache.purge() == 1
+
+
+def unit(interval_end):
+    return LayerUnit("District 000 - x", 0, "District 000", "x", "2019-01-01", interval_end)
+
+
+def test_finished_intervals_never_expire_and_ongoing_ones_do():
+    processor = OzoneMapProcessor(["District 000"], 2019, 2019)
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT23:59:59Z")
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%dT23:59:59Z")
+    assert processor._stats_ttl(unit(yesterday)) is None
+    assert processor._stats_ttl(unit(tomorrow)) == base_processor.result_cache.tile_ttl
+
+
+def test_second_request_is_served_from_the_cache(cache_path, monkeypatch, replayer):
+    cache = ResultCache(cache_path, tile_ttl=3600)
+    monkeypatch.setattr(base_processor, "result_cache", cache)
+
+    def run():
+        replayer.reset()
+        processor = OzoneMapProcessor(["District 000", "District 001"], 2019, 2019, use_cache=True)
+        urls, stats, _ = processor.generate_urls()
+        return urls, stats, replayer.snapshot()[0]
+
+    urls, stats, first = run()
+    # One shared ozone layer per month, one statistics call
+    assert first[GET_MAP_ID] == 12 and first[COMPUTE_VALUE] == 1
+    again_urls, again_stats, second = run()
+    assert (again_urls, again_stats) == (urls, stats)
+    assert second[GET_MAP_ID] == second[COMPUTE_VALUE] == 0
+
+    # Expired tile URLs are minted again; finished months' statistics are kept
+    cache.purge(TILE_URL)
+    _, _, third = run()
+    assert third[GET_MAP_ID] == 12 and third[COMPUTE_VALUE] == 0
@@ -0,0 +1,104 @@
+"""Simplification and TopoJSON on borders shared by neighbouring regions (geometry_simplify.py)."""
+import math
+import random
+
+from shapely.geometry import shape
+from shapely.ops import unary_union
+
+from map_helper.geometry_simplify import build_topology, simplify_shared, to_topojson, simplify_geometry
+
+
+def jagged_grid(columns, rows, points_per_edge=60, cell=0.1, seed=1):
+    """Grid of cells whose common edges are the same wiggly line on both sides."""
+    rng = random.Random(seed)
+    edges = {}
+
+    def edge(a, b):
+        if (b, a) in edges:
+            return edges[(b, a)][::-1]
+        if (a, b) not in edges:
+            # A few waves across the edge, up to 5% of a cell high, plus some noise
+            waves = rng.randint(1, 3)
+            dx, dy = b[0] - a[0], b[1] - a[1]
+            length = math.hypot(dx, dy)
+            line = [a]
+            for step in range(1, points_per_edge):
+                t = step / points_per_edge
+                offset = (0.05 * math.sin(math.pi * waves * t) + rng.uniform(-0.002, 0.002)) * cell
+                line.append((a[0] + dx * t - dy / length * offset, a[1] + dy * t + dx / length * offset))
+            line.append(b)
+            edges[(a, b)] = line
+        return edges[(a, b)]
+
+    geometries = []
+    for row in range(rows):
+        for column in range(columns):
+            corners = [(column * cell, row * cell), ((column + 1) * cell, row * cell),
+                       ((column + 1) * cell, (row + 1) * cell), (column * cell, (row + 1) * cell)]
+            ring = []
+            for a, b in zip(corners, corners[1:] + corners[:1]):
+                ring.extend(edge(a, b)[:-1])
+            # Rings of real boundary files start anywhere, not at a corner
+            start = rng.randrange(len(ring))
+            ring = ring[start:] + ring[:start]
+            ring.append(ring[0])
+            geometries.append({"type": "Polygon", "coordinates": [[list(point) for point in ring]]})
+    return geometries
+
+
+def overlap_and_holes(geometries):
+    """Area covered twice, and the number of gaps enclosed by the regions."""
+    shapes = [shape(geometry) for geometry in geometries]
+    union = unary_union(shapes)
+    polygons = getattr(union, "geoms", [union])
+    return sum(s.area for s in shapes) - union.area, sum(len(polygon.interiors) for polygon in polygons)
+
+
+def test_borders_are_arcs_shared_by_both_neighbours():
+    geometries = jagged_grid(3, 3)
+    arcs, encoded = build_topology(geometries)
+    # 3x3 cells: 12 interior edges, and 12 exterior edges joined into 8 arcs at the
+    # grid's corners (which only one cell touches, so they are no junctions)
+    assert len(arcs) == 20
+    references = [abs(~ref if ref < 0 else ref) for entry in encoded for ring in entry["arcs"] for ref in ring]
+    assert sorted(references.count(index) for index in range(len(arcs))) == [1] * 8 + [2] * 12
+
+
+def test_shared_simplification_leaves_no_slivers():
+    geometries = jagged_grid(3, 3)
+    simplified = simplify_shared(geometries, 3)
+    assert sum(len(g["coordinates"][0]) for g in simplified) < sum(len(g["coordinates"][0]) for g in geometries) / 4
+    overlap, holes = overlap_and_holes(simplified)
+    assert abs(overlap) < 1e-12 and holes == 0
+    assert all(shape(geometry).is_valid for geometry in simplified)
+
+    # Simplifying each region on its own opens slivers and overlaps along the borders
+    independent = [simplify_geometry(geometry, 3) for geometry in geometries]
+    assert overlap_and_holes(independent)[0] > 1e-6
+
+
+def test_closed_rings_match_between_an_enclave_and_its_hole():
+    outer = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+    hole = [[1, 1], [1, 3], [3, 3], [3, 1], [1, 1]]
+    enclave = [[3, 3], [1, 3], [1, 1], [3, 1], [3, 3]]
+    arcs, encoded = build_topology([
+        {"type": "Polygon", "coordinates": [outer, hole]},
+        {"type": "Polygon", "coordinates": [enclave]}
+    ])
+    assert len(arcs) == 2
+    assert encoded[0]["arcs"][1] in ([1], [~1]) and encoded[1]["arcs"][0] in ([1], [~1])
+
+
+def test_topojson_stores_each_border_once():
+    geometries = jagged_grid(3, 3)
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"shapeName": f"Cell {index}"}, "geometry": geometry}
+        for index, geometry in enumerate(simplify_shared(geometries, 2))
+    ]}
+    topology = to_topojson(collection)
+    assert len(topology["arcs"]) == 20
+    regions = topology["objects"]["regions"]["geometries"]
+    assert [region["properties"]["shapeName"] for region in regions] == [f"Cell {i}" for i in range(9)]
+    points = sum(len(arc) for arc in topology["arcs"])
+    assert points < sum(len(ring) for geometry in collection["features"]
+                        for ring in geometry["geometry"]["coordinates"])
@@ -0,0 +1,186 @@
+"""
+Tile proxy (tile_store.py and the /tiles route) against a local XYZ server.
+
+The upstream stand-in serves tiles under /<map id>/{z}/{x}/{y} and answers
+404 for map IDs it has expired, like Earth Engine does for old map IDs.
+"""
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tile_store import TileStore, TileProxy
+
+
+class Upstream:
+    """Local XYZ tile server whose live map IDs can be changed by the test."""
+
+    def __init__(self):
+        self.live = {"map-1"}
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests.append(self.path)
+                map_id = self.path.strip("/").split("/")[0]
+                if map_id not in upstream.live:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = f"tile {self.path}".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def template(self, map_id):
+        return f"http://127.0.0.1:{self.server.server_port}/{map_id}/{{z}}/{{x}}/{{y}}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = Upstream()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def store():
+    return TileStore(os.path.join(tempfile.mkdtemp(prefix="tile-store-"), "tiles.mbtiles"), 1024 * 1024)
+
+
+def test_unknown_layer(upstream, store):
+    proxy = TileProxy(store, mint=lambda recipe: pytest.fail("nothing to mint"))
+    assert proxy.get_tile("missing", 3, 1, 2) == ("unknown_layer", None, None)
+    assert upstream.requests == []
+
+
+def test_miss_then_hit(upstream, store):
+    proxy = TileProxy(store, mint=lambda recipe: pytest.fail("map ID is still live"))
+    store.register_layer("layer", upstream.template("map-1"), {"key": "Pune - 2019"})
+
+    status, data, content_type = proxy.get_tile("layer", 3, 1, 2)
+    assert (status, data, content_type) == ("miss", b"tile /map-1/3/1/2", "image/png")
+    status, data, _ = proxy.get_tile("layer", 3, 1, 2)
+    assert (status, data) == ("hit", b"tile /map-1/3/1/2")
+    assert upstream.requests == ["/map-1/3/1/2"]
+
+
+def test_expired_map_id_is_reminted_once(upstream, store):
+    minted = []
+
+    def mint(recipe):
+        minted.append(recipe)
+        return upstream.template("map-2")
+
+    proxy = TileProxy(store, mint=mint)
+    store.register_layer("layer", upstream.template("map-1"), {"key": "Pune - 2019"})
+    assert proxy.get_tile("layer", 3, 1, 2)[0] == "miss"
+
+    upstream.live = {"map-2"}
+    status, data, _ = proxy.get_tile("layer", 3, 1, 3)
+    assert (status, data) == ("miss", b"tile /map-2/3/1/3")
+    assert minted == [{"key": "Pune - 2019"}]
+    assert store.get_layer("layer")[0] == upstream.template("map-2")
+
+    # Later tiles go straight to the new map ID; stored tiles are still served
+    assert proxy.get_tile("layer", 3, 1, 4)[0] == "miss"
+    assert proxy.get_tile("layer", 3, 1, 2)[0] == "hit"
+    assert len(minted) == 1
+    assert upstream.requests == ["/map-1/3/1/2", "/map-1/3/1/3", "/map-2/3/1/3", "/map-2/3/1/4"]
+
+
+def test_upstream_error_when_reminting_does_not_help(upstream, store):
+    proxy = TileProxy(store, mint=lambda recipe: upstream.template("map-9"))
+    store.register_layer("layer", upstream.template("map-0"), {})
+    assert proxy.get_tile("layer", 3, 1, 2) == ("upstream_error", None, None)
+    assert store.get_tile("layer", 3, 1, 2) is None
+
+
+def test_tile_route(upstream, monkeypatch):
+    import app as app_module
+
+    minted = []
+    monkeypatch.setattr(app_module.tile_proxy, "mint", lambda recipe: minted.append(recipe) or upstream.template("map-2"))
+    app_module.tile_store.register_layer("route-layer", upstream.template("map-1"), {"key": "Pune - 2019"})
+    client = app_module.app.test_client()
+
+    response = client.get("/tiles/route-layer/4/5/6")
+    assert response.status_code == 200
+    assert response.headers["X-Tile-Cache"] == "miss"
+    assert response.data == b"tile /map-1/4/5/6"
+    assert client.get("/tiles/route-layer/4/5/6").headers["X-Tile-Cache"] == "hit"
+
+    upstream.live = {"map-2"}
+    response = client.get("/tiles/route-layer/4/5/7")
+    assert (response.status_code, response.headers["X-Tile-Cache"]) == (200, "miss")
+    assert len(minted) == 1
+
+    assert client.get("/tiles/no-such-layer/4/5/6").status_code == 404
+    upstream.live = set()
+    assert client.get("/tiles/route-layer/4/5/8").status_code == 502
+
+
+def test_running_total_follows_puts_replacements_and_evictions(store):
+    store.max_bytes = 1000
+    store.put_tile("layer", 3, 1, 1, b"x" * 300, "image/png")
+    store.put_tile("layer", 3, 1, 2, b"x" * 300, "image/png")
+    store.put_tile("layer", 3, 1, 1, b"x" * 100, "image/png")
+    assert store.total_bytes() == 400
+    store.put_tile("layer", 3, 1, 3, b"x" * 700, "image/png")
+    sizes = store._connection().execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+    assert store.total_bytes() == sizes <= 1000
+    assert store.stats()["bytes"] == sizes
+
+
+def test_reads_do_not_write_until_last_access_is_stale(store, monkeypatch):
+    import tile_store as tile_store_module
+    clock = [1000.0]
+    monkeypatch.setattr(tile_store_module.time, "time", lambda: clock[0])
+    store.put_tile("layer", 3, 1, 1, b"tile", "image/png")
+    conn = store._connection()
+    changes = conn.total_changes
+    for _ in range(100):
+        assert store.get_tile("layer", 3, 1, 1) == (b"tile", "image/png")
+    assert conn.total_changes == changes
+
+    # A stale read is queued, and written once the queue is old enough
+    clock[0] += tile_store_module.ACCESS_RESOLUTION
+    store.get_tile("layer", 3, 1, 1)
+    assert conn.total_changes == changes
+    clock[0] += tile_store_module.ACCESS_RESOLUTION
+    store.get_tile("layer", 3, 1, 1)
+    assert conn.total_changes == changes + 1
+    last_access = conn.execute("SELECT last_access FROM tiles").fetchone()[0]
+    assert last_access == clock[0]
+
+
+def test_eviction_sees_queued_reads(store, monkeypatch):
+    import tile_store as tile_store_module
+    clock = [1000.0]
+    monkeypatch.setattr(tile_store_module.time, "time", lambda: clock[0])
+    store.max_bytes = 250
+    store.put_tile("layer", 3, 1, 1, b"x" * 100, "image/png")
+    clock[0] += 1
+    store.put_tile("layer", 3, 1, 2, b"x" * 100, "image/png")
+    # The older tile is read again, but only the queue knows so far
+    clock[0] += tile_store_module.ACCESS_RESOLUTION
+    store.get_tile("layer", 3, 1, 1)
+    store.put_tile("layer", 3, 1, 3, b"x" * 100, "image/png")
+    assert store.get_tile("layer", 3, 1, 1) is not None
+    assert store.get_tile("layer", 3, 1, 2) is None
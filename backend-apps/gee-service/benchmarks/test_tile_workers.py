@@ -0,0 +1,116 @@
+"""Bounded Earth Engine task runner (map_helper/tile_workers.py): deadlines, timeouts and abandonment."""
+import time
+import threading
+
+from ee_gateway import EEGateway
+from map_helper.tile_workers import iter_bounded, is_timeout, DEADLINE_EXCEEDED
+
+
+def wait_until(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.01)
+
+
+def blocking_task(gateway, release, calls):
+    """A task making two gateway calls, the first of which blocks until release is set."""
+    def task():
+        gateway.call(lambda: calls.append("first") or release.wait(5))
+        gateway.call(lambda: calls.append("second"))
+        return "done"
+    return task
+
+
+def test_results_in_completion_order():
+    tasks = [(key, lambda delay=delay, key=key: time.sleep(delay) or key)
+             for key, delay in [("slow", 0.2), ("fast", 0.0), ("middle", 0.1)]]
+    results = list(iter_bounded(tasks, max_workers=3))
+    assert results == [("fast", "fast", None), ("middle", "middle", None), ("slow", "slow", None)]
+
+
+def test_errors_are_reported_per_task():
+    def fail():
+        raise ValueError("bad band")
+    results = dict((key, (result, error)) for key, result, error in
+                   iter_bounded([("ok", lambda: 1), ("bad", fail)], max_workers=2))
+    assert results == {"ok": (1, None), "bad": (None, "bad band")}
+
+
+def test_deadline_cancels_queued_and_abandons_running():
+    gateway = EEGateway(initial_concurrency=4)
+    release = threading.Event()
+    calls = []
+    ran = []
+    tasks = [("running", blocking_task(gateway, release, calls)),
+             ("queued", lambda: ran.append("queued"))]
+    try:
+        results = list(iter_bounded(tasks, max_workers=1, deadline=time.monotonic() + 0.2))
+        assert {key: (result, error) for key, result, error in results} == {
+            "running": (None, DEADLINE_EXCEEDED), "queued": (None, DEADLINE_EXCEEDED)
+        }
+        assert all(is_timeout(error) for _, _, error in results)
+        # The running call's slot went back to the gateway as soon as it was abandoned
+        stats = gateway.stats()
+        assert stats["in_flight"] == 0 and stats["abandoned_in_flight"] == 1
+    finally:
+        release.set()
+    wait_until(lambda: gateway.stats()["abandoned_in_flight"] == 0)
+    assert gateway.stats()["in_flight"] == 0
+    # The queued task never ran and the abandoned one made no further calls
+    assert ran == [] and calls == ["first"]
+
+
+def test_timeout_frees_the_gateway_slot():
+    gateway = EEGateway(initial_concurrency=1, min_concurrency=1, max_concurrency=1)
+    release = threading.Event()
+    calls = []
+    try:
+        results = list(iter_bounded([("slow", blocking_task(gateway, release, calls))],
+                                    max_workers=1, timeout=0.1))
+        assert results == [("slow", None, "timed out after 0.1s")]
+        # With a limit of one, the next request still gets a slot straight away
+        start = time.monotonic()
+        assert gateway.call(lambda: "next") == "next"
+        assert time.monotonic() - start < 0.1
+    finally:
+        release.set()
+    wait_until(lambda: gateway.stats()["abandoned_in_flight"] == 0)
+    assert gateway.stats()["in_flight"] == 0
+    assert gateway.stats()["abandoned"] == 1
+    assert calls == ["first"]
+
+
+def test_abandoned_slots_are_capped():
+    gateway = EEGateway(initial_concurrency=1, min_concurrency=1, max_concurrency=1, max_abandoned=1)
+    release = threading.Event()
+    calls = []
+    try:
+        for key in ("a", "b"):
+            results = list(iter_bounded([(key, blocking_task(gateway, release, calls))],
+                                        max_workers=1, timeout=0.1))
+            assert results == [(key, None, "timed out after 0.1s")]
+        # Only one abandoned call may run outside the limit; the other keeps its slot
+        stats = gateway.stats()
+        assert stats["abandoned_in_flight"] == 1 and stats["in_flight"] == 1
+    finally:
+        release.set()
+    wait_until(lambda: gateway.stats()["abandoned_in_flight"] == 0 and gateway.stats()["in_flight"] == 0)
+    assert calls == ["first", "first"]
+
+
+def test_closing_early_abandons_running_tasks():
+    gateway = EEGateway(initial_concurrency=2)
+    release = threading.Event()
+    calls = []
+    tasks = [("fast", lambda: "fast"), ("slow", blocking_task(gateway, release, calls))]
+    try:
+        results = iter_bounded(tasks, max_workers=2)
+        assert next(results) == ("fast", "fast", None)
+        wait_until(lambda: calls == ["first"])
+        results.close()
+        assert gateway.stats()["abandoned_in_flight"] == 1
+    finally:
+        release.set()
+    wait_until(lambda: gateway.stats()["abandoned_in_flight"] == 0)
+    assert calls == ["first"]
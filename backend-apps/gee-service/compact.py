@@ -0,0 +1,76 @@
+import os
+from urllib.parse import quote
+
+# Value of the "response_format" request field that selects the compact layout
+COMPACT = "compact"
+
+
+def _common_affixes(values):
+    """Longest prefix and suffix shared by all strings (that do not overlap)."""
+    prefix = os.path.commonprefix(values)
+    rests = [value[len(prefix):] for value in values]
+    suffix = os.path.commonprefix([rest[::-1] for rest in rests])[::-1]
+    return prefix, suffix
+
+
+def compact_maps_response(processor, urls, stats, errors, legends):
+    """
+    Columnar version of the generate_maps response.
+
+    Instead of "region - interval" keyed dicts and the full region GeoJSON, the
+    response lists the regions and intervals once and holds urls / stats as
+    region x interval arrays (None where a value is missing). Tile URLs only
+    differ in their map id, so the shared prefix and suffix are sent once in
+    url_template. Known boundaries are referenced by shapeID and fetched from
+    /api/boundaries, which the browser can cache by ETag; custom geometries are
+    inlined in their region entry.
+
+    Args:
+        processor (BaseMapProcessor): Processor that produced urls and stats.
+        urls (dict): "region - interval" -> tile URL.
+        stats (dict): "region - interval" -> statistic.
+        errors (dict): "region - interval" -> error message.
+        legends (dict): Legends of the dataset.
+
+    Returns:
+        dict: The compact response body.
+    """
+    regions, labels = processor.layout()
+    present = [url for url in urls.values() if url is not None]
+    prefix, suffix = _common_affixes(present) if len(present) > 1 else ("", "")
+
+    url_rows, stat_rows = [], []
+    for region in regions:
+        url_row, stat_row = [], []
+        for label in labels:
+            key = f"{region['name']} - {label}"
+            url = urls.get(key)
+            url_row.append(url[len(prefix):len(url) - len(suffix)] if url is not None else None)
+            stat_row.append(stats.get(key))
+        url_rows.append(url_row)
+        stat_rows.append(stat_row)
+
+    # Custom regions have no id to look up, so their geometry travels inline
+    features = processor.filtered_geojson.get("features", [])
+    for region, feature in zip(regions, features):
+        if region["id"] is None:
+            region["geometry"] = feature["geometry"]
+    boundary_ids = [region["id"] for region in regions if region["id"] is not None]
+
+    return {
+        "format": COMPACT,
+        "regions": regions,
+        "intervals": labels,
+        "url_template": {"prefix": prefix, "suffix": suffix},
+        "urls": url_rows,
+        "stats": stat_rows,
+        "reduction": processor.reduction,
+        "errors": errors,
+        "timed_out": processor.timed_out,
+        "failed": processor.failed,
+        "legends": legends,
+        "boundaries": {
+            "ids": boundary_ids,
+            "href": "/api/boundaries?ids=" + ",".join(quote(shape_id, safe="") for shape_id in boundary_ids)
+        }
+    }
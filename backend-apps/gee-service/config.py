@@ -1,21 +1,60 @@
 import os
 from dotenv import load_dotenv
-import ee
 
 load_dotenv()
 
 class Settings:
     EE_ACCOUNT = os.getenv("EE_ACCOUNT")
     EE_PRIVATE_KEY_FILE = os.getenv("EE_PRIVATE_KEY_FILE")
-
-def initialize_earth_engine():
-    try:
-        credentials = ee.ServiceAccountCredentials(
-            Settings.EE_ACCOUNT, 
-            Settings.EE_PRIVATE_KEY_FILE
-        )
-        ee.Authenticate()
-        ee.Initialize(credentials)
-    except Exception as e:
-        print(f"Earth Engine initialization failed: {str(e)}")
-        raise
+    # Refresh the service account token this many seconds before it expires
+    EE_TOKEN_REFRESH_MARGIN = int(os.getenv("EE_TOKEN_REFRESH_MARGIN", "300"))
+    # Combined GeoJSON file with the region boundaries shared by all map processors
+    BOUNDARIES_GEOJSON = os.getenv("BOUNDARIES_GEOJSON", "../../boundaries/datasets/ADM4.geojson")
+    # Reduce all region x interval statistics with one reduceRegions call per request
+    BATCHED_STATS = os.getenv("BATCHED_STATS", "true").lower() == "true"
+    # Concurrent getMapId / getInfo calls per request and the per-call timeout in seconds
+    EE_MAX_WORKERS = int(os.getenv("EE_MAX_WORKERS", "8"))
+    EE_TASK_TIMEOUT = float(os.getenv("EE_TASK_TIMEOUT", "60"))
+    # Seconds a synchronous /api/generate_maps request may take before it returns what is done (0 = no limit)
+    REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "120"))
+    # Process-wide Earth Engine call gateway: AIMD concurrency between 1 and the maximum,
+    # starting at the initial value, and retries of quota / transient errors per call
+    EE_INITIAL_CONCURRENCY = int(os.getenv("EE_INITIAL_CONCURRENCY", "4"))
+    EE_MAX_CONCURRENCY = int(os.getenv("EE_MAX_CONCURRENCY", "16"))
+    EE_MAX_RETRIES = int(os.getenv("EE_MAX_RETRIES", "5"))
+    # Pixels per second Earth Engine is assumed to reduce, used to fit requests with a latency_budget
+    EE_PIXELS_PER_SECOND = float(os.getenv("EE_PIXELS_PER_SECOND", "20000000"))
+    # Tile URL / statistics cache: in-process LRU backed by a SQLite file
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache/results.sqlite3")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    # Keep well below the lifetime of Earth Engine map IDs
+    CACHE_TILE_TTL = int(os.getenv("CACHE_TILE_TTL", "3600"))
+    # Background map generation jobs: worker threads and how long finished jobs are kept
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_RETENTION = int(os.getenv("JOB_RETENTION", "3600"))
+    # Token required by the /api/admin endpoints (disabled when empty)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    # Simplify boundaries sent to Earth Engine to the reduction scale
+    EE_SIMPLIFY = os.getenv("EE_SIMPLIFY", "true").lower() == "true"
+    # gzip / brotli responses larger than this many bytes
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    # How long browsers may reuse /api/boundaries responses before revalidating
+    BOUNDARIES_MAX_AGE = int(os.getenv("BOUNDARIES_MAX_AGE", "86400"))
+    # Serve tiles through /tiles/<layer>/{z}/{x}/{y} backed by a local tile store
+    TILE_PROXY = os.getenv("TILE_PROXY", "false").lower() == "true"
+    # Prefix of the proxy URLs, e.g. http://127.0.0.1:5000 when the frontend runs elsewhere
+    TILE_PROXY_BASE_URL = os.getenv("TILE_PROXY_BASE_URL", "").rstrip("/")
+    TILE_DB_PATH = os.getenv("TILE_DB_PATH", "cache/tiles.mbtiles")
+    TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    TILE_UPSTREAM_TIMEOUT = float(os.getenv("TILE_UPSTREAM_TIMEOUT", "20"))
+    # Browser cache lifetime of proxied tiles (a layer id always maps to the same image)
+    TILE_MAX_AGE = int(os.getenv("TILE_MAX_AGE", "86400"))
+    # One tile layer per interval over all selected regions, for datasets that support it
+    SHARED_TILE_LAYERS = os.getenv("SHARED_TILE_LAYERS", "true").lower() == "true"
+    # Compose statistics of custom polygons that are unions of known districts
+    COMPOSE_CUSTOM_STATS = os.getenv("COMPOSE_CUSTOM_STATS", "true").lower() == "true"
+    # Relative area tolerance when matching a custom polygon against district boundaries
+    CUSTOM_MATCH_TOLERANCE = float(os.getenv("CUSTOM_MATCH_TOLERANCE", "0.001"))
+    # Simplify every boundary at every level in the gunicorn master before fork
+    PRECOMPUTE_SIMPLIFIED = os.getenv("PRECOMPUTE_SIMPLIFIED", "false").lower() == "true"
@@ -0,0 +1,28 @@
+from map_helper.esri_map_helper import LandCoverMapProcessor
+from map_helper.o3_map_generator import OzoneMapProcessor
+from map_helper.map_generator import NO2MapProcessor
+
+# Map processor class for each dataset name accepted by /api/generate_maps
+PROCESSORS = {
+    "Ozone": OzoneMapProcessor,
+    "Land Cover": LandCoverMapProcessor,
+    "NO2": NO2MapProcessor
+}
+
+
+def get_processor_class(dataset):
+    """Return the processor class for a dataset name, or raise ValueError."""
+    try:
+        return PROCESSORS[dataset]
+    except KeyError:
+        raise ValueError(f"Unsupported dataset: {dataset}")
+
+
+def mint_tile_url(recipe):
+    """Fresh tile URL for a layer registered by the tile proxy (see BaseMapProcessor._client_url)."""
+    # Shared layers record every region of their request, the others their own region
+    regions = recipe["regions"] if "regions" in recipe else [recipe["region"]]
+    processor = get_processor_class(recipe["dataset"])(
+        regions, recipe["start_year"], recipe["end_year"], use_cache=False
+    )
+    return processor.mint_tile_url(recipe["key"])
@@ -0,0 +1,309 @@
+import re
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+
+from config import Settings
+
+# Error classes returned by classify_error
+QUOTA = "quota"
+TRANSIENT = "transient"
+
+# HTTP statuses worth retrying
+_QUOTA_STATUSES = {429}
+_TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+# A status code in an error message, only where it is labelled as one: "<HttpError 429 when
+# requesting ...>", "status code: 503", "503 Server Error: ..." (a bare number such as a
+# pixel count in "Found 15000000" is not a status)
+_STATUS_PATTERN = re.compile(
+    r"(?:\bhttp\s*error|\bstatus(?:\s+code)?|\bcode|\berror)[\s:=(]*(\d{3})\b"
+    r"|^\s*(\d{3})\s+(?:client|server)\s+error"
+)
+
+# Substrings of Earth Engine / HTTP error messages, matched case-insensitively
+_QUOTA_MARKERS = ("too many requests", "quota", "rate limit", "resource_exhausted",
+                  "too many concurrent")
+_TRANSIENT_MARKERS = ("internal error", "service unavailable", "bad gateway", "gateway timeout",
+                      "backend error", "deadline exceeded", "connection reset", "connection aborted",
+                      "remote end closed", "read timed out", "temporarily unavailable")
+
+
+# time.monotonic() deadline of the calls made by the current thread (see deadline_scope)
+_local = threading.local()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of waiting for a slot or retrying past the caller's deadline."""
+
+
+class TaskScope:
+    """
+    The gateway calls of one task, so that the task can be abandoned.
+
+    A running Earth Engine call cannot be interrupted. When its caller stops
+    waiting for it, abandon() hands its concurrency slot back to the gateway (up
+    to the gateway's max_abandoned), so the requests after it are not throttled
+    by work nobody waits for. Calls the task makes afterwards fail at once and
+    are not retried.
+    """
+
+    def __init__(self):
+        self.abandoned = False
+        # Gateway whose slot the task's current call holds, and whether that
+        # slot was already handed back; both guarded by that gateway's lock
+        self.gateway = None
+        self.released = False
+
+    def abandon(self):
+        self.abandoned = True
+        gateway = self.gateway
+        if gateway is not None:
+            gateway._abandon(self)
+
+
+@contextmanager
+def task_scope(scope):
+    """Make gateway calls in this thread belong to a TaskScope."""
+    previous = getattr(_local, "scope", None)
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = previous
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """
+    Make gateway calls in this thread give up at a time.monotonic() deadline.
+
+    Calls do not start after the deadline and are not retried when the backoff
+    would end past it; a call already running is not interrupted.
+    """
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def _status_code(error):
+    """HTTP status of an error: from the exception's response if it has one, else from its message."""
+    for status in (getattr(error, "status_code", None),
+                   getattr(getattr(error, "resp", None), "status", None),
+                   getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(status, int):
+            return status
+    match = _STATUS_PATTERN.search(str(error).lower())
+    if match:
+        return int(match.group(1) or match.group(2))
+    return None
+
+
+def classify_error(error):
+    """
+    Return QUOTA, TRANSIENT or None (not worth retrying) for an exception.
+
+    The HTTP status decides when there is one. Earth Engine raises EEException
+    with only the server message, so otherwise the message text is what
+    distinguishes a quota rejection from a bad request.
+    """
+    status = _status_code(error)
+    if status in _QUOTA_STATUSES:
+        return QUOTA
+    if status in _TRANSIENT_STATUSES:
+        return TRANSIENT
+    message = str(error).lower()
+    if any(marker in message for marker in _QUOTA_MARKERS):
+        return QUOTA
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    if any(marker in message for marker in _TRANSIENT_MARKERS):
+        return TRANSIENT
+    return None
+
+
+class EEGateway:
+    """
+    Gate for Earth Engine calls with AIMD concurrency control and retries.
+
+    At most `limit` calls run at once. Every successful call raises the limit by
+    1/limit (about +1 per round of calls) up to max_concurrency; a quota error
+    halves it (at most once per cooldown, so a burst of rejections from calls that
+    were already in flight counts once) down to min_concurrency. Quota and
+    transient errors are retried with exponential backoff and full jitter; other
+    errors are raised immediately.
+
+    The gateway is process-wide and thread-safe, so every thread pool calling
+    Earth Engine in the process shares one limit.
+
+    Calls of an abandoned TaskScope stop counting against the limit, but at most
+    max_abandoned of them (max_concurrency by default) at a time. Beyond that the
+    carry-over keeps its slots and throttles new calls, so at most
+    limit + max_abandoned calls are ever running on Earth Engine.
+    """
+
+    def __init__(self, initial_concurrency=4, min_concurrency=1, max_concurrency=32,
+                 max_retries=5, base_delay=1.0, max_delay=60.0, decrease_factor=0.5,
+                 max_abandoned=None):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_abandoned = max_concurrency if max_abandoned is None else max_abandoned
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self._in_flight = 0
+        # Abandoned calls still running whose slots were handed back
+        self._abandoned = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._started_at = time.monotonic()
+        self._counters = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "quota_errors": 0,
+            "transient_errors": 0,
+            "abandoned": 0
+        }
+        self._latency_total = 0.0
+
+    def _acquire(self, deadline=None, scope=None):
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceeded("deadline passed while waiting for an Earth Engine slot")
+                if scope is not None and scope.abandoned:
+                    raise DeadlineExceeded("task was abandoned while waiting for an Earth Engine slot")
+                self._condition.wait(remaining)
+            self._in_flight += 1
+            if scope is not None:
+                scope.gateway, scope.released = self, False
+
+    def _release(self, scope=None):
+        with self._condition:
+            if scope is not None and scope.gateway is self and scope.released:
+                # The slot was handed back when the task was abandoned
+                self._abandoned -= 1
+            else:
+                self._in_flight -= 1
+            if scope is not None:
+                scope.gateway, scope.released = None, False
+            self._condition.notify_all()
+
+    def _abandon(self, scope):
+        """Hand back the slot of an abandoned task's running call, within max_abandoned."""
+        with self._condition:
+            if scope.gateway is not self or scope.released:
+                return
+            if self._abandoned >= self.max_abandoned:
+                logging.warning(f"{self._abandoned} abandoned Earth Engine calls still running; "
+                                "keeping the slot of the next one")
+                return
+            scope.released = True
+            self._in_flight -= 1
+            self._abandoned += 1
+            self._counters["abandoned"] += 1
+            self._condition.notify_all()
+
+    def _on_success(self, latency):
+        with self._condition:
+            self._limit = min(self._limit + 1.0 / self._limit, float(self.max_concurrency))
+            self._counters["succeeded"] += 1
+            self._latency_total += latency
+            self._condition.notify_all()
+
+    def _on_quota_error(self):
+        with self._condition:
+            self._counters["quota_errors"] += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.base_delay:
+                return
+            self._last_decrease = now
+            previous = self._limit
+            self._limit = max(self._limit * self.decrease_factor, float(self.min_concurrency))
+        logging.warning(f"Earth Engine quota error: concurrency {previous:.1f} -> {self._limit:.1f}")
+
+    def _backoff(self, attempt):
+        """Full jitter: uniform in [0, min(max_delay, base_delay * 2^attempt)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) under the concurrency limit, retrying quota and
+        transient errors within the thread's deadline (if any). Returns its
+        result or raises its last error.
+        """
+        with self._condition:
+            self._counters["calls"] += 1
+        deadline = getattr(_local, "deadline", None)
+        scope = getattr(_local, "scope", None)
+        attempt = 0
+        while True:
+            try:
+                if scope is not None and scope.abandoned:
+                    raise DeadlineExceeded("task was abandoned")
+                self._acquire(deadline, scope)
+            except DeadlineExceeded:
+                with self._condition:
+                    self._counters["failed"] += 1
+                raise
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._release(scope)
+                kind = classify_error(e)
+                if kind == QUOTA:
+                    self._on_quota_error()
+                elif kind == TRANSIENT:
+                    with self._condition:
+                        self._counters["transient_errors"] += 1
+                delay = self._backoff(attempt)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                abandoned = scope is not None and scope.abandoned
+                if kind is None or attempt >= self.max_retries or out_of_time or abandoned:
+                    with self._condition:
+                        self._counters["failed"] += 1
+                    raise
+                logging.info(f"Retrying Earth Engine call after {kind} error in {delay:.1f}s "
+                             f"(attempt {attempt + 1}/{self.max_retries}): {str(e)}")
+                with self._condition:
+                    self._counters["retries"] += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._release(scope)
+            self._on_success(time.monotonic() - start)
+            return result
+
+    def stats(self):
+        """Current limit, in-flight calls, counters and throughput since start."""
+        with self._condition:
+            counters = dict(self._counters)
+            elapsed = time.monotonic() - self._started_at
+            succeeded = counters["succeeded"]
+            return dict(
+                counters,
+                concurrency_limit=round(self._limit, 2),
+                in_flight=self._in_flight,
+                abandoned_in_flight=self._abandoned,
+                throughput_per_second=round(succeeded / elapsed, 3) if elapsed > 0 else 0.0,
+                mean_latency_seconds=round(self._latency_total / succeeded, 3) if succeeded else None
+            )
+
+
+# Shared gateway for every Earth Engine call in the process
+ee_gateway = EEGateway(
+    initial_concurrency=Settings.EE_INITIAL_CONCURRENCY,
+    max_concurrency=Settings.EE_MAX_CONCURRENCY,
+    max_retries=Settings.EE_MAX_RETRIES
+)
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+import ee
+import google.auth.transport.requests
+
+from config import Settings
+
+
+class EarthEngineSession:
+    """
+    Process-wide Earth Engine session.
+
+    Earth Engine is initialized once per process and the service account token is
+    refreshed shortly before it expires, so request handlers only pay for a cheap
+    check instead of a full ServiceAccountCredentials / Initialize round trip.
+    The session is safe to share between worker threads, and a forked worker
+    re-initializes on first use instead of reusing the parent's HTTP state.
+    """
+
+    def __init__(self, refresh_margin=None):
+        self.refresh_margin = (Settings.EE_TOKEN_REFRESH_MARGIN
+                               if refresh_margin is None else refresh_margin)
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._initialized_pid = None
+        self._initialized_at = None
+        self._last_error = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """Drop the parent's state in a freshly forked child process."""
+        self._lock = threading.Lock()
+        self._initialized_pid = None
+
+    def _initialize(self):
+        """Build credentials and initialize Earth Engine. Caller must hold the lock."""
+        credentials = ee.ServiceAccountCredentials(
+            Settings.EE_ACCOUNT,
+            Settings.EE_PRIVATE_KEY_FILE
+        )
+        # Service account credentials do not need the interactive ee.Authenticate() flow.
+        ee.Initialize(credentials)
+        self._credentials = credentials
+        self._initialized_pid = os.getpid()
+        self._initialized_at = time.time()
+        self._last_error = None
+        logging.info(f"Earth Engine initialized for service account {Settings.EE_ACCOUNT} (pid {os.getpid()})")
+
+    def _token_expiring(self):
+        """Return True if the cached access token is missing or about to expire."""
+        credentials = self._credentials
+        if credentials is None or not getattr(credentials, "token", None):
+            return True
+        expiry = getattr(credentials, "expiry", None)
+        if expiry is None:
+            return False
+        # google-auth stores expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds() <= self.refresh_margin
+
+    def _refresh_token(self):
+        """Refresh the access token in place. Caller must hold the lock."""
+        self._credentials.refresh(google.auth.transport.requests.Request())
+        logging.info(f"Earth Engine access token refreshed, valid until {self._credentials.expiry}")
+
+    def ensure_initialized(self):
+        """
+        Make sure Earth Engine is usable in the current process.
+
+        The fast path is lock-free; initialization and token refreshes are
+        serialized so concurrent requests never authenticate twice.
+        """
+        if self._initialized_pid == os.getpid() and not self._token_expiring():
+            return
+        with self._lock:
+            try:
+                if self._initialized_pid != os.getpid():
+                    self._initialize()
+                if self._token_expiring():
+                    self._refresh_token()
+            except Exception as e:
+                self._last_error = str(e)
+                logging.error(f"Earth Engine initialization failed: {str(e)}")
+                raise
+
+    def warm_up(self):
+        """Initialize at startup without failing the import if Earth Engine is unreachable."""
+        try:
+            self.ensure_initialized()
+        except Exception:
+            logging.warning("Earth Engine warm-up failed, will retry on the first request")
+            return False
+        return True
+
+    def is_ready(self):
+        """Readiness check: initialized in this process with a usable token."""
+        return self._initialized_pid == os.getpid() and self._credentials is not None \
+            and getattr(self._credentials, "token", None) is not None
+
+    def status(self):
+        """Summary of the session state for the readiness endpoint."""
+        expiry = getattr(self._credentials, "expiry", None)
+        return {
+            "ready": self.is_ready(),
+            "pid": os.getpid(),
+            "initialized_at": self._initialized_at,
+            "token_expiry": expiry.isoformat() if expiry else None,
+            "last_error": self._last_error
+        }
+
+
+# Shared Earth Engine session for the whole process
+ee_session = EarthEngineSession()
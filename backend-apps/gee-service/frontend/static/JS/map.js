@@ -103,6 +103,9 @@ export class MapHandler {
       
       // Get all selected regions.
       const selectedRegions = Array.from(this.regionSelector.selectedOptions).map(opt => opt.value);
+      // Layers added in this update by URL: regions of a shared layer (e.g. Ozone,
+      // one layer per month for all regions) have the same URL and draw it once.
+      const added = {};
       selectedRegions.forEach(region => {
         const key = `${region} - ${currentTime}`;
         const url = urls[key];
@@ -111,10 +114,12 @@ export class MapHandler {
           if (this.overlays[region]) {
             this.map.removeLayer(this.overlays[region]);
           }
-          // Create and add a new tile layer for the region.
-          const layer = L.tileLayer(url, { opacity: 0.7 });
-          layer.addTo(this.map);
-          this.overlays[region] = layer;
+          // Create and add a new tile layer for the region, unless another region already added it.
+          if (!added[url]) {
+            added[url] = L.tileLayer(url, { opacity: 0.7 });
+            added[url].addTo(this.map);
+          }
+          this.overlays[region] = added[url];
         } else {
           console.warn('No URL found for key:', key);
         }
@@ -0,0 +1,66 @@
+"""
+Production server settings for gee-service.
+
+Run from backend-apps/gee-service:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Concurrency model
+-----------------
+- Workers are processes (GUNICORN_WORKERS), each running gthread worker
+  threads (GUNICORN_THREADS).
+- A request spends most of its time blocked on Earth Engine HTTP calls
+  (getMapId, getInfo). Those calls release the GIL, so one slow request only
+  occupies one thread and the worker keeps serving others.
+- Inside a request, Earth Engine calls fan out to a bounded pool per request
+  (EE_MAX_WORKERS). Background jobs run on JOB_WORKERS threads per worker.
+- Streaming responses (NDJSON / SSE) hold their thread until the last layer is
+  sent.
+- The app is imported once in the master (preload_app). Boundaries are parsed
+  and the Earth Engine credentials are checked before fork, so the parsed
+  GeoJSON is shared copy-on-write across workers.
+- Each worker re-initializes its own Earth Engine session and opens its own
+  SQLite connections after fork. See ee_session and result_cache.
+- Jobs (/api/jobs) live in the worker that accepted them. Run a single worker,
+  or route a client to one worker, when polling jobs.
+- SIGTERM stops accepting connections and gives in-flight requests
+  graceful_timeout seconds. Queued jobs are cancelled and running jobs are
+  awaited in worker_exit.
+"""
+import os
+import shutil
+import multiprocessing
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+preload_app = True
+
+# Batched reductions over many regions can take minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# Metrics of all workers are aggregated through files in this directory.
+# It must be set before prometheus_client is imported by the preloaded app.
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/gee-service-metrics")
+
+
+def on_starting(server):
+    # Stale files from an earlier run would be summed into the new metrics
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    from jobs import job_manager
+    job_manager.shutdown()
@@ -0,0 +1,241 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from config import Settings
+from datasets import get_processor_class
+from map_helper.base_processor import stats_failed
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class SingleFlight:
+    """
+    Merge identical in-flight units of work.
+
+    The first caller to claim a unit id becomes its leader and must resolve it;
+    everyone else claiming the same id while it is in flight gets the leader's
+    Future instead of computing the unit again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def claim(self, unit_ids):
+        """
+        Returns:
+            tuple: (owned, shared) dicts of unit id -> Future. Owned futures must be
+            resolved by the caller, shared ones are resolved by another job.
+        """
+        owned, shared = {}, {}
+        with self._lock:
+            for unit_id in unit_ids:
+                future = self._inflight.get(unit_id)
+                if future is None:
+                    future = Future()
+                    self._inflight[unit_id] = future
+                    owned[unit_id] = future
+                else:
+                    shared[unit_id] = future
+        return owned, shared
+
+    def resolve(self, unit_id, result=None, error=None):
+        """Publish a unit's result (or error) to every waiting job."""
+        with self._lock:
+            future = self._inflight.pop(unit_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._inflight)
+
+
+class MapJob:
+    """State and partial results of one asynchronous map generation request."""
+
+    def __init__(self, dataset, selected_regions, start_year, end_year, options=None):
+        self.id = uuid.uuid4().hex
+        self.dataset = dataset
+        self.selected_regions = selected_regions
+        self.start_year = start_year
+        self.end_year = end_year
+        # Extra processor arguments, e.g. latency_budget
+        self.options = options or {}
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.keys = []
+        self.legends = None
+        self.geojson_data = None
+        self.reduction = None
+        self._results = {}
+        self._stats_failed = set()
+        self._lock = threading.Lock()
+
+    def add_result(self, result, failed=False):
+        """Record a unit's result; failed marks a unit that was not computed at all."""
+        with self._lock:
+            self._results[result["key"]] = result
+            if failed or stats_failed(result):
+                self._stats_failed.add(result["key"])
+
+    def to_dict(self):
+        """
+        Status plus the results computed so far, in region x interval order. urls and
+        stats have the shape generate_urls returns: keys whose statistic failed are
+        left out of stats, other keys are kept even when their statistic is None.
+        """
+        with self._lock:
+            results = dict(self._results)
+            failed_stats = set(self._stats_failed)
+        urls, stats, errors, timed_out, failed = {}, {}, {}, [], []
+        for key in self.keys:
+            result = results.get(key)
+            if result is None:
+                continue
+            if result.get("url") is not None:
+                urls[key] = result["url"]
+            if key not in failed_stats:
+                stats[key] = result.get("stats")
+            if "error" in result:
+                errors[key] = result["error"]
+                (timed_out if result.get("timed_out") else failed).append(key)
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "dataset": self.dataset,
+            "completed": len(results),
+            "total": len(self.keys),
+            "urls": urls,
+            "stats": stats,
+            "errors": errors,
+            "timed_out": timed_out,
+            "failed": failed
+        }
+        if self.status == DONE:
+            data.update({
+                "legends": self.legends,
+                "geojson_data": self.geojson_data,
+                "selected_regions": self.selected_regions,
+                "reduction": self.reduction
+            })
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Runs map generation jobs on a worker pool so Flask threads return immediately.
+
+    Jobs live in this process only; behind several workers the job id must be
+    polled on the worker that accepted it (or run a single worker process).
+    """
+
+    def __init__(self, max_workers, retention):
+        self.retention = retention
+        self.single_flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="map-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, dataset, selected_regions, start_year, end_year, **options):
+        """Queue a job and return it; raises ValueError for unknown datasets."""
+        get_processor_class(dataset)
+        job = MapJob(dataset, selected_regions, start_year, end_year, options)
+        with self._lock:
+            self._expire_finished()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def shutdown(self):
+        """Cancel queued jobs and wait for the running ones (used on graceful worker exit)."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire_finished(self):
+        """Forget finished jobs older than the retention period. Caller must hold the lock."""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        job.status = RUNNING
+        try:
+            processor = get_processor_class(job.dataset)(
+                job.selected_regions, job.start_year, job.end_year, **job.options
+            )
+            unit_ids = processor.unit_ids()
+            job.keys = list(unit_ids)
+            owned, shared = self.single_flight.claim(set(unit_ids.values()))
+
+            # Units another job is already computing are fanned in when it publishes them
+            waiting = []
+            for key, unit_id in unit_ids.items():
+                if unit_id in shared:
+                    future = shared[unit_id]
+                    future.add_done_callback(lambda f, key=key: job.add_result(*self._shared_result(key, f)))
+                    waiting.append(future)
+            if waiting:
+                logging.info(f"Job {job.id}: {len(waiting)} units already in flight, waiting for them")
+
+            own_keys = {key for key, unit_id in unit_ids.items() if unit_id in owned}
+            try:
+                for result in processor.iter_layers(only_keys=own_keys):
+                    job.add_result(result)
+                    self.single_flight.resolve(unit_ids[result["key"]], result)
+            except Exception as e:
+                for unit_id in owned:
+                    self.single_flight.resolve(unit_id, error=e)
+                raise
+            finally:
+                # Never leave another job waiting on a unit this job dropped
+                for unit_id in owned:
+                    self.single_flight.resolve(unit_id, error=RuntimeError("unit was not computed"))
+
+            wait(waiting)
+            job.legends = processor.legends()
+            job.geojson_data = processor.filtered_geojson
+            job.reduction = processor.reduction
+            job.status = DONE
+        except Exception as e:
+            logging.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    @staticmethod
+    def _shared_result(key, future):
+        """
+        Re-key a result computed by another job for this job's region name.
+
+        Returns:
+            tuple: (result, failed) arguments for MapJob.add_result.
+        """
+        try:
+            return dict(future.result(), key=key), False
+        except Exception as e:
+            return {"key": key, "url": None, "stats": None, "error": str(e)}, True
+
+
+# Shared job manager for the whole process
+job_manager = JobManager(Settings.JOB_WORKERS, Settings.JOB_RETENTION)
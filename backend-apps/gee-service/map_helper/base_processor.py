@@ -0,0 +1,652 @@
+import ee
+import time
+import logging
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import partial
+from config import Settings
+from ee_session import ee_session
+from ee_gateway import ee_gateway
+from result_cache import result_cache, cache_key, TILE_URL, STATS, COMPONENTS
+from tile_store import tile_store
+from metrics import observe_stage, EE_INIT, GEOJSON_FILTER, GET_MAP_ID, REDUCE_REGION
+from map_helper.boundary_registry import get_boundary_registry
+from map_helper.custom_regions import get_district_index
+from map_helper.geometry_simplify import level_for_scale
+from map_helper.reduction_scale import approximate_area_m2, choose_reduction
+from map_helper.tile_workers import iter_bounded, is_timeout
+from map_helper.tile_urls import tile_url
+from map_helper.zonal_stats import batched_reduce_regions, batched_reduce_components
+
+# Task keys of the batched statistics calls in the worker pool
+BATCH_STATS_KEY = "__batched_stats__"
+COMPOSED_STATS_KEY = "__composed_stats__"
+# Kind of the worker pool tasks that mint one interval's shared tile layer
+SHARED_TILE = "shared_tile"
+
+# Prefix of the error messages of statistics that could not be computed
+STATS_ERROR_PREFIX = "statistics: "
+
+def stats_failed(result):
+    """
+    True if an iter_layers result has no statistic because computing it failed.
+
+    generate_urls leaves such keys out of stats and keeps the others, even when
+    their statistic is None.
+    """
+    return any(part.startswith(STATS_ERROR_PREFIX) for part in result.get("error", "").split("; "))
+
+
+# One region x interval combination, i.e. one entry of urls / stats
+LayerUnit = namedtuple(
+    "LayerUnit",
+    ["key", "feature_index", "region_name", "label", "interval_start", "interval_end"]
+)
+
+
+class BaseMapProcessor:
+    """
+    Shared plumbing for the dataset map processors.
+
+    Subclasses describe a dataset (visualization params, reduction scale, how an
+    interval becomes an image and how a reduced value is reported); this class
+    resolves regions, serves what it can from the result cache, fans the remaining
+    Earth Engine calls out to a bounded worker pool and assembles the urls / stats
+    dicts keyed "region - interval".
+    """
+
+    # Dataset name as accepted by /api/generate_maps (see datasets.PROCESSORS)
+    DATASET = None
+    # Band holding the statistic after reduceRegion, and the reducer used for it
+    STATS_BAND = None
+    STATS_REDUCER = "mean"
+    # Outputs of _component_reducer; None disables composing custom-region statistics
+    COMPONENT_OUTPUTS = None
+    # Mint one tile layer per interval clipped to all selected regions, instead of
+    # one per region and interval; every region's key of the interval gets its URL
+    SHARED_TILES = False
+
+    def __init__(self, selected_regions, batch_stats=None, max_workers=None, task_timeout=None,
+                 use_cache=None, simplify=None, latency_budget=None, deadline=None):
+        # Initialize Earth Engine
+        with observe_stage(EE_INIT, self.DATASET):
+            ee_session.ensure_initialized()
+        self.selected_regions = selected_regions
+        # Path to the combined GeoJSON file for region boundaries
+        self.geojson_path = Settings.BOUNDARIES_GEOJSON
+        # Shared, indexed boundaries (parsed once per process)
+        self.boundaries = get_boundary_registry(self.geojson_path)
+        # Compute all region x interval statistics with a single reduceRegions call
+        self.batch_stats = Settings.BATCHED_STATS if batch_stats is None else batch_stats
+        # Bounded worker pool for getMapId / getInfo round trips
+        self.max_workers = Settings.EE_MAX_WORKERS if max_workers is None else max_workers
+        self.task_timeout = Settings.EE_TASK_TIMEOUT if task_timeout is None else task_timeout
+        # Serve repeated requests from the tile URL / statistics cache
+        self.use_cache = Settings.CACHE_ENABLED if use_cache is None else use_cache
+        # Send Earth Engine boundaries simplified to half a pixel of the reduction scale
+        self.simplify = Settings.EE_SIMPLIFY if simplify is None else simplify
+        # Hand out /tiles/... proxy URLs instead of Earth Engine tile URLs
+        self.tile_proxy = Settings.TILE_PROXY
+        # One getMapId per interval for all regions (see SHARED_TILES)
+        self.shared_tiles = self.SHARED_TILES and Settings.SHARED_TILE_LAYERS
+        # Derive statistics of custom polygons made of whole districts from per-district results
+        self.compose_custom = Settings.COMPOSE_CUSTOM_STATS
+        # Seconds the statistics may take; coarsens SCALE for large regions (None keeps it fixed)
+        self.latency_budget = latency_budget
+        self.reduction = None
+        # Seconds from now after which outstanding Earth Engine calls are given up (None waits)
+        self.deadline_at = None if deadline is None else time.monotonic() + deadline
+        # Per-key failures and the region GeoJSON of the last run; timed_out / failed
+        # list the keys missing a url or statistic because of a timeout or an error
+        self.errors = {}
+        self.timed_out = []
+        self.failed = []
+        self.filtered_geojson = None
+        self._failed_stats = set()
+
+    def _filter_geojson(self):
+        """Filter the combined GeoJSON to include only the selected regions."""
+        return self.boundaries.filter_regions(self.selected_regions)
+
+    def _intervals(self):
+        """List of (label, interval_start, interval_end) tuples. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _interval_image(self, interval_start, interval_end):
+        """Unclipped composite for one interval. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _format_stat(self, value):
+        """Shape a reduced value the way the dataset reports it in stats."""
+        return value
+
+    def _stats_reducer(self):
+        """Single-output reducer used for the statistics."""
+        return getattr(ee.Reducer, self.STATS_REDUCER)()
+
+    def _component_reducer(self):
+        """Reducer whose per-district outputs (COMPONENT_OUTPUTS) can be merged. Set by subclasses."""
+        raise NotImplementedError
+
+    def _compose_stat(self, components):
+        """Statistic of a union of districts from their component dicts. Set by subclasses."""
+        raise NotImplementedError
+
+    def _layer_units(self, features, intervals):
+        """All region x interval combinations, region-major like the response dicts."""
+        units = []
+        for index, feature in enumerate(features):
+            region_name = feature["properties"].get("shapeName", "Custom Region")
+            for label, interval_start, interval_end in intervals:
+                units.append(LayerUnit(
+                    f"{region_name} - {label}", index, region_name, label, interval_start, interval_end
+                ))
+        return units
+
+    def _is_known(self, feature):
+        """True if the feature is one of the registry's boundaries, False for custom geometries."""
+        properties = feature.get("properties", {})
+        shape_id = properties.get("shapeID")
+        # By shapeID: shapeNames are not unique, and a region selected by shapeID may
+        # not be the feature its name resolves to
+        if shape_id is not None:
+            return feature is self.boundaries.get_by_id(shape_id)
+        return feature is self.boundaries.get(properties.get("shapeName", ""))
+
+    def _region_ref(self, feature):
+        """Name the registry resolves back to a known feature: its shapeID, else its shapeName."""
+        properties = feature["properties"]
+        shape_id = properties.get("shapeID")
+        return shape_id if shape_id is not None else properties.get("shapeName")
+
+    def _region_cache_id(self, feature):
+        """Identity of a region in cache keys: its shapeID for known boundaries, else its geometry."""
+        if self._is_known(feature):
+            return {"shapeID": self._region_ref(feature), "boundaries_version": self.boundaries.version}
+        return {"geometry": cache_key(geometry=feature["geometry"])}
+
+    def _cache_key(self, kind, region_id, unit):
+        """Canonical key of one unit's tile URL or statistic."""
+        return cache_key(
+            kind=kind,
+            collection=self.collection,
+            interval=[unit.label, unit.interval_start, unit.interval_end],
+            region=region_id,
+            reducer=self.STATS_REDUCER,
+            scale=self.SCALE,
+            tile_scale=self.TILE_SCALE,
+            simplify_level=self._simplify_level(),
+            visualization_params=self.visualization_params
+        )
+
+    def _stats_ttl(self, unit):
+        """Statistics of finished intervals never change; an ongoing one expires like tile URLs."""
+        interval_end = datetime.strptime(unit.interval_end[:10], "%Y-%m-%d").date()
+        if interval_end < datetime.now(timezone.utc).date():
+            return None
+        return result_cache.tile_ttl
+
+    def _tile_url(self, image, layer_name):
+        """Request a map ID for the image and return its tile URL template."""
+        logging.debug(f"Requesting map ID for {layer_name}")
+        return ee_gateway.call(tile_url, image, self.visualization_params)
+
+    def _tile_task(self, unit, geometry):
+        """Tile URL for one region and interval."""
+        logging.info(f"Processing {unit.key}")
+        # Clip the composite to the region's geometry
+        clipped_image = self._interval_image(unit.interval_start, unit.interval_end).clip(geometry)
+        with observe_stage(GET_MAP_ID, self.DATASET):
+            return self._tile_url(clipped_image, f"{unit.region_name} ({unit.label})")
+
+    def _shared_tile_task(self, unit):
+        """Tile URL of one interval's layer, clipped to all selected regions."""
+        logging.info(f"Processing {unit.label} for {len(self._ee_feature_list)} regions")
+        regions = ee.FeatureCollection([
+            ee.Feature(ee.Geometry(feature["geometry"])) for feature in self._ee_feature_list
+        ])
+        clipped_image = self._interval_image(unit.interval_start, unit.interval_end).clipToCollection(regions)
+        with observe_stage(GET_MAP_ID, self.DATASET):
+            return self._tile_url(clipped_image, f"{len(self._ee_feature_list)} regions ({unit.label})")
+
+    def _recipe_region(self, feature):
+        """A region as the re-mint recipe stores it: its registry reference or its geometry."""
+        return self._region_ref(feature) if self._is_known(feature) else feature["geometry"]
+
+    def _client_url(self, unit, layer, upstream_url):
+        """
+        URL handed to the browser for a unit's tiles.
+
+        With the tile proxy enabled the layer is registered in the tile store
+        together with what is needed to mint a new map ID later, and the browser
+        gets a stable /tiles/<layer>/{z}/{x}/{y} URL instead of the upstream one.
+        """
+        if upstream_url is None or not self.tile_proxy:
+            return upstream_url
+        recipe = {
+            "dataset": self.DATASET,
+            "start_year": getattr(self, "start_year", None),
+            "end_year": getattr(self, "end_year", None),
+            "key": unit.key
+        }
+        if self.shared_tiles:
+            recipe["regions"] = [self._recipe_region(feature) for feature in self._features]
+        else:
+            recipe["region"] = self._recipe_region(self._features[unit.feature_index])
+        tile_store.register_layer(layer, upstream_url, recipe)
+        return f"{Settings.TILE_PROXY_BASE_URL}/tiles/{layer}/{{z}}/{{x}}/{{y}}"
+
+    def mint_tile_url(self, key):
+        """Request a new Earth Engine tile URL for one "region - interval" key."""
+        _, _, units, _ = self._prepare()
+        for unit in units:
+            if unit.key == key:
+                if self.shared_tiles:
+                    return self._shared_tile_task(unit)
+                geometry = ee.Geometry(self._ee_feature_list[unit.feature_index]["geometry"])
+                return self._tile_task(unit, geometry)
+        raise ValueError(f"Unknown layer key: {key}")
+
+    def _stats_task(self, unit, geometry):
+        """Statistic for one region and interval with its own reduceRegion call."""
+        clipped_image = self._interval_image(unit.interval_start, unit.interval_end).clip(geometry)
+        with observe_stage(REDUCE_REGION, self.DATASET):
+            stats_result = ee_gateway.call(clipped_image.reduceRegion(
+                reducer=self._stats_reducer(),
+                geometry=geometry,
+                scale=self.SCALE,
+                maxPixels=self.MAX_PIXELS,
+                tileScale=self.TILE_SCALE
+            ).getInfo)
+        return self._format_stat(stats_result.get(self.STATS_BAND, None))
+
+    def _stacked_image(self, intervals, band_names):
+        """One band per interval, named band_names, for the batched statistics."""
+        return ee.Image.cat([
+            self._interval_image(interval_start, interval_end).rename(band)
+            for band, (label, interval_start, interval_end) in zip(band_names, intervals)
+        ])
+
+    def _compute_stats_batched(self, features, intervals):
+        """
+        Compute the statistic for every region and interval in one round trip.
+
+        All intervals are stacked into one multi-band image (one band per interval)
+        and reduced over a FeatureCollection of all given regions.
+
+        Returns:
+            stats (dict): Same layout as the per-key path: "region - interval" -> value.
+        """
+        band_names = ["b" + label.replace("-", "_") for label, _, _ in intervals]
+        image = self._stacked_image(intervals, band_names)
+        with observe_stage(REDUCE_REGION, self.DATASET):
+            per_region = batched_reduce_regions(
+                image, band_names, features,
+                reducer=self._stats_reducer(),
+                output_name=self.STATS_REDUCER,
+                scale=self.SCALE,
+                tile_scale=self.TILE_SCALE
+            )
+        stats = {}
+        for feature, values in zip(features, per_region):
+            region_name = feature["properties"].get("shapeName", "Custom Region")
+            for band, (label, _, _) in zip(band_names, intervals):
+                stats[f"{region_name} - {label}"] = self._format_stat(values.get(band))
+        return stats
+
+    def _simplify_level(self):
+        """Simplification level of the geometries sent to Earth Engine."""
+        return level_for_scale(self.SCALE) if self.simplify else 0
+
+    def _ee_features(self, features):
+        """
+        Features with the geometry sent to Earth Engine.
+
+        Vertices closer together than half a pixel of the reduction scale cannot
+        change which pixels are counted, so dropping them only shrinks the request.
+        """
+        level = self._simplify_level()
+        return [{
+            "type": "Feature",
+            "properties": feature.get("properties", {}),
+            "geometry": self.boundaries.simplified_geometry(feature, level)
+        } for feature in features]
+
+    def _compositions(self, features):
+        """
+        Custom regions that are exactly a union of known districts.
+
+        Returns:
+            dict: feature index -> list of district features, for custom regions only.
+        """
+        if not self.compose_custom or self.COMPONENT_OUTPUTS is None:
+            return {}
+        compositions = {}
+        for index, feature in enumerate(features):
+            if self._is_known(feature):
+                continue
+            try:
+                districts = get_district_index(self.boundaries).decompose(
+                    feature["geometry"], Settings.CUSTOM_MATCH_TOLERANCE
+                )
+            except Exception as e:
+                logging.warning(f"District lookup failed for a custom region: {str(e)}")
+                districts = None
+            if districts:
+                logging.info(f"Custom region {index} is the union of {len(districts)} districts")
+                compositions[index] = districts
+        return compositions
+
+    def _compose_stats(self, units):
+        """
+        Statistics of custom regions that are unions of districts.
+
+        Per-district components come from the cache where possible; the missing
+        ones are reduced in one reduceRegions call and cached for later polygons.
+
+        Returns:
+            stats (dict): "region - interval" -> value for the given units.
+        """
+        intervals = {}
+        for unit in units:
+            intervals.setdefault(unit.label, (unit.label, unit.interval_start, unit.interval_end))
+        districts = {}
+        for unit in units:
+            for district in self._compositions_map[unit.feature_index]:
+                districts[id(district)] = district
+
+        components, keys, missing_districts, missing_labels = {}, {}, set(), set()
+        for district_id, district in districts.items():
+            region_id = self._region_cache_id(district)
+            for label, (_, interval_start, interval_end) in intervals.items():
+                unit = LayerUnit(None, None, None, label, interval_start, interval_end)
+                keys[(district_id, label)] = (self._cache_key(COMPONENTS, region_id, unit), unit)
+                cached = result_cache.get(COMPONENTS, keys[(district_id, label)][0]) if self.use_cache else None
+                if cached is not None:
+                    components[(district_id, label)] = cached["value"]
+                else:
+                    missing_districts.add(district_id)
+                    missing_labels.add(label)
+
+        if missing_districts:
+            district_ids = sorted(missing_districts)
+            reduce_intervals = [interval for label, interval in intervals.items() if label in missing_labels]
+            band_names = ["b" + label.replace("-", "_") for label, _, _ in reduce_intervals]
+            with observe_stage(REDUCE_REGION, self.DATASET):
+                per_region = batched_reduce_components(
+                    self._stacked_image(reduce_intervals, band_names),
+                    band_names,
+                    self._ee_features([districts[district_id] for district_id in district_ids]),
+                    reducer=self._component_reducer(),
+                    output_names=self.COMPONENT_OUTPUTS,
+                    scale=self.SCALE,
+                    tile_scale=self.TILE_SCALE
+                )
+            for district_id, values in zip(district_ids, per_region):
+                for band, (label, _, _) in zip(band_names, reduce_intervals):
+                    if band not in values:
+                        continue
+                    components[(district_id, label)] = values[band]
+                    if self.use_cache:
+                        key, unit = keys[(district_id, label)]
+                        result_cache.set(COMPONENTS, key, {"value": values[band]}, ttl=self._stats_ttl(unit))
+
+        stats = {}
+        for unit in units:
+            parts = [components.get((id(district), unit.label))
+                     for district in self._compositions_map[unit.feature_index]]
+            if all(part is not None for part in parts):
+                stats[unit.key] = self._compose_stat(parts)
+        return stats
+
+    def _prepare(self):
+        """Resolve regions, intervals and units once per processor."""
+        if self.filtered_geojson is None:
+            with observe_stage(GEOJSON_FILTER, self.DATASET):
+                self.filtered_geojson = self._filter_geojson()
+            features = self.filtered_geojson.get("features", [])
+            self._features = features
+            self._intervals_list = self._intervals()
+            # The scale decides how far the boundaries sent to Earth Engine are simplified
+            self.reduction = self._choose_reduction(features, self._intervals_list)
+            self._ee_feature_list = self._ee_features(features)
+            self._compositions_map = self._compositions(features)
+            self._units = self._layer_units(features, self._intervals_list)
+            self._region_ids = [self._region_cache_id(feature) for feature in features]
+        return self._features, self._intervals_list, self._units, self._region_ids
+
+    def _choose_reduction(self, features, intervals):
+        """
+        Apply the latency budget to SCALE / TILE_SCALE and describe the result.
+
+        All regions and intervals are reduced in one batched call, so the budget
+        covers their total area times the number of intervals.
+
+        Returns:
+            dict: scale and tile_scale used, plus the budget details in budget mode.
+        """
+        if self.latency_budget is None:
+            return {"scale": self.SCALE, "tile_scale": self.TILE_SCALE}
+        area = 0.0
+        for feature in features:
+            try:
+                area += approximate_area_m2(feature["geometry"])
+            except Exception as e:
+                logging.warning(f"Could not measure a region for the latency budget: {str(e)}")
+        reduction = choose_reduction(
+            area, len(intervals), self.SCALE, self.latency_budget, Settings.EE_PIXELS_PER_SECOND
+        )
+        self.SCALE = reduction["scale"]
+        self.TILE_SCALE = reduction["tile_scale"]
+        return reduction
+
+    def layout(self):
+        """
+        Axes of the compact response.
+
+        Returns:
+            tuple: (regions, labels). regions is a list of {"name", "id"} dicts in
+            request order, id being the boundary shapeID or None for custom
+            geometries; labels are the interval labels in order.
+        """
+        features, intervals, _, _ = self._prepare()
+        regions = []
+        for feature in features:
+            properties = feature.get("properties", {})
+            regions.append({
+                "name": properties.get("shapeName", "Custom Region"),
+                "id": properties.get("shapeID") if self._is_known(feature) else None
+            })
+        return regions, [label for label, _, _ in intervals]
+
+    def unit_ids(self):
+        """
+        Canonical identity of every region x interval unit of this request.
+
+        Two requests that share a unit (same dataset, region and interval) get the
+        same id, which lets concurrent jobs compute it only once.
+
+        Returns:
+            dict: key ("region - interval") -> unit id, in region x interval order.
+        """
+        _, _, units, region_ids = self._prepare()
+        return {
+            unit.key: self._cache_key("unit", region_ids[unit.feature_index], unit)
+            for unit in units
+        }
+
+    def iter_layers(self, only_keys=None):
+        """
+        Produce one result per region and interval as soon as it is ready.
+
+        Cached tile URLs and statistics are reused; the remaining tile requests (and
+        the batched statistics call) run concurrently on a bounded worker pool.
+        With shared_tiles, all keys of an interval get the URL of one layer clipped
+        to every selected region. self.filtered_geojson is set before the first
+        result is yielded.
+
+        Args:
+            only_keys (set, optional): Restrict the work to these keys.
+
+        Yields:
+            dict: {"key", "url", "stats"} plus "error" when the tile URL or the
+            statistic could not be computed, and "timed_out": True when that was a
+            timeout or the deadline. Results arrive in completion order.
+        """
+        features, intervals, units, region_ids = self._prepare()
+        if only_keys is not None:
+            units = [unit for unit in units if unit.key in only_keys]
+        ee_features = self._ee_feature_list
+        geometries = [ee.Geometry(feature["geometry"]) for feature in ee_features]
+
+        urls, stats, errors = {}, {}, {}
+        tile_keys, stats_keys = {}, {}
+        tasks = []
+        # Units waiting for the shared layer of their interval, by interval label
+        shared_units = {}
+        for unit in units:
+            # A shared layer covers every region of the request, so all of them identify it
+            tile_region = {"regions": region_ids} if self.shared_tiles else region_ids[unit.feature_index]
+            tile_keys[unit.key] = self._cache_key(TILE_URL, tile_region, unit)
+            stats_keys[unit.key] = self._cache_key(STATS, region_ids[unit.feature_index], unit)
+            cached_url = result_cache.get(TILE_URL, tile_keys[unit.key]) if self.use_cache else None
+            cached_stat = result_cache.get(STATS, stats_keys[unit.key]) if self.use_cache else None
+            if cached_url is not None:
+                urls[unit.key] = cached_url
+            elif self.shared_tiles:
+                if unit.label not in shared_units:
+                    shared_units[unit.label] = []
+                    tasks.append(((SHARED_TILE, unit.label), partial(self._shared_tile_task, unit)))
+                shared_units[unit.label].append(unit)
+            else:
+                tasks.append(((TILE_URL, unit.key), partial(
+                    self._tile_task, unit, geometries[unit.feature_index]
+                )))
+            if cached_stat is not None:
+                stats[unit.key] = cached_stat["value"]
+            elif not self.batch_stats and unit.feature_index not in self._compositions_map:
+                tasks.append(((STATS, unit.key), partial(
+                    self._stats_task, unit, geometries[unit.feature_index]
+                )))
+
+        composed = [unit for unit in units
+                    if unit.key not in stats and unit.feature_index in self._compositions_map]
+        if composed:
+            tasks.append((COMPOSED_STATS_KEY, partial(self._compose_stats, composed)))
+
+        missing = [unit for unit in units
+                   if unit.key not in stats and unit.feature_index not in self._compositions_map]
+        if self.batch_stats and missing:
+            # Only reduce the regions and intervals that still have a gap
+            missing_regions = sorted({unit.feature_index for unit in missing})
+            missing_labels = {unit.label for unit in missing}
+            tasks.append((BATCH_STATS_KEY, partial(
+                self._compute_stats_batched,
+                [ee_features[index] for index in missing_regions],
+                [interval for interval in intervals if interval[0] in missing_labels]
+            )))
+
+        units_by_key = {unit.key: unit for unit in units}
+        pending = dict(units_by_key)
+        self.errors = {}
+        self.timed_out = []
+        self.failed = []
+        self._failed_stats = set()
+        timeouts = set()
+
+        def ready_results():
+            """Pop every unit whose tile URL and statistic are both settled."""
+            for key in list(pending):
+                tile_done = key in urls or (TILE_URL, key) in errors
+                stats_done = key in stats or (STATS, key) in errors
+                if not (tile_done and stats_done):
+                    continue
+                del pending[key]
+                url = self._client_url(units_by_key[key], tile_keys[key], urls.get(key))
+                result = {"key": key, "url": url, "stats": stats.get(key)}
+                messages = [errors[(kind, key)] for kind in (TILE_URL, STATS) if (kind, key) in errors]
+                if messages:
+                    result["error"] = self.errors[key] = "; ".join(messages)
+                    if any((kind, key) in timeouts for kind in (TILE_URL, STATS)):
+                        result["timed_out"] = True
+                        self.timed_out.append(key)
+                    else:
+                        self.failed.append(key)
+                if (STATS, key) in errors:
+                    self._failed_stats.add(key)
+                yield result
+
+        yield from ready_results()
+        for task_key, value, error in iter_bounded(tasks, self.max_workers, self.task_timeout, self.deadline_at):
+            if task_key in (BATCH_STATS_KEY, COMPOSED_STATS_KEY):
+                for unit in (missing if task_key == BATCH_STATS_KEY else composed):
+                    if error is not None:
+                        errors[(STATS, unit.key)] = f"{STATS_ERROR_PREFIX}{error}"
+                        if is_timeout(error):
+                            timeouts.add((STATS, unit.key))
+                    elif unit.key in value:
+                        stats[unit.key] = value[unit.key]
+                        if self.use_cache:
+                            result_cache.set(STATS, stats_keys[unit.key], {"value": value[unit.key]},
+                                             ttl=self._stats_ttl(unit))
+                    else:
+                        errors[(STATS, unit.key)] = f"{STATS_ERROR_PREFIX}no value returned"
+            elif task_key[0] == SHARED_TILE:
+                label_units = shared_units[task_key[1]]
+                for unit in label_units:
+                    if error is not None:
+                        errors[(TILE_URL, unit.key)] = error
+                        if is_timeout(error):
+                            timeouts.add((TILE_URL, unit.key))
+                    else:
+                        urls[unit.key] = value
+                if error is None and self.use_cache:
+                    result_cache.set(TILE_URL, tile_keys[label_units[0].key], value, ttl=result_cache.tile_ttl)
+            else:
+                kind, key = task_key
+                if error is not None:
+                    errors[task_key] = error if kind == TILE_URL else f"{STATS_ERROR_PREFIX}{error}"
+                    if is_timeout(error):
+                        timeouts.add(task_key)
+                elif kind == TILE_URL:
+                    urls[key] = value
+                    if self.use_cache:
+                        result_cache.set(TILE_URL, tile_keys[key], value, ttl=result_cache.tile_ttl)
+                else:
+                    stats[key] = value
+                    if self.use_cache:
+                        result_cache.set(STATS, stats_keys[key], {"value": value},
+                                         ttl=self._stats_ttl(units_by_key[key]))
+            yield from ready_results()
+
+    def generate_urls(self):
+        """
+        For each selected region and interval, generate a tile URL for the clipped
+        composite and compute its statistic.
+
+        Collects iter_layers, so wall-clock time follows the slowest Earth Engine
+        call rather than the sum (and never exceeds the deadline). Keys that fail
+        or time out are left out of urls/stats, recorded in self.errors and listed
+        in self.timed_out or self.failed.
+
+        Returns:
+            urls (dict): Dictionary mapping "region - interval" to a tile URL.
+            stats (dict): Dictionary mapping the same key to its statistic.
+            filtered_geojson (dict): GeoJSON with only the selected region features.
+        """
+        results = {result["key"]: result for result in self.iter_layers()}
+        # Keep the region x interval order regardless of cache hits and completion order
+        order = [unit.key for unit in self._units]
+        urls, stats = {}, {}
+        for key in order:
+            result = results.get(key)
+            if result is None:
+                continue
+            if result["url"] is not None:
+                urls[key] = result["url"]
+            if key not in self._failed_stats:
+                stats[key] = result["stats"]
+        self.errors = {key: self.errors[key] for key in order if key in self.errors}
+        self.timed_out = [key for key in order if key in set(self.timed_out)]
+        self.failed = [key for key in order if key in set(self.failed)]
+        return urls, stats, self.filtered_geojson
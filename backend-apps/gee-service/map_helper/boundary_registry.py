@@ -0,0 +1,200 @@
+import os
+import json
+import logging
+import threading
+from map_helper.geometry_simplify import simplify_geometry, simplify_shared, build_topology, SIMPLIFY_LEVELS
+from map_helper.custom_regions import canonical_geometry
+
+
+class BoundaryRegistry:
+    """
+    In-memory copy of a boundary GeoJSON file with hash indexes on shapeName and shapeID.
+
+    The file is parsed once and reloaded only when its mtime changes. Lookups return
+    the stored feature dicts themselves (no copies), so callers must treat them as
+    read-only.
+    """
+
+    def __init__(self, geojson_path):
+        self.geojson_path = geojson_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.geojson_data = {"type": "FeatureCollection", "features": []}
+        self._by_name = {}
+        self._by_name_lower = {}
+        self._by_id = {}
+        # level -> {id(feature): simplified geometry} and the shared-arc topology of
+        # all features, both rebuilt on reload
+        self._simplified = {}
+        self._topology = None
+        self._simplify_lock = threading.Lock()
+        self._reload_if_changed()
+
+    def _load(self, mtime):
+        """Parse the GeoJSON file and rebuild the indexes. Caller must hold the lock."""
+        try:
+            with open(self.geojson_path, 'r') as f:
+                geojson_data = json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading GeoJSON file: {str(e)}")
+            raise
+
+        by_name, by_name_lower, by_id = {}, {}, {}
+        for feature in geojson_data.get("features", []):
+            properties = feature.get("properties") or {}
+            name = properties.get("shapeName")
+            shape_id = properties.get("shapeID")
+            # Keep the first feature for duplicate keys, like the old linear scan did
+            if name is not None:
+                by_name.setdefault(name, feature)
+                by_name_lower.setdefault(name.lower(), feature)
+            if shape_id is not None:
+                by_id.setdefault(shape_id, feature)
+
+        # Swap everything in at once so readers never see a half-built index
+        self.geojson_data = geojson_data
+        self._by_name, self._by_name_lower, self._by_id = by_name, by_name_lower, by_id
+        self._simplified = {}
+        self._topology = None
+        self._mtime = mtime
+        logging.info(f"Loaded {len(by_name)} boundaries from {self.geojson_path}")
+
+    def _reload_if_changed(self):
+        """Reload the file if its mtime differs from the loaded copy."""
+        mtime = os.stat(self.geojson_path).st_mtime
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._load(mtime)
+
+    @property
+    def features(self):
+        """All features of the boundary file."""
+        self._reload_if_changed()
+        return self.geojson_data.get("features", [])
+
+    @property
+    def version(self):
+        """Modification time of the loaded file, usable as a cache version."""
+        self._reload_if_changed()
+        return self._mtime
+
+    def get_by_name(self, name, case_insensitive=False):
+        """Return the feature whose shapeName matches, or None."""
+        self._reload_if_changed()
+        if case_insensitive:
+            return self._by_name_lower.get(name.lower())
+        return self._by_name.get(name)
+
+    def get_by_id(self, shape_id):
+        """Return the feature whose shapeID matches, or None."""
+        self._reload_if_changed()
+        return self._by_id.get(shape_id)
+
+    def get(self, key):
+        """Look a region up by shapeName first, then by shapeID."""
+        return self.get_by_name(key) or self._by_id.get(key)
+
+    def _is_registered(self, feature):
+        """True if the feature object is one of the loaded boundaries (not a custom region)."""
+        properties = feature.get("properties") or {}
+        return self._by_name.get(properties.get("shapeName")) is feature \
+            or self._by_id.get(properties.get("shapeID")) is feature
+
+    def simplified_geometry(self, feature, level):
+        """
+        Geometry of a feature simplified to a level of SIMPLIFY_LEVELS.
+
+        Loaded boundaries are simplified all together on shared arcs (see
+        simplify_shared), so neighbours keep a common border; each level is
+        computed once and kept until the file changes. Custom geometries are
+        simplified on their own on every call.
+        """
+        if SIMPLIFY_LEVELS[level] == 0:
+            return feature["geometry"]
+        if not self._is_registered(feature):
+            return simplify_geometry(feature["geometry"], level)
+        geometry = self._simplified_level(level).get(id(feature))
+        if geometry is None:
+            return simplify_geometry(feature["geometry"], level)
+        return geometry
+
+    def _simplified_level(self, level):
+        """{id(feature): geometry} of every loaded boundary at a level, computed on first use."""
+        simplified = self._simplified.get(level)
+        if simplified is not None:
+            return simplified
+        with self._simplify_lock:
+            simplified = self._simplified.get(level)
+            if simplified is None:
+                geojson_data, topology = self.geojson_data, self._topology
+                features = geojson_data.get("features", [])
+                geometries = [feature["geometry"] for feature in features]
+                if topology is None:
+                    topology = build_topology(geometries)
+                simplified = dict(zip(
+                    (id(feature) for feature in features),
+                    simplify_shared(geometries, level, topology)
+                ))
+                # Keep the result only if the file was not reloaded meanwhile
+                if self.geojson_data is geojson_data:
+                    self._topology = topology
+                    self._simplified[level] = simplified
+        return simplified
+
+    def precompute_simplified(self, levels=None):
+        """Simplify every loaded boundary at the given levels (all by default) ahead of time."""
+        levels = list(SIMPLIFY_LEVELS) if levels is None else levels
+        for feature in self.features:
+            for level in levels:
+                self.simplified_geometry(feature, level)
+        logging.info(f"Precomputed simplified boundaries for levels {levels}")
+
+    def filter_regions(self, selected_regions):
+        """
+        Build a FeatureCollection with only the selected regions.
+
+        Args:
+            selected_regions (list): Region names / shapeIDs (str) or custom geometries (dict).
+
+        Returns:
+            dict: GeoJSON FeatureCollection. Named regions reference the registry's features.
+        """
+        filtered_features = []
+        for region in selected_regions:
+            if isinstance(region, str):
+                feature = self.get(region)
+                if feature is not None:
+                    filtered_features.append(feature)
+                    logging.info(f"Found geometry for region: {region}")
+                else:
+                    logging.warning(f"Region not found in GeoJSON: {region}")
+            elif isinstance(region, dict):
+                logging.info("Processing custom region geometry")
+                # Canonical form so equal polygons share cache entries
+                filtered_features.append({
+                    "type": "Feature",
+                    "properties": {"shapeName": "Custom Region"},
+                    "geometry": canonical_geometry(region)
+                })
+            else:
+                logging.warning(f"Invalid region format: {region}")
+        return {"type": "FeatureCollection", "features": filtered_features}
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_boundary_registry(geojson_path):
+    """Return the process-wide registry for a GeoJSON file, loading it on first use."""
+    key = os.path.abspath(geojson_path)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = BoundaryRegistry(key)
+                _registries[key] = registry
+    return registry
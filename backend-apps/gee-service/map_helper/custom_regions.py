@@ -0,0 +1,94 @@
+import logging
+import threading
+import shapely
+from shapely.geometry import shape, mapping
+from shapely.strtree import STRtree
+
+# Coordinates of custom polygons are snapped to this grid (degrees, ~1 cm)
+CANONICAL_GRID = 1e-7
+
+
+def canonical_geometry(geometry):
+    """
+    Canonical form of a custom GeoJSON geometry.
+
+    Coordinates are snapped to CANONICAL_GRID and the geometry is normalized
+    (ring orientation, starting vertex and part order), so the same polygon drawn
+    or serialized differently hashes to the same cache key. Geometries shapely
+    cannot read are returned unchanged.
+    """
+    try:
+        return mapping(shapely.set_precision(shape(geometry), CANONICAL_GRID).normalize())
+    except Exception as e:
+        logging.warning(f"Could not canonicalize custom geometry: {str(e)}")
+        return geometry
+
+
+class DistrictIndex:
+    """
+    STRtree over the boundaries of a BoundaryRegistry.
+
+    Used to find the districts a custom polygon touches and to recognise custom
+    polygons that are exactly one district or a union of whole districts.
+    """
+
+    def __init__(self, features):
+        self.features = features
+        self.shapes = [shape(feature["geometry"]) for feature in features]
+        self.tree = STRtree(self.shapes)
+
+    def intersecting(self, geometry):
+        """Features whose boundary intersects the geometry."""
+        indexes = self.tree.query(shape(geometry), predicate="intersects")
+        return [self.features[index] for index in sorted(indexes)]
+
+    def decompose(self, geometry, tolerance=0.001):
+        """
+        Districts whose union is the geometry, or None.
+
+        Every district overlapping the polygon must lie inside it (up to the
+        relative tolerance, which absorbs digitizing noise along shared borders)
+        and together they must cover its area. Slivers below the tolerance are
+        treated as touching neighbours.
+
+        Returns:
+            list: Registry features making up the polygon, or None.
+        """
+        target = shape(geometry)
+        if target.is_empty or not target.is_valid or target.area == 0:
+            return None
+        parts, covered = [], 0.0
+        for index in sorted(self.tree.query(target, predicate="intersects")):
+            district = self.shapes[index]
+            overlap = district.intersection(target).area
+            if overlap <= district.area * tolerance:
+                continue
+            if overlap < district.area * (1 - tolerance):
+                # District only partly inside the polygon
+                return None
+            parts.append(self.features[index])
+            covered += district.area
+        if not parts or abs(covered - target.area) > target.area * tolerance:
+            return None
+        return parts
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_district_index(registry):
+    """District index of a registry, rebuilt when the boundary file changes."""
+    key = (registry.geojson_path, registry.version)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = DistrictIndex(registry.features)
+                # Only the current version of each file is kept
+                for stale in [k for k in _indexes if k[0] == registry.geojson_path]:
+                    del _indexes[stale]
+                _indexes[key] = index
+                logging.info(f"Built district index over {len(index.features)} boundaries")
+    return index
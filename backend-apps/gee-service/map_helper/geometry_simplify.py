@@ -0,0 +1,361 @@
+import math
+import logging
+from shapely.geometry import shape, mapping, LineString
+
+# Simplification tolerance in degrees for each level (0 keeps full resolution)
+SIMPLIFY_LEVELS = {
+    0: 0.0,
+    1: 0.0001,   # ~11 m
+    2: 0.0005,   # ~55 m
+    3: 0.002,    # ~220 m
+    4: 0.01      # ~1.1 km
+}
+
+# Slippy-map zoom levels accepted for choosing a level
+MAX_ZOOM = 24
+
+# Encodings of the boundaries sent to the browser
+BOUNDARY_FORMATS = ("geojson", "topojson")
+
+# Meters per degree of latitude, good enough to turn pixel sizes into tolerances
+METERS_PER_DEGREE = 111320.0
+
+
+def _level_for_tolerance(tolerance):
+    """Coarsest level whose tolerance does not exceed the given one (in degrees)."""
+    best = 0
+    for level, level_tolerance in sorted(SIMPLIFY_LEVELS.items()):
+        if level_tolerance <= tolerance:
+            best = level
+    return best
+
+
+def level_for_zoom(zoom, latitude=20.0):
+    """
+    Level matching a web map zoom: the tolerance stays under half a screen pixel.
+
+    Args:
+        zoom (int): Slippy-map zoom level.
+        latitude (float): Latitude used for the ground resolution (Maharashtra by default).
+    """
+    meters_per_pixel = 156543.03392 * math.cos(math.radians(latitude)) / (2 ** zoom)
+    return _level_for_tolerance(meters_per_pixel / 2 / METERS_PER_DEGREE)
+
+
+def level_for_scale(scale):
+    """Level matching a reduction scale in meters: the tolerance stays under half a pixel."""
+    return _level_for_tolerance(scale / 2 / METERS_PER_DEGREE)
+
+
+def simplify_geometry(geometry, level):
+    """
+    Simplify one GeoJSON geometry on its own with Douglas-Peucker at the level's tolerance.
+
+    preserve_topology keeps the polygon valid (no self-intersections or dropped
+    rings). Used for custom regions; the boundaries of a file are simplified
+    together with simplify_shared so that neighbours keep a common border.
+    """
+    tolerance = SIMPLIFY_LEVELS[level]
+    if tolerance == 0:
+        return geometry
+    return mapping(shape(geometry).simplify(tolerance, preserve_topology=True))
+
+
+def _polygons(geometry):
+    """Rings of a Polygon / MultiPolygon as lists of (x, y) without the closing point, else None."""
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry.get("coordinates") or []]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry.get("coordinates") or []
+    else:
+        return None
+    cleaned = []
+    for polygon in polygons:
+        rings = []
+        for ring in polygon:
+            points = []
+            for point in ring:
+                point = (point[0], point[1])
+                if not points or points[-1] != point:
+                    points.append(point)
+            if len(points) > 1 and points[0] == points[-1]:
+                points.pop()
+            rings.append(points)
+        cleaned.append(rings)
+    return cleaned
+
+
+def build_topology(geometries):
+    """
+    Split the rings of Polygon / MultiPolygon geometries into arcs shared between neighbours.
+
+    A ring is cut at every junction, a point whose neighbours differ between the
+    rings containing it. The border of two regions then becomes one arc that both
+    reference, the second one reversed (written ~index, as in TopoJSON). A ring
+    that touches no other ring stays one closed arc.
+
+    Returns:
+        tuple: (arcs as lists of (x, y) tuples, and per geometry a TopoJSON-style
+        {"type", "arcs"} dict, or None for other geometry types)
+    """
+    polygons_list = [_polygons(geometry) for geometry in geometries]
+    neighbours, junctions = {}, set()
+    for polygons in polygons_list:
+        for ring in (ring for polygon in polygons or [] for ring in polygon):
+            for i, point in enumerate(ring):
+                pair = frozenset((ring[i - 1], ring[(i + 1) % len(ring)]))
+                if neighbours.setdefault(point, pair) != pair:
+                    junctions.add(point)
+
+    arcs, index = [], {}
+
+    def arc_ref(points):
+        key = tuple(points)
+        if key in index:
+            return index[key]
+        if key[::-1] in index:
+            return ~index[key[::-1]]
+        index[key] = len(arcs)
+        arcs.append(list(points))
+        return index[key]
+
+    def cut(ring):
+        if not ring:
+            return []
+        starts = [i for i, point in enumerate(ring) if point in junctions]
+        # Start at a junction, or at the smallest point so equal closed rings match
+        start = starts[0] if starts else ring.index(min(ring))
+        ring = ring[start:] + ring[:start] + [ring[start]]
+        if not starts:
+            return [arc_ref(ring)]
+        refs, current = [], [ring[0]]
+        for point in ring[1:]:
+            current.append(point)
+            if point in junctions:
+                refs.append(arc_ref(current))
+                current = [point]
+        return refs
+
+    encoded = []
+    for geometry, polygons in zip(geometries, polygons_list):
+        if polygons is None:
+            encoded.append(None)
+        elif geometry["type"] == "Polygon":
+            encoded.append({"type": "Polygon", "arcs": [cut(ring) for ring in polygons[0]]})
+        else:
+            encoded.append({"type": "MultiPolygon",
+                            "arcs": [[cut(ring) for ring in polygon] for polygon in polygons]})
+    return arcs, encoded
+
+
+def simplify_arcs(arcs, tolerance):
+    """Douglas-Peucker each arc; endpoints (junctions) stay, closed arcs keep at least a triangle."""
+    simplified = []
+    for arc in arcs:
+        points = arc
+        if len(arc) > 2:
+            points = [(x, y) for x, y in LineString(arc).simplify(tolerance, preserve_topology=False).coords]
+            if arc[0] == arc[-1] and len(points) < 4:
+                points = arc
+        simplified.append(points)
+    return simplified
+
+
+def _decode_ring(refs, arcs):
+    ring = []
+    for ref in refs:
+        arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        ring.extend(arc if not ring else arc[1:])
+    return [[x, y] for x, y in ring]
+
+
+def decode_geometry(encoded, arcs):
+    """GeoJSON geometry of a build_topology entry over (possibly simplified) arcs."""
+    if encoded["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": [_decode_ring(refs, arcs) for refs in encoded["arcs"]]}
+    return {"type": "MultiPolygon", "coordinates": [
+        [_decode_ring(refs, arcs) for refs in polygon] for polygon in encoded["arcs"]
+    ]}
+
+
+def simplify_shared(geometries, level, topology=None):
+    """
+    Simplify geometries together so that neighbours keep identical borders.
+
+    Each shared arc is simplified once and used by every region on either side,
+    so no slivers or overlaps open up between them. A region whose simplified
+    rings come out invalid (e.g. a tiny ring collapsed, or two borders crossing)
+    is simplified on its own with simplify_geometry instead.
+
+    Args:
+        geometries (list): GeoJSON geometries.
+        level (int): Key of SIMPLIFY_LEVELS.
+        topology (tuple, optional): build_topology(geometries), when already built.
+
+    Returns:
+        list: The simplified geometries, in order.
+    """
+    tolerance = SIMPLIFY_LEVELS[level]
+    if tolerance == 0:
+        return list(geometries)
+    arcs, encoded = topology if topology is not None else build_topology(geometries)
+    simplified_arcs = simplify_arcs(arcs, tolerance)
+    simplified = []
+    for geometry, entry in zip(geometries, encoded):
+        result = decode_geometry(entry, simplified_arcs) if entry is not None else None
+        if result is None or not shape(result).is_valid:
+            result = simplify_geometry(geometry, level)
+        simplified.append(result)
+    return simplified
+
+
+def count_vertices(geometry):
+    """Number of coordinate pairs in a GeoJSON geometry."""
+    def count(coordinates):
+        if not coordinates:
+            return 0
+        if isinstance(coordinates[0], (int, float)):
+            return 1
+        return sum(count(part) for part in coordinates)
+    return count(geometry.get("coordinates", []))
+
+
+def simplify_feature_collection(feature_collection, level, simplified_geometry):
+    """
+    Swap every feature's geometry for its simplified version.
+
+    Args:
+        feature_collection (dict): FeatureCollection from the boundary registry.
+        level (int): Key of SIMPLIFY_LEVELS.
+        simplified_geometry (callable): (feature, level) -> geometry, normally
+            BoundaryRegistry.simplified_geometry so known boundaries are memoized.
+
+    Returns:
+        tuple: (new FeatureCollection, report dict with the vertex reduction). The
+        input features are not modified.
+    """
+    features = []
+    vertices_full = vertices_sent = 0
+    for feature in feature_collection.get("features", []):
+        geometry = simplified_geometry(feature, level)
+        vertices_full += count_vertices(feature["geometry"])
+        vertices_sent += count_vertices(geometry)
+        features.append({
+            "type": "Feature",
+            "properties": feature.get("properties", {}),
+            "geometry": geometry
+        })
+    report = {
+        "level": level,
+        "tolerance": SIMPLIFY_LEVELS[level],
+        "vertices_full": vertices_full,
+        "vertices_sent": vertices_sent
+    }
+    return {"type": "FeatureCollection", "features": features}, report
+
+
+def to_topojson(feature_collection, quantization=100000):
+    """
+    Encode a FeatureCollection as quantized, delta-encoded TopoJSON.
+
+    Borders shared by neighbouring regions are stored once, as an arc that both
+    regions reference (see build_topology).
+    """
+    features = feature_collection.get("features", [])
+    arcs, encoded = build_topology([feature["geometry"] for feature in features])
+    points = [point for arc in arcs for point in arc]
+    if not points:
+        return {"type": "Topology", "objects": {"regions": {"type": "GeometryCollection", "geometries": []}},
+                "arcs": []}
+
+    x0, y0 = min(x for x, _ in points), min(y for _, y in points)
+    scale_x = (max(x for x, _ in points) - x0) / (quantization - 1) or 1
+    scale_y = (max(y for _, y in points) - y0) / (quantization - 1) or 1
+
+    quantized_arcs = []
+    for arc in arcs:
+        quantized, previous = [], None
+        last_x = last_y = 0
+        for x, y in arc:
+            qx, qy = round((x - x0) / scale_x), round((y - y0) / scale_y)
+            if (qx, qy) == previous:
+                continue
+            quantized.append([qx - last_x, qy - last_y])
+            last_x, last_y = qx, qy
+            previous = (qx, qy)
+        # An arc needs two positions even when it quantizes to one point
+        if len(quantized) < 2:
+            quantized.append([0, 0])
+        quantized_arcs.append(quantized)
+
+    geometries = []
+    for feature, entry in zip(features, encoded):
+        if entry is None:
+            logging.warning(f"Skipping unsupported geometry type in TopoJSON: {feature['geometry'].get('type')}")
+            continue
+        geometries.append(dict(entry, properties=feature.get("properties", {})))
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": [scale_x, scale_y], "translate": [x0, y0]},
+        "objects": {"regions": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": quantized_arcs
+    }
+
+
+def _integer_option(name, value, low, high):
+    """An integer option (int or digits string) within [low, high], else ValueError."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def parse_boundary_options(zoom=None, level=None, boundary_format=None):
+    """
+    Validate the zoom / simplify_level / boundary_format options of a request.
+
+    Returns:
+        tuple: (zoom, level, boundary_format) with zoom and level as ints or None.
+
+    Raises:
+        ValueError: For a non-integer or out-of-range zoom or level, or an unknown format.
+    """
+    if zoom is not None:
+        zoom = _integer_option("zoom", zoom, 0, MAX_ZOOM)
+    if level is not None:
+        level = _integer_option("simplify_level", level, 0, max(SIMPLIFY_LEVELS))
+    if boundary_format is not None and boundary_format not in BOUNDARY_FORMATS:
+        raise ValueError(f"boundary_format must be one of {', '.join(BOUNDARY_FORMATS)}")
+    return zoom, level, boundary_format
+
+
+def boundaries_for_client(registry, feature_collection, zoom=None, level=None, boundary_format=None):
+    """
+    Boundaries to send to the browser for a request.
+
+    Picks the simplification level from an explicit level or the map zoom and
+    optionally encodes the result as TopoJSON. Without any of these options the
+    full-resolution FeatureCollection is returned unchanged.
+
+    Returns:
+        tuple: (geojson or TopoJSON dict, simplification report or None)
+
+    Raises:
+        ValueError: For invalid options (see parse_boundary_options).
+    """
+    zoom, level, boundary_format = parse_boundary_options(zoom, level, boundary_format)
+    if level is None and zoom is None and boundary_format != "topojson":
+        return feature_collection, None
+    if level is None:
+        level = level_for_zoom(zoom) if zoom is not None else 0
+    simplified, report = simplify_feature_collection(feature_collection, level, registry.simplified_geometry)
+    if boundary_format == "topojson":
+        simplified = to_topojson(simplified)
+        report["format"] = "topojson"
+    return simplified, report
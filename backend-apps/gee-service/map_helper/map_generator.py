@@ -1,143 +1,166 @@
 import ee
-import geemap
-import json
-
-from config import initialize_earth_engine
-
-class NO2Processor:
-    def __init__(self):
-        initialize_earth_engine()
-        
-        # Predefined NO2 concentration classes
-        self.predefined_classes = {
-            'low': 1,
-            'medium': 2,
-            'high': 3
-        }
-        
-        # Visualization parameters for NO2 concentration classes
+import logging
+from metrics import observe_stage, REDUCE_REGION
+from map_helper.base_processor import BaseMapProcessor
+from map_helper.zonal_stats import batched_reduce_regions
+from ee_gateway import ee_gateway
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Square meters per square kilometer
+M2_PER_KM2 = 1e6
+
+
+class NO2MapProcessor(BaseMapProcessor):
+    """
+    Annual NO2 column density, classified into low / medium / high.
+
+    The annual mean is computed once and classified into a single image (class
+    values 1-3, pixels outside the class ranges masked), so every region and year
+    gets one tile URL with a discrete palette. The statistic is the area of each
+    class in km².
+    """
+    DATASET = "NO2"
+    # Area per class, reported as {"low": km², "medium": km², "high": km²}
+    STATS_BAND = "class"
+    STATS_REDUCER = "class_area"
+
+    # Class value in the classified image and [lower, upper) bound of the annual mean (mol/m²)
+    CLASSES = {
+        "low": (1, 0, 0.00005),
+        "medium": (2, 0.00005, 0.0001),
+        "high": (3, 0.0001, 0.0002)
+    }
+
+    def __init__(self, selected_regions, start_year, end_year, **options):
+        super().__init__(selected_regions, **options)
+        self.start_year = int(start_year)
+        self.end_year = int(end_year)
+        # One palette entry per class value, so min/max make the palette discrete
         self.visualization_params = {
-            'low': {
-                'bands': ['NO2_column_number_density'],
-                'palette': ['blue'],
-                'min': 0,
-                'max': 0.00005
-            },
-            'medium': {
-                'bands': ['NO2_column_number_density'],
-                'palette': ['green'],
-                'min': 0.00005,
-                'max': 0.0001
-            },
-            'high': {
-                'bands': ['NO2_column_number_density'],
-                'palette': ['red'],
-                'min': 0.0001,
-                'max': 0.0002
-            }
+            "min": 1,
+            "max": 3,
+            "palette": [
+                "#0000FF",  # Low
+                "#008000",  # Medium
+                "#FF0000"   # High
+            ]
         }
+        # Sentinel-5P offline NO2 dataset collection
+        self.collection = "COPERNICUS/S5P/OFFL/L3_NO2"
 
-    def _get_no2_dataset(self, year: int, class_name: str) -> tuple:
-        """
-        Retrieve and process NO2 dataset for a specific year and class
-        """
-        # Filter NO2 collection by date
-        dataset = ee.ImageCollection("COPERNICUS/S5P/OFFL/L3_NO2") \
-            .filterDate(f"{year}-01-01", f"{year}-12-31") \
-            .select('NO2_column_number_density')
-        
-        # Compute mean image
-        image = dataset.mean()
-        
-        # Mask image based on concentration thresholds
-        thresholds = {
-            'low': (0, 0.00005),
-            'medium': (0.00005, 0.0001),
-            'high': (0.0001, 0.0002)
+        # Define parameters for numerical reduction.
+        self.SCALE = 1113
+        self.MAX_PIXELS = 1e13
+        self.TILE_SCALE = 4
+
+    def _intervals(self):
+        """Annual intervals labelled by year."""
+        return [(str(year), f"{year}-01-01", f"{year}-12-31")
+                for year in range(self.start_year, self.end_year + 1)]
+
+    def _interval_image(self, interval_start, interval_end):
+        """Annual mean NO2 classified into the CLASSES values, one band named "class"."""
+        mean = ee.ImageCollection(self.collection) \
+            .filterDate(interval_start, interval_end) \
+            .select("NO2_column_number_density") \
+            .mean()
+        classified = ee.Image.constant(0)
+        lowest, highest = None, None
+        for value, lower, upper in self.CLASSES.values():
+            classified = classified.where(mean.gte(lower).And(mean.lt(upper)), value)
+            lowest = lower if lowest is None else min(lowest, lower)
+            highest = upper if highest is None else max(highest, upper)
+        in_range = mean.gte(lowest).And(mean.lt(highest))
+        return classified.updateMask(in_range).rename(self.STATS_BAND)
+
+    def _stats_reducer(self):
+        """Sum of pixel area grouped by the class band (band 1 of the reduced image)."""
+        return ee.Reducer.sum().group(groupField=1, groupName=self.STATS_BAND)
+
+    def _format_stat(self, value):
+        """{"low": km², "medium": km², "high": km²} from the grouped reducer's list of groups."""
+        areas = {group.get(self.STATS_BAND): group.get("sum") for group in (value or [])}
+        return {
+            class_name: round(areas.get(class_value, 0) / M2_PER_KM2, 3)
+            for class_name, (class_value, _, _) in self.CLASSES.items()
         }
-        
-        min_val, max_val = thresholds[class_name]
-        masked_image = image.updateMask(
-            image.gte(min_val).And(image.lt(max_val))
-        )
-        
-        return masked_image, self.visualization_params[class_name]
-
-    def generate_urls(
-        self, 
-        selected_years, 
-        selected_classes, 
-        region_name, 
-        geojson_path
-    ):
+
+    def _stats_task(self, unit, geometry):
+        """Class areas for one region and year with one grouped reduceRegion call."""
+        classified = self._interval_image(unit.interval_start, unit.interval_end).clip(geometry)
+        with observe_stage(REDUCE_REGION, self.DATASET):
+            stats_result = ee_gateway.call(ee.Image.pixelArea().addBands(classified).reduceRegion(
+                reducer=self._stats_reducer(),
+                geometry=geometry,
+                scale=self.SCALE,
+                maxPixels=self.MAX_PIXELS,
+                tileScale=self.TILE_SCALE
+            ).getInfo)
+        return self._format_stat(stats_result.get("groups"))
+
+    def _compute_stats_batched(self, features, intervals):
         """
-        Generate tile URLs for NO2 concentration maps
+        Class areas of every region and year in one round trip.
+
+        A grouped reducer cannot be applied per band of a stacked image, so each
+        year contributes one pixel-area band per class (masked to that class) and
+        all bands are summed in one reduceRegions call.
+
+        Returns:
+            stats (dict): "region - year" -> {"low": km², "medium": km², "high": km²}.
         """
-        # Load GeoJSON and find the specific region
-        with open(geojson_path, 'r') as f:
-            geojson_data = json.load(f)
-        
-        # Find the feature for the specified region
-        region_feature = next(
-            (feature for feature in geojson_data['features'] 
-             if feature['properties']['shapeName'].lower() == region_name.lower()),
-            None
-        )
-        
-        if not region_feature:
-            raise ValueError(f"Region {region_name} not found in the GeoJSON")
-        
-        # Convert region geometry to Earth Engine Geometry
-        region_geometry = ee.Geometry(region_feature['geometry'])
-        
-        # Store generated URLs
-        urls = {}
-        
-        for year in selected_years:
-            for class_name in selected_classes:
-                # Generate new URL
-                image, vis_params = self._get_no2_dataset(year, class_name)
-                clipped_image = image.clip(region_geometry)
-                
-                tile_layer = geemap.ee_tile_layer(
-                    clipped_image,
-                    vis_params,
-                    f"NO2 {class_name.capitalize()} ({year})"
-                )
-                url = tile_layer.url_format
-                
-                # Store URL
-                key = f"{region_name} - {year} - {class_name}"
-                urls[key] = url
-        
-        return urls
-
-def generate_no2_maps(
-    selected_years, 
-    selected_classes, 
-    region_name, 
-    geojson_path='boundaries/datasets/maharashtra_districts.geojson'
-):
+        area = ee.Image.pixelArea()
+        bands, band_names = [], []
+        for label, interval_start, interval_end in intervals:
+            classified = self._interval_image(interval_start, interval_end)
+            for class_name, (class_value, _, _) in self.CLASSES.items():
+                band = f"b{label}_{class_name}"
+                bands.append(area.updateMask(classified.eq(class_value)).rename(band))
+                band_names.append(band)
+        with observe_stage(REDUCE_REGION, self.DATASET):
+            per_region = batched_reduce_regions(
+                ee.Image.cat(bands), band_names, features,
+                reducer=ee.Reducer.sum(),
+                output_name="sum",
+                scale=self.SCALE,
+                tile_scale=self.TILE_SCALE
+            )
+        stats = {}
+        for feature, values in zip(features, per_region):
+            region_name = feature["properties"].get("shapeName", "Custom Region")
+            for label, _, _ in intervals:
+                stats[f"{region_name} - {label}"] = self._format_stat([
+                    {self.STATS_BAND: class_value, "sum": values.get(f"b{label}_{class_name}") or 0}
+                    for class_name, (class_value, _, _) in self.CLASSES.items()
+                ])
+        return stats
+
+    def legends(self):
+        """Create legend as a mapping of class names to their respective colors."""
+        return dict(zip(self.CLASSES, self.visualization_params["palette"]))
+
+
+def no2_main(selected_regions, start_year, end_year):
     """
-    Main function to generate NO2 maps
+    Main function for generating classified NO2 map tile URLs and class areas.
+
+    Args:
+        selected_regions (list): List of region names (str) or geometries (dict).
+        start_year (int or str): The starting year (>= 2019).
+        end_year (int or str): The ending year.
+
+    Returns:
+        tuple: (urls, stats, legends, filtered_geojson, selected_regions, errors)
     """
-    processor = NO2Processor()
-    
-    # Generate map URLs
-    urls = processor.generate_urls(
-        selected_years,
-        selected_classes,
-        region_name,
-        geojson_path
-    )
-    
-    # Generate legends
-    legends = {
-        class_name: processor.visualization_params[class_name]["palette"][0] 
-        for class_name in selected_classes
-    }
-    
-    return {
-        "map_urls": urls,
-        "legends": legends
-    }
\ No newline at end of file
+    try:
+        processor = NO2MapProcessor(selected_regions, start_year, end_year)
+        urls, stats, filtered_geojson = processor.generate_urls()
+        legends = processor.legends()
+        return urls, stats, legends, filtered_geojson, selected_regions, processor.errors
+    except Exception as e:
+        logging.error(f"Error in no2_main: {str(e)}")
+        raise
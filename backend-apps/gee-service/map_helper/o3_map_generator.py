@@ -1,21 +1,26 @@
 import ee
-import geemap
-import json
 import logging
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from config import initialize_earth_engine
+from map_helper.base_processor import BaseMapProcessor
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class OzoneMapProcessor:
-    def __init__(self, selected_regions, start_year, end_year):
-        # Initialize Earth Engine
-        initialize_earth_engine()
-        self.selected_regions = selected_regions
+class OzoneMapProcessor(BaseMapProcessor):
+    DATASET = "Ozone"
+    # Mean of the ozone column density, reported as a bare number
+    STATS_BAND = "O3_column_number_density"
+    STATS_REDUCER = "mean"
+    # Per-district parts merged for custom regions made of whole districts
+    COMPONENT_OUTPUTS = ["mean", "count"]
+    # The monthly layers cover all selected regions: one getMapId per month
+    SHARED_TILES = True
+
+    def __init__(self, selected_regions, start_year, end_year, **options):
+        super().__init__(selected_regions, **options)
         self.start_year = int(start_year)
         self.end_year = int(end_year)
         # Visualization parameters for ozone – adjust as needed
@@ -27,45 +32,12 @@ class OzoneMapProcessor:
         }
         # Sentinel-5P Ozone dataset collection
         self.collection = "COPERNICUS/S5P/NRTI/L3_O3"
-        # Path to the single combined GeoJSON file
-        self.geojson_path = "../../boundaries/datasets/ADM4.geojson"
-        try:
-            with open(self.geojson_path, 'r') as f:
-                self.geojson_data = json.load(f)
-        except Exception as e:
-            logging.error(f"Error loading GeoJSON file: {str(e)}")
-            raise
         
         # Define parameters for numerical reduction.
         self.SCALE = 1113
         self.MAX_PIXELS = 1e13
         self.TILE_SCALE = 4
 
-    def _filter_geojson(self):
-        """Filter the combined GeoJSON to include only the selected regions."""
-        filtered_features = []
-        for region in self.selected_regions:
-            if isinstance(region, str):
-                found = False
-                for feature in self.geojson_data.get("features", []):
-                    if feature["properties"].get("shapeName") == region:
-                        filtered_features.append(feature)
-                        found = True
-                        logging.info(f"Found geometry for region: {region}")
-                        break
-                if not found:
-                    logging.warning(f"Region not found in GeoJSON: {region}")
-            elif isinstance(region, dict):
-                logging.info("Processing custom region geometry")
-                filtered_features.append({
-                    "type": "Feature",
-                    "properties": {"shapeName": "Custom Region"},
-                    "geometry": region
-                })
-            else:
-                logging.warning(f"Invalid region format: {region}")
-        return {"type": "FeatureCollection", "features": filtered_features}
-
     def _generate_monthly_intervals(self):
         """
         Generate monthly intervals between start_year and end_year.
@@ -73,7 +45,7 @@ class OzoneMapProcessor:
         """
         intervals = []
         for year in range(self.start_year, self.end_year + 1):
-            for month in range(1, 3):
+            for month in range(1, 13):
                 start_dt = datetime(year, month, 1)
                 # End of month: subtract one second from the first day of next month
                 next_month = start_dt + relativedelta(months=1)
@@ -83,64 +55,70 @@ class OzoneMapProcessor:
                 intervals.append((year, month, interval_start, interval_end))
         return intervals
 
-    def generate_urls(self):
+    def _intervals(self):
+        """Monthly intervals labelled YYYY-MM."""
+        return [(f"{year}-{month:02d}", interval_start, interval_end)
+                for year, month, interval_start, interval_end in self._generate_monthly_intervals()]
+
+    def _interval_image(self, interval_start, interval_end):
+        """Mean ozone composite over a monthly interval."""
+        # Filter the ozone collection over the monthly interval and select the desired band
+        collection = ee.ImageCollection(self.collection) \
+            .filterDate(interval_start, interval_end) \
+            .select("O3_column_number_density")
+        # Compute the monthly composite using mean()
+        return collection.mean()
+
+    def monthly_composites(self):
         """
-        For each region (from filtered GeoJSON) and for every monthly interval,
-        create a composite (mean) image for the ozone data, clip it to the region,
-        generate a tile URL, and compute the numerical mean of the 
-        O3_column_number_density.
-        
-        Returns:
-            urls (dict): Dictionary mapping a key "region - YYYY-MM" to a tile URL.
-            stats (dict): Dictionary mapping the same key to the mean O3_column_number_density.
-            filtered_geojson (dict): GeoJSON with only the selected region features.
+        Mean ozone composite of every month from January of start_year to December
+        of end_year, built server-side as one ImageCollection.
+
+        Each image carries a "label" property ("YYYY-MM"). Months without any
+        scene yield a fully masked image so the series keeps one image per month.
         """
-        filtered_geojson = self._filter_geojson()
-        urls = {}
-        stats = {}
-        intervals = self._generate_monthly_intervals()
-        
-        for feature in filtered_geojson.get("features", []):
-            region_name = feature["properties"].get("shapeName", "Custom Region")
-            geometry = ee.Geometry(feature["geometry"])
-            
-            for year, month, interval_start, interval_end in intervals:
-                key = f"{region_name} - {year}-{month:02d}"
-                logging.info(f"Processing {key}")
-                try:
-                    # Filter the ozone collection over the monthly interval and select the desired band
-                    collection = ee.ImageCollection(self.collection) \
-                        .filterDate(interval_start, interval_end) \
-                        .select("O3_column_number_density")
-                    # Compute the monthly composite using mean()
-                    image = collection.mean()
-                    # Clip the image to the region's geometry
-                    clipped_image = image.clip(geometry)
-                    # Generate a tile layer (the layer name includes the region and month)
-                    tile_layer = geemap.ee_tile_layer(
-                        clipped_image,
-                        self.visualization_params,
-                        f"{region_name} ({year}-{month:02d})"
-                    )
-                    # Extract the URL for the tile layer
-                    url = tile_layer.url_format
-                    urls[key] = url
-
-                    # Compute numerical stats (mean value) over the region
-                    stats_result = clipped_image.reduceRegion(
-                        reducer=ee.Reducer.mean(),
-                        geometry=geometry,
-                        scale=self.SCALE,
-                        maxPixels=self.MAX_PIXELS,
-                        tileScale=self.TILE_SCALE
-                    ).getInfo()
-                    o3_mean = stats_result.get("O3_column_number_density", None)
-                    stats[key] = o3_mean
-                    
-                except Exception as e:
-                    logging.error(f"Error processing {key}: {str(e)}")
-                    continue
-        return urls, stats, filtered_geojson
+        band = "O3_column_number_density"
+        collection = ee.ImageCollection(self.collection).select(band)
+        first_month = ee.Date.fromYMD(self.start_year, 1, 1)
+        month_count = (self.end_year - self.start_year + 1) * 12
+
+        def composite(offset):
+            month_start = first_month.advance(offset, "month")
+            monthly = collection.filterDate(month_start, month_start.advance(1, "month"))
+            empty = ee.Image.constant(0).toFloat().rename(band).updateMask(0)
+            image = ee.Image(ee.Algorithms.If(monthly.size().gt(0), monthly.mean(), empty))
+            return image.set({
+                "label": month_start.format("yyyy-MM"),
+                "system:time_start": month_start.millis()
+            })
+
+        return ee.ImageCollection(ee.List.sequence(0, month_count - 1).map(composite))
+
+    def _stacked_image(self, intervals, band_names):
+        """Requested months of the server-side monthly series as one multi-band image."""
+        labels = [label for label, _, _ in intervals]
+        return self.monthly_composites() \
+            .filter(ee.Filter.inList("label", labels)) \
+            .sort("system:time_start") \
+            .toBands() \
+            .rename(band_names)
+
+    def _component_reducer(self):
+        """Mean and pixel count, so district means can be merged into a weighted mean."""
+        return ee.Reducer.mean().combine(ee.Reducer.count(), sharedInputs=True)
+
+    def _compose_stat(self, components):
+        """Pixel-count weighted mean of the district means."""
+        total = sum(part["count"] or 0 for part in components if part["mean"] is not None)
+        if not total:
+            return self._format_stat(None)
+        weighted = sum(part["mean"] * part["count"] for part in components
+                       if part["mean"] is not None and part["count"])
+        return self._format_stat(weighted / total)
+
+    def legends(self):
+        """For the legend, here we simply return the first color of the palette."""
+        return {"Ozone": self.visualization_params["palette"][0]}
 
 def ozone_main(selected_regions, start_year, end_year):
     """
@@ -152,14 +130,13 @@ def ozone_main(selected_regions, start_year, end_year):
         end_year (int or str): The ending year.
     
     Returns:
-        tuple: (urls, stats, legends, filtered_geojson, selected_regions)
+        tuple: (urls, stats, legends, filtered_geojson, selected_regions, errors)
     """
     try:
         processor = OzoneMapProcessor(selected_regions, start_year, end_year)
         urls, stats, filtered_geojson = processor.generate_urls()
-        # For the legend, here we simply return the first color of the palette
-        legends = {"Ozone": processor.visualization_params["palette"][0]}
-        return urls, stats, legends, filtered_geojson, selected_regions
+        legends = processor.legends()
+        return urls, stats, legends, filtered_geojson, selected_regions, processor.errors
     except Exception as e:
         logging.error(f"Error in ozone_main: {str(e)}")
         raise
@@ -169,6 +146,6 @@ def ozone_main(selected_regions, start_year, end_year):
 #     selected_regions = ['Pune', 'Ahmadnagar']  # or custom geometries as dicts
 #     start_year = 2020
 #     end_year = 2020
-#     urls, stats, legends, geojson_data, selected_regions = ozone_main(selected_regions, start_year, end_year)
+#     urls, stats, legends, geojson_data, selected_regions, errors = ozone_main(selected_regions, start_year, end_year)
 #     print("Tile URLs:", urls)
 #     print("Stats:", stats)
@@ -0,0 +1,62 @@
+import math
+import logging
+from shapely.geometry import shape
+from map_helper.geometry_simplify import METERS_PER_DEGREE
+
+# tileScale is raised one step (x2) for every this many pixels per reduced band
+PIXELS_PER_TILE_SCALE = 25_000_000
+MAX_TILE_SCALE = 16
+
+
+def approximate_area_m2(geometry):
+    """
+    Area of a GeoJSON geometry in square meters.
+
+    Planar area in degrees scaled at the centroid latitude; accurate to a few
+    percent for district-sized polygons, which is plenty to pick a scale.
+    """
+    polygon = shape(geometry)
+    if polygon.is_empty:
+        return 0.0
+    latitude = polygon.centroid.y
+    return polygon.area * METERS_PER_DEGREE ** 2 * math.cos(math.radians(latitude))
+
+
+def choose_reduction(area_m2, bands, native_scale, latency_budget, pixels_per_second):
+    """
+    Reduction scale and tileScale that keep a reduction within a latency budget.
+
+    The work of a reduction is taken as pixels x bands at the scale, and Earth
+    Engine is assumed to get through pixels_per_second. When the native scale
+    would exceed the budget the scale is doubled until it fits (powers of two
+    keep the number of distinct scales, and cache keys, small). tileScale grows
+    with the pixels per band so large reductions do not run out of memory, and
+    stays 1 for small ones where splitting only adds overhead.
+
+    Args:
+        area_m2 (float): Total area reduced in one call.
+        bands (int): Bands reduced together (intervals in the stacked image).
+        native_scale (float): Dataset scale in meters.
+        latency_budget (float): Seconds the reduction should take.
+        pixels_per_second (float): Assumed Earth Engine reduction throughput.
+
+    Returns:
+        dict: scale, tile_scale, native_scale, estimated_pixels (per band) and latency_budget.
+    """
+    pixel_budget = max(latency_budget * pixels_per_second / max(bands, 1), 1.0)
+    scale = native_scale
+    while area_m2 / scale ** 2 > pixel_budget:
+        scale *= 2
+    pixels = area_m2 / scale ** 2
+    tile_scale = 1
+    while pixels / tile_scale > PIXELS_PER_TILE_SCALE and tile_scale < MAX_TILE_SCALE:
+        tile_scale *= 2
+    if scale != native_scale:
+        logging.info(f"Reducing at {scale} m instead of {native_scale} m to stay within {latency_budget}s")
+    return {
+        "scale": scale,
+        "tile_scale": tile_scale,
+        "native_scale": native_scale,
+        "estimated_pixels": int(pixels),
+        "latency_budget": latency_budget
+    }
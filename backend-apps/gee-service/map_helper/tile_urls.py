@@ -0,0 +1,29 @@
+import ee
+
+
+def visualization_for_ee(vis_params):
+    """
+    Visualization parameters in the form ee.Image.getMapId accepts.
+
+    Palettes are sent as a comma-separated string with the "#" of hex colors
+    stripped; Earth Engine reads "1A5BAB" but rejects "#1A5BAB". Named colors
+    pass through unchanged.
+    """
+    vis = dict(vis_params or {})
+    palette = vis.get("palette")
+    if isinstance(palette, str):
+        palette = palette.split(",")
+    if palette is not None:
+        vis["palette"] = ",".join(color.strip().lstrip("#") for color in palette)
+    return vis
+
+
+def tile_url(image, vis_params=None):
+    """
+    XYZ tile URL template ({z}/{x}/{y}) of an image, from one getMapId call.
+
+    Replaces geemap.ee_tile_layer(...).url_format, which needs geemap and with it
+    ipyleaflet, folium and matplotlib on the request path.
+    """
+    map_id = ee.Image(image).getMapId(visualization_for_ee(vis_params))
+    return map_id["tile_fetcher"].url_format
@@ -0,0 +1,94 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from ee_gateway import TaskScope, deadline_scope, task_scope
+
+# Upper bound on how long the collector sleeps before re-checking task timeouts
+_POLL_INTERVAL = 0.1
+
+# Error reported for tasks still outstanding when the request deadline passes
+DEADLINE_EXCEEDED = "request deadline exceeded"
+
+
+def is_timeout(error):
+    """True for errors of tasks that timed out or were cut off by the deadline."""
+    return error is not None and (error == DEADLINE_EXCEEDED or error.startswith("timed out"))
+
+
+def iter_bounded(tasks, max_workers, timeout=None, deadline=None):
+    """
+    Run blocking Earth Engine calls on a bounded thread pool and yield them as they finish.
+
+    Args:
+        tasks (list): (key, callable) pairs.
+        max_workers (int): Maximum number of calls in flight at once.
+        timeout (float, optional): Seconds a call may run after it has started.
+            Calls that exceed it are abandoned and reported as timed out.
+        deadline (float, optional): time.monotonic() value by which everything must
+            be done. Queued calls are cancelled, running ones abandoned and all of
+            them reported with DEADLINE_EXCEEDED; gateway calls inside the tasks
+            stop retrying once the deadline is near.
+
+    An abandoned call keeps running until Earth Engine answers, but its task is
+    abandoned in the gateway (see ee_gateway.TaskScope): its slot is handed back,
+    within the gateway's cap, and the task makes no further Earth Engine calls.
+    Tasks still running when the generator is closed early are abandoned too.
+
+    Yields:
+        tuple: (key, result, error) where error is None on success.
+    """
+    if not tasks:
+        return
+    started = {}
+    scopes = {key: TaskScope() for key, _ in tasks}
+
+    def run(key, func):
+        started[key] = time.monotonic()
+        with deadline_scope(deadline), task_scope(scopes[key]):
+            return func()
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(tasks))),
+        thread_name_prefix="ee-task"
+    )
+    futures = {}
+    try:
+        for key, func in tasks:
+            futures[executor.submit(run, key, func)] = key
+        pending = set(futures)
+        while pending:
+            poll = _POLL_INTERVAL if deadline is None else max(min(_POLL_INTERVAL, deadline - time.monotonic()), 0)
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    yield key, future.result(), None
+                except Exception as e:
+                    logging.error(f"Error processing {key}: {str(e)}")
+                    yield key, None, str(e)
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline and pending:
+                logging.error(f"Request deadline passed with {len(pending)} calls outstanding")
+                for future in pending:
+                    future.cancel()
+                    scopes[futures[future]].abandon()
+                    yield futures[future], None, DEADLINE_EXCEEDED
+                return
+            if timeout is None:
+                continue
+            for future in list(pending):
+                key = futures[future]
+                if key in started and now - started[key] > timeout:
+                    # A running call cannot be interrupted; stop waiting for it instead
+                    future.cancel()
+                    pending.discard(future)
+                    scopes[key].abandon()
+                    logging.error(f"Timed out processing {key} after {timeout}s")
+                    yield key, None, f"timed out after {timeout}s"
+    finally:
+        for future, key in futures.items():
+            if not future.done():
+                scopes[key].abandon()
+        executor.shutdown(wait=False, cancel_futures=True)
+
@@ -0,0 +1,90 @@
+import ee
+import logging
+from ee_gateway import ee_gateway
+
+# Property used to map reduceRegions output back to the selected regions
+REGION_INDEX = "region_index"
+
+
+def regions_feature_collection(features):
+    """Wrap GeoJSON features in one ee.FeatureCollection tagged with their position."""
+    return ee.FeatureCollection([
+        ee.Feature(ee.Geometry(feature["geometry"]), {REGION_INDEX: index})
+        for index, feature in enumerate(features)
+    ])
+
+
+def batched_reduce_regions(image, band_names, features, reducer, output_name, scale, tile_scale):
+    """
+    Reduce every band of a multi-band image over every region in one round trip.
+
+    Args:
+        image (ee.Image): One band per interval, named as in band_names.
+        band_names (list): Band names of the image, in interval order.
+        features (list): GeoJSON features of the selected regions.
+        reducer (ee.Reducer): Single-output reducer (e.g. mode, mean).
+        output_name (str): Reducer output name; Earth Engine uses it instead of the
+            band name when the image has a single band.
+        scale (float): Reduction scale in meters.
+        tile_scale (float): Earth Engine tileScale.
+
+    Returns:
+        list: per_region[i] maps band name to the reduced value for features[i].
+    """
+    per_region = []
+    for properties in _reduce_regions(image, features, reducer, scale, tile_scale):
+        if properties is None:
+            per_region.append({})
+        elif len(band_names) == 1:
+            per_region.append({band_names[0]: properties.get(output_name)})
+        else:
+            per_region.append({band: properties.get(band) for band in band_names})
+    logging.info(f"Reduced {len(band_names)} bands over {len(features)} regions in one request")
+    return per_region
+
+
+def batched_reduce_components(image, band_names, features, reducer, output_names, scale, tile_scale):
+    """
+    Like batched_reduce_regions, for reducers with several outputs (e.g. mean and count).
+
+    Earth Engine names the outputs "<band>_<output>" for multi-band images and
+    "<output>" for single-band images; single-output reducers follow the
+    batched_reduce_regions naming.
+
+    Returns:
+        list: per_region[i][band] maps each output name to its value for features[i].
+    """
+    def property_name(band, output):
+        if len(output_names) == 1:
+            return output if len(band_names) == 1 else band
+        return output if len(band_names) == 1 else f"{band}_{output}"
+
+    per_region = []
+    for properties in _reduce_regions(image, features, reducer, scale, tile_scale):
+        if properties is None:
+            per_region.append({})
+            continue
+        per_region.append({
+            band: {output: properties.get(property_name(band, output)) for output in output_names}
+            for band in band_names
+        })
+    logging.info(f"Reduced {len(band_names)} bands over {len(features)} regions in one request")
+    return per_region
+
+
+def _reduce_regions(image, features, reducer, scale, tile_scale):
+    """reduceRegions over the features; returns their result properties in input order (None if absent)."""
+    result = ee_gateway.call(image.reduceRegions(
+        collection=regions_feature_collection(features),
+        reducer=reducer,
+        scale=scale,
+        tileScale=tile_scale
+    ).getInfo)
+
+    per_region = [None for _ in features]
+    for feature in result.get("features", []):
+        properties = feature.get("properties", {})
+        index = properties.get(REGION_INDEX)
+        if index is not None:
+            per_region[index] = properties
+    return per_region
@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+
+# Stages of /api/generate_maps, as used in the "stage" label
+EE_INIT = "ee_init"
+GEOJSON_FILTER = "geojson_filter"
+GET_MAP_ID = "get_map_id"
+REDUCE_REGION = "reduce_region"
+JSON_SERIALIZATION = "json_serialization"
+
+# Stages that talk to Earth Engine and count towards gee_ee_errors_total
+EE_STAGES = (EE_INIT, GET_MAP_ID, REDUCE_REGION)
+
+# Earth Engine calls range from tens of milliseconds to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "gee_stage_seconds", "Time spent per generate_maps stage", ["stage", "dataset"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "gee_request_seconds", "End-to-end request latency", ["endpoint", "dataset"],
+    buckets=LATENCY_BUCKETS
+)
+EE_ERRORS = Counter(
+    "gee_ee_errors_total", "Failed Earth Engine calls", ["stage", "dataset"]
+)
+CACHE_LOOKUPS = Counter(
+    "gee_cache_lookups_total", "Result cache and tile store lookups", ["kind", "outcome"]
+)
+IN_FLIGHT = Gauge(
+    "gee_requests_in_flight", "Requests currently being processed", ["endpoint"],
+    multiprocess_mode="livesum"
+)
+
+
+@contextmanager
+def observe_stage(stage, dataset):
+    """Time a block into gee_stage_seconds and count Earth Engine failures raised from it."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if stage in EE_STAGES:
+            EE_ERRORS.labels(stage, dataset or "unknown").inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage, dataset or "unknown").observe(time.perf_counter() - start)
+
+
+def start_request(endpoint, dataset):
+    """
+    Count a request as in flight and start its latency timer.
+
+    Returns:
+        callable: Ends the request (records the latency, leaves the in-flight
+        count). Only the first call counts, so it can be called both from an
+        error path and from a streamed response's close.
+    """
+    gauge = IN_FLIGHT.labels(endpoint)
+    gauge.inc()
+    start = time.perf_counter()
+    lock = threading.Lock()
+    finished = []
+
+    def finish():
+        with lock:
+            if finished:
+                return
+            finished.append(True)
+        gauge.dec()
+        REQUEST_SECONDS.labels(endpoint, dataset or "unknown").observe(time.perf_counter() - start)
+    return finish
+
+
+def count_cache_lookup(kind, outcome):
+    CACHE_LOOKUPS.labels(kind, outcome).inc()
+
+
+def metrics_payload():
+    """
+    Text exposition of all metrics.
+
+    Under a multi-process server set PROMETHEUS_MULTIPROC_DIR so every worker's
+    samples are aggregated instead of only the one answering the scrape.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from config import Settings
+from metrics import count_cache_lookup
+
+# Kinds of cached values
+TILE_URL = "tile_url"
+STATS = "stats"
+# Composable per-district statistics (e.g. mean and count, class histograms)
+COMPONENTS = "components"
+
+
+def cache_key(**parts):
+    """Canonical SHA-256 of the key parts (dict order and whitespace do not matter)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for tile URLs and statistics.
+
+    Tier one is an in-process LRU, tier two a SQLite file shared by all workers on
+    the host. Entries with ttl=None never expire (historical statistics); tile URLs
+    are stored with a TTL shorter than the Earth Engine map ID lifetime.
+    """
+
+    def __init__(self, db_path, max_entries=10000, tile_ttl=3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.tile_ttl = tile_ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._local = threading.local()
+        self._counters = {}
+
+    def _connection(self):
+        """SQLite connection for the current thread (and process)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_kind ON cache_entries (kind)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, kind, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(kind, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            counters[outcome] += 1
+        count_cache_lookup(kind, outcome)
+
+    def _remember(self, key, value, expires_at):
+        """Insert into the in-process LRU. Caller must hold the lock."""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, kind, key):
+        """Return the cached value or None on a miss / expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                else:
+                    del self._memory[key]
+                    entry = None
+        if entry is not None:
+            self._count(kind, "memory_hits")
+            return value
+
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ? AND kind = ?",
+                (key, kind)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Cache read failed: {str(e)}")
+            row = None
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count(kind, "misses")
+            return None
+
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value, row[1])
+        self._count(kind, "disk_hits")
+        return value
+
+    def set(self, kind, key, value, ttl=None):
+        """Store a JSON-serializable value; ttl=None keeps it until purged."""
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, kind, value, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value), now, expires_at)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Cache write failed: {str(e)}")
+
+    def purge(self, kind=None):
+        """Drop all entries (or all entries of one kind) from both tiers. Returns the disk count."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        with conn:
+            if kind is None:
+                cursor = conn.execute("DELETE FROM cache_entries")
+            else:
+                cursor = conn.execute("DELETE FROM cache_entries WHERE kind = ?", (kind,))
+        logging.info(f"Purged {cursor.rowcount} cache entries (kind={kind})")
+        return cursor.rowcount
+
+    def stats(self):
+        """Hit/miss counters per kind plus the size of both tiers."""
+        with self._lock:
+            counters = {kind: dict(values) for kind, values in self._counters.items()}
+            memory_entries = len(self._memory)
+        try:
+            disk_entries = dict(self._connection().execute(
+                "SELECT kind, COUNT(*) FROM cache_entries GROUP BY kind"
+            ).fetchall())
+        except sqlite3.Error:
+            disk_entries = {}
+        return {
+            "counters": counters,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries
+        }
+
+
+# Shared result cache for the whole process
+result_cache = ResultCache(
+    Settings.CACHE_DB_PATH,
+    max_entries=Settings.CACHE_MAX_ENTRIES,
+    tile_ttl=Settings.CACHE_TILE_TTL
+)
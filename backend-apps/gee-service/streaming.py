@@ -0,0 +1,72 @@
+import json
+import logging
+from metrics import observe_stage, JSON_SERIALIZATION
+
+# Supported progressive formats and their mimetypes
+NDJSON = "ndjson"
+SSE = "sse"
+MIMETYPES = {
+    NDJSON: "application/x-ndjson",
+    SSE: "text/event-stream"
+}
+
+
+def stream_format(data, accept_header):
+    """
+    Pick the streaming format of a generate_maps request.
+
+    The body's "stream" field ("ndjson" or "sse") wins over the Accept header;
+    None means the regular one-shot JSON response.
+    """
+    requested = (data.get("stream") or "").lower()
+    if requested in MIMETYPES:
+        return requested
+    accept = accept_header or ""
+    if MIMETYPES[NDJSON] in accept:
+        return NDJSON
+    if MIMETYPES[SSE] in accept:
+        return SSE
+    return None
+
+
+def encode_event(fmt, event_type, payload):
+    """Serialize one event as an NDJSON line or an SSE message."""
+    body = json.dumps(dict(payload, type=event_type))
+    if fmt == SSE:
+        return f"event: {event_type}\ndata: {body}\n\n"
+    return body + "\n"
+
+
+def stream_layers(processor, selected_regions, fmt, shape_boundaries=None):
+    """
+    Emit each {key, url, stats} as soon as the processor has it, then one
+    summary event with legends, geojson_data, selected_regions, reduction, errors
+    and the timed_out / failed keys.
+
+    shape_boundaries, if given, maps the region GeoJSON to the (geojson_data,
+    simplification report) sent to the client.
+    """
+    try:
+        for result in processor.iter_layers():
+            with observe_stage(JSON_SERIALIZATION, processor.DATASET):
+                event = encode_event(fmt, "layer", result)
+            yield event
+        summary = {
+            "legends": processor.legends(),
+            "geojson_data": processor.filtered_geojson,
+            "selected_regions": selected_regions,
+            "reduction": processor.reduction,
+            "errors": processor.errors,
+            "timed_out": processor.timed_out,
+            "failed": processor.failed
+        }
+        if shape_boundaries is not None:
+            summary["geojson_data"], report = shape_boundaries(processor.filtered_geojson)
+            if report is not None:
+                summary["simplification"] = report
+        with observe_stage(JSON_SERIALIZATION, processor.DATASET):
+            event = encode_event(fmt, "summary", summary)
+        yield event
+    except Exception as e:
+        logging.error(f"Error streaming maps: {str(e)}")
+        yield encode_event(fmt, "error", {"error": str(e)})
@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+import requests
+
+from config import Settings
+
+# Upstream statuses that mean the map ID behind a tile URL has expired
+EXPIRED_STATUSES = (400, 401, 403, 404, 410)
+
+# Seconds a tile's last_access may lag behind its latest read; eviction order only
+# needs to be this precise, so reads within it write nothing
+ACCESS_RESOLUTION = 60.0
+# Queued last_access updates written together in one transaction
+ACCESS_BATCH = 256
+
+
+class TileStore:
+    """
+    Size-bounded tile store in an MBTiles-style SQLite file.
+
+    Tiles use the MBTiles columns (zoom_level, tile_column, tile_row in TMS
+    order, tile_data) plus a layer column, so one file holds every layer. A
+    layers table keeps each layer's current upstream URL template and the recipe
+    needed to mint a new one. When the tiles exceed max_bytes the least recently
+    read ones are evicted.
+
+    Triggers keep the stored bytes in a one-row tile_bytes table, so checking
+    the size is a lookup rather than a scan. Reads update last_access only
+    once it is ACCESS_RESOLUTION seconds stale, and queue the update; queued
+    updates are written in batches of ACCESS_BATCH, after ACCESS_RESOLUTION
+    seconds, or before an eviction.
+    """
+
+    def __init__(self, db_path, max_bytes):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        # (layer, z, x, tms row) -> last read time, not yet written
+        self._access_lock = threading.Lock()
+        self._pending_access = {}
+        self._pending_since = None
+
+    def _connection(self):
+        """SQLite connection for the current thread (and process)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+                INSERT OR IGNORE INTO metadata (name, value) VALUES ('name', 'gee-service tiles');
+                INSERT OR IGNORE INTO metadata (name, value) VALUES ('format', 'png');
+                CREATE TABLE IF NOT EXISTS tiles (
+                    layer TEXT NOT NULL,
+                    zoom_level INTEGER NOT NULL,
+                    tile_column INTEGER NOT NULL,
+                    tile_row INTEGER NOT NULL,
+                    tile_data BLOB NOT NULL,
+                    content_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (layer, zoom_level, tile_column, tile_row)
+                );
+                CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access);
+                CREATE TABLE IF NOT EXISTS tile_bytes (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+                INSERT OR IGNORE INTO tile_bytes (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM tiles;
+                CREATE TRIGGER IF NOT EXISTS tiles_bytes_insert AFTER INSERT ON tiles BEGIN
+                    UPDATE tile_bytes SET total = total + NEW.size WHERE id = 0;
+                END;
+                CREATE TRIGGER IF NOT EXISTS tiles_bytes_update AFTER UPDATE OF size ON tiles BEGIN
+                    UPDATE tile_bytes SET total = total + NEW.size - OLD.size WHERE id = 0;
+                END;
+                CREATE TRIGGER IF NOT EXISTS tiles_bytes_delete AFTER DELETE ON tiles BEGIN
+                    UPDATE tile_bytes SET total = total - OLD.size WHERE id = 0;
+                END;
+                CREATE TABLE IF NOT EXISTS layers (
+                    layer TEXT PRIMARY KEY,
+                    url_template TEXT NOT NULL,
+                    recipe TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _tms_row(z, y):
+        """MBTiles stores rows bottom-up (TMS); the proxy URLs are top-down (XYZ)."""
+        return (1 << z) - 1 - y
+
+    def register_layer(self, layer, url_template, recipe):
+        """Remember (or update) the upstream URL template and re-mint recipe of a layer."""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO layers (layer, url_template, recipe, updated_at) VALUES (?, ?, ?, ?)",
+                (layer, url_template, json.dumps(recipe), time.time())
+            )
+
+    def get_layer(self, layer):
+        """Return (url_template, recipe) or None for unknown layers."""
+        row = self._connection().execute(
+            "SELECT url_template, recipe FROM layers WHERE layer = ?", (layer,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def get_tile(self, layer, z, x, y):
+        """Return (tile_data, content_type) and mark the tile as used, or None."""
+        conn = self._connection()
+        key = (layer, z, x, self._tms_row(z, y))
+        row = conn.execute(
+            "SELECT tile_data, content_type, last_access FROM tiles "
+            "WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[2] >= ACCESS_RESOLUTION:
+            self._record_access(key, now)
+        return bytes(row[0]), row[1]
+
+    def _record_access(self, key, when):
+        """Queue a last_access update; write the queue once it is full or old."""
+        with self._access_lock:
+            self._pending_access[key] = when
+            if self._pending_since is None:
+                self._pending_since = when
+            due = len(self._pending_access) >= ACCESS_BATCH or when - self._pending_since >= ACCESS_RESOLUTION
+        if due:
+            self.flush_access()
+
+    def flush_access(self):
+        """Write the queued last_access updates in one transaction."""
+        with self._access_lock:
+            pending, self._pending_access, self._pending_since = self._pending_access, {}, None
+        if not pending:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE tiles SET last_access = MAX(last_access, ?) "
+                "WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                [(when,) + key for key, when in pending.items()]
+            )
+
+    def total_bytes(self):
+        """Bytes of tile data stored (kept up to date by triggers)."""
+        return self._connection().execute("SELECT total FROM tile_bytes WHERE id = 0").fetchone()[0]
+
+    def put_tile(self, layer, z, x, y, data, content_type):
+        """Store a tile, then evict least recently used tiles above max_bytes."""
+        conn = self._connection()
+        with conn:
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes the old row
+            # without firing the delete trigger that keeps tile_bytes right
+            conn.execute(
+                "INSERT INTO tiles "
+                "(layer, zoom_level, tile_column, tile_row, tile_data, content_type, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (layer, zoom_level, tile_column, tile_row) DO UPDATE SET "
+                "tile_data = excluded.tile_data, content_type = excluded.content_type, "
+                "size = excluded.size, last_access = excluded.last_access",
+                (layer, z, x, self._tms_row(z, y), sqlite3.Binary(data), content_type, len(data), time.time())
+            )
+        self._evict()
+
+    def _evict(self):
+        """Drop the least recently read tiles until the store is back to 90% of max_bytes."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        # Eviction order must see the reads that are still queued
+        self.flush_access()
+        conn = self._connection()
+        target = total - int(self.max_bytes * 0.9)
+        freed, rowids = 0, []
+        for rowid, size in conn.execute("SELECT rowid, size FROM tiles ORDER BY last_access"):
+            rowids.append(rowid)
+            freed += size
+            if freed >= target:
+                break
+        with conn:
+            conn.executemany("DELETE FROM tiles WHERE rowid = ?", [(rowid,) for rowid in rowids])
+        logging.info(f"Evicted {len(rowids)} tiles ({freed} bytes) from {self.db_path}")
+
+    def stats(self):
+        """Tile count, stored bytes and layer count."""
+        conn = self._connection()
+        tiles = conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+        layers = conn.execute("SELECT COUNT(*) FROM layers").fetchone()[0]
+        return {"tiles": tiles, "bytes": self.total_bytes(), "max_bytes": self.max_bytes, "layers": layers}
+
+
+class TileProxy:
+    """
+    Serve tiles from the store, fetching each one upstream only once.
+
+    mint(recipe) must return a fresh upstream URL template for a layer; it is
+    called when the upstream answers a tile request with an expired-map status.
+    Upstream URL templates use {z}/{x}/{y} placeholders, so any XYZ server (a
+    local stand-in included) can be registered as a layer.
+    """
+
+    def __init__(self, store, mint, timeout=20):
+        self.store = store
+        self.mint = mint
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._mint_locks = {}
+        self._mint_locks_lock = threading.Lock()
+
+    def _fetch(self, url_template, z, x, y):
+        url = url_template.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y))
+        return self._session.get(url, timeout=self.timeout)
+
+    def _remint(self, layer, stale_template, recipe):
+        """Mint a new URL template once per layer, even with many tiles failing at the same time."""
+        with self._mint_locks_lock:
+            lock = self._mint_locks.setdefault(layer, threading.Lock())
+        with lock:
+            current = self.store.get_layer(layer)
+            if current is not None and current[0] != stale_template:
+                # Another request already re-minted this layer
+                return current[0]
+            logging.info(f"Re-minting expired map ID for tile layer {layer}")
+            url_template = self.mint(recipe)
+            self.store.register_layer(layer, url_template, recipe)
+            return url_template
+
+    def get_tile(self, layer, z, x, y):
+        """
+        Returns:
+            tuple: (status, tile_data, content_type). status is "hit" or "miss" on
+            success, "unknown_layer" or "upstream_error" otherwise (data is None).
+        """
+        cached = self.store.get_tile(layer, z, x, y)
+        if cached is not None:
+            return "hit", cached[0], cached[1]
+
+        registered = self.store.get_layer(layer)
+        if registered is None:
+            return "unknown_layer", None, None
+        url_template, recipe = registered
+
+        try:
+            response = self._fetch(url_template, z, x, y)
+            if response.status_code in EXPIRED_STATUSES:
+                url_template = self._remint(layer, url_template, recipe)
+                response = self._fetch(url_template, z, x, y)
+        except Exception as e:
+            logging.error(f"Tile fetch failed for {layer}/{z}/{x}/{y}: {str(e)}")
+            return "upstream_error", None, None
+        if response.status_code != 200:
+            logging.warning(f"Upstream answered {response.status_code} for {layer}/{z}/{x}/{y}")
+            return "upstream_error", None, None
+
+        content_type = response.headers.get("Content-Type", "image/png")
+        self.store.put_tile(layer, z, x, y, response.content, content_type)
+        return "miss", response.content, content_type
+
+
+# Shared tile store for the whole process
+tile_store = TileStore(Settings.TILE_DB_PATH, Settings.TILE_CACHE_MAX_BYTES)
@@ -0,0 +1,12 @@
+"""WSGI entry point for production servers: gunicorn -c gunicorn.conf.py wsgi:app"""
+from app import app
+from config import Settings
+from map_helper.boundary_registry import get_boundary_registry
+
+# Runs in the gunicorn master (preload_app), so the simplified boundaries are
+# shared copy-on-write by every worker instead of being built once per worker
+if Settings.PRECOMPUTE_SIMPLIFIED:
+    try:
+        get_boundary_registry(Settings.BOUNDARIES_GEOJSON).precompute_simplified()
+    except Exception as e:
+        print(f"Precomputing simplified boundaries failed: {str(e)}")
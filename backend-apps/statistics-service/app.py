@@ -1,14 +1,44 @@
-from flask import Flask, request, jsonify
-from services.gpr_service import fetch_data_service  # Import the service function
+from flask import Flask, Response, request, jsonify
+from neo4j_utilities.neo4j_config import Config
+from neo4j_utilities.async_neo4j_connection import async_neo4j_connection
+from services.gpr_service import (  # Import the service functions
+    fetch_data_service,
+    fetch_data_service_async,
+    InvalidRequestError
+)
+from services.response_cache import response_cache
 
 app = Flask(__name__)
 
 @app.route("/fetch_data", methods=["POST"])
 def fetch_data():
+    """
+    Responses are cached per normalized request body and data version, and carry an
+    ETag of both; If-None-Match with the current ETag returns 304 without a query.
+    """
     try:
         data = request.json  # Get JSON payload from the client
-        result = fetch_data_service(data)  # Delegate processing to gpr_service
-        return jsonify(result), 200
+        key = response_cache.key(data)
+        version = response_cache.data_version()
+        etag = response_cache.etag(key, version)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            result = response_cache.get(key, version)
+            if result is None:
+                if Config.NEO4J_ASYNC:
+                    # Queries of all in-flight requests overlap on the async driver's event loop
+                    result = async_neo4j_connection.run(fetch_data_service_async(data))
+                else:
+                    result = fetch_data_service(data)  # Delegate processing to gpr_service
+                response_cache.put(key, version, result)
+            response = jsonify(result)
+        response.set_etag(etag, weak=True)
+        # Clients may keep the body but must revalidate, since a load can change it
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    except InvalidRequestError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,55 @@
+"""
+Production server settings for statistics-service.
+
+Run from backend-apps/statistics-service:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Concurrency model
+-----------------
+- Workers are processes (GUNICORN_WORKERS), each running gthread worker
+  threads (GUNICORN_THREADS).
+- Neo4j queries block on the network and release the GIL, so a slow query
+  only occupies its own thread.
+- The Neo4j driver is thread-safe and pools connections.
+- Without NEO4J_ASYNC, a /fetch_data request runs its first query on its own
+  thread and the others (up to 7) on the worker's query pool. The pool has
+  GUNICORN_THREADS x 7 threads unless NEO4J_QUERY_CONCURRENCY is set, so
+  concurrent requests never queue behind each other's queries. A worker then
+  keeps up to GUNICORN_THREADS x 8 sessions open, within the driver's default
+  pool of 100 connections for the default 8 threads.
+- The app is imported in the master (preload_app). The driver is not
+  fork-safe, so every worker creates its own right after fork (see
+  Neo4jConnection).
+- With NEO4J_ASYNC=true, /fetch_data runs its queries on the async driver's
+  event loop (one loop thread per worker, started on first use). Request
+  threads then only wait for results; the sub-queries of all requests share
+  the loop.
+- Each worker keeps its own /fetch_data response cache (RESPONSE_CACHE_SIZE
+  entries). The entries are dropped when the seeding scripts bump the
+  DataVersion counter, which workers re-read every DATA_VERSION_TTL seconds.
+- SIGTERM gives in-flight requests graceful_timeout seconds. Each worker
+  then closes its drivers in worker_exit.
+"""
+import os
+import multiprocessing
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def worker_exit(server, worker):
+    from neo4j_utilities.neo4j_connection import neo4j_connection
+    from neo4j_utilities.async_neo4j_connection import async_neo4j_connection
+    neo4j_connection.close()
+    async_neo4j_connection.close()
@@ -0,0 +1,71 @@
+import os
+import asyncio
+import threading
+from neo4j import AsyncGraphDatabase
+from .neo4j_config import Config
+
+class AsyncNeo4jConnection:
+    """
+    Async Neo4j driver running on one background event loop per process.
+
+    Coroutines using the driver (execute_query and the *_async query functions)
+    must run on that loop; run() submits one from any thread and waits for its
+    result. Requests and their sub-queries then overlap on the loop instead of
+    each holding a thread while its query is in flight.
+    """
+
+    def __init__(self):
+        self.driver = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # The loop thread does not survive fork; workers start their own on first use
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self.driver = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """Start the event loop thread and create the driver on it, once."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="neo4j-async", daemon=True)
+                self._thread.start()
+                self._loop = loop
+                asyncio.run_coroutine_threadsafe(self._create_driver(), loop).result()
+        return self._loop
+
+    async def _create_driver(self):
+        self.driver = AsyncGraphDatabase.driver(
+            Config.NEO4J_URI, auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD)
+        )
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the driver's loop from a synchronous caller and return its result."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+    async def execute_query(self, query: str, parameters: dict = None, db: str = "neo4j"):
+        async with self.driver.session(database=db) as session:
+            result = await session.run(query, parameters)
+            return await result.data()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self.driver is not None:
+            asyncio.run_coroutine_threadsafe(self.driver.close(), loop).result()
+            self.driver = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+# Initialize the async Neo4j connection (the loop and driver start on first use)
+async_neo4j_connection = AsyncNeo4jConnection()
@@ -7,3 +7,14 @@ class Config:
     NEO4J_URI = os.getenv("NEO4J_URI")
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+    # Request threads per worker (the gunicorn gthread count)
+    REQUEST_THREADS = int(os.getenv("GUNICORN_THREADS", "8"))
+    # Threads of the per-worker pool the independent queries of /fetch_data requests
+    # run on; 0 sizes it so all request threads can run all their queries at once
+    NEO4J_QUERY_CONCURRENCY = int(os.getenv("NEO4J_QUERY_CONCURRENCY", "0"))
+    # Serve /fetch_data with the async driver on one event loop per worker
+    NEO4J_ASYNC = os.getenv("NEO4J_ASYNC", "false").lower() == "true"
+    # /fetch_data responses kept per worker (0 disables the cache; ETags still apply)
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    # Seconds between reads of the DataVersion counter, i.e. how stale a response can be after a load
+    DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "30"))
@@ -1,9 +1,21 @@
+import os
 from neo4j import GraphDatabase
 from .neo4j_config import Config
 
 class Neo4jConnection:
     def __init__(self):
-        self.driver = GraphDatabase.driver(Config.NEO4J_URI, auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD))
+        self.driver = self._create_driver()
+        # The driver's pooled sockets must not be shared with forked workers
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    @staticmethod
+    def _create_driver():
+        return GraphDatabase.driver(Config.NEO4J_URI, auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD))
+
+    def _reset_after_fork(self):
+        """Give a freshly forked worker its own driver; the parent keeps using the old one."""
+        self.driver = self._create_driver()
 
     def close(self):
         if self.driver is not None:
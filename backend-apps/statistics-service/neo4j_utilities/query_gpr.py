@@ -1,5 +1,6 @@
 from datetime import datetime
 from neo4j_utilities.neo4j_connection import neo4j_connection
+from neo4j_utilities.async_neo4j_connection import async_neo4j_connection
 
 # Mapping of atmospheric measurement types to their corresponding Neo4j labels.
 MEASUREMENT_TYPES = {
@@ -15,51 +16,39 @@ TARGET_FIELD = {
     "Aerosol": "absorbing_aerosol_index"
 }
 
-def extract_valid_datetime(timestamp_str):
+def to_local_datetime(date_str, range_end=False):
     """
-    Extracts a valid datetime from a timestamp string.
-    It first tries the ISO format "%Y-%m-%dT%H:%M:%S".
-    If that fails and the string appears to be just a year (e.g., "2023"),
-    it will try the "%Y" format.
-    If the string contains a range (" to "), it extracts the first date.
-    Returns None if no valid format is found.
+    Converts a request date into the naive datetime the measurements' start property is
+    compared with. Accepts ISO dates and date-times (e.g. "2019-01-01" or
+    "2019-01-01T00:00:00Z"), a bare year, and a stored timestamp range
+    ("2018-10-16T11:02:44 to 2018-10-23T11:02:44"), of which the first date is used,
+    or the last one with range_end=True.
+    A timezone, if given, is dropped: the stored values are local date-times.
+    Raises ValueError for anything else.
     """
-    try:
-        return datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%S").isoformat()
-    except ValueError:
-        pass
-
-    if len(timestamp_str) == 4 and timestamp_str.isdigit():
-        try:
-            dt = datetime.strptime(timestamp_str, "%Y")
-            return dt.isoformat()
-        except ValueError:
-            pass
-
-    if " to " in timestamp_str:
-        first_date = timestamp_str.split(" to ")[0]
-        try:
-            return datetime.strptime(first_date, "%Y-%m-%dT%H:%M:%S").isoformat()
-        except ValueError:
-            if len(first_date) == 4 and first_date.isdigit():
-                try:
-                    dt = datetime.strptime(first_date, "%Y")
-                    return dt.isoformat()
-                except ValueError:
-                    pass
-            return None
-
-    return None
+    if isinstance(date_str, datetime):
+        return date_str.replace(tzinfo=None)
+    value = str(date_str).strip()
+    if " to " in value:
+        parts = value.split(" to ")
+        value = (parts[-1] if range_end else parts[0]).strip()
+    if len(value) == 4 and value.isdigit():
+        return datetime(int(value), 1, 1)
+    return datetime.fromisoformat(value).replace(tzinfo=None)
 
-def get_measurements(district, start_date, end_date, prediction_target):
-    """
-    Fetches the requested atmospheric measurement for a given district within the provided date range.
-    Returns:
-      - timestamp (ISO string)
-      - id (measurement id)
-      - the target measurement field under its full name (e.g. "CO_column_number_density")
-      - "parameter": the name of the measurement field.
-    """
+def format_timestamp(value):
+    """ISO string of a Neo4j LocalDateTime (a measurement's start property)."""
+    return value.to_native().isoformat()
+
+def _date_range_parameters(district, start_date, end_date):
+    return {
+        "district": district,
+        "start_date": to_local_datetime(start_date),
+        "end_date": to_local_datetime(end_date, range_end=True)
+    }
+
+def _measurements_query(prediction_target):
+    """Cypher query and target field of get_measurements."""
     if prediction_target not in MEASUREMENT_TYPES:
         raise ValueError("Invalid prediction_target. Choose from 'CO', 'Ozone', or 'Aerosol'.")
     measurement_type = MEASUREMENT_TYPES[prediction_target]
@@ -67,34 +56,44 @@ def get_measurements(district, start_date, end_date, prediction_target):
 
     query = f"""
     MATCH (d:District {{name: $district}})-[:HAS_MEASUREMENT]->(m:{measurement_type})
-    WHERE m.timestamp >= $start_date AND m.timestamp <= $end_date
-    RETURN substring(m.timestamp, 0, 19) AS timestamp,
+    WHERE m.start >= $start_date AND m.start <= $end_date
+    RETURN m.start AS timestamp,
            m.measurement_id AS id,
            m.{target_field} AS {target_field}
-    ORDER BY timestamp
+    ORDER BY m.start
     """
-    results = neo4j_connection.execute_query(query, {
-        "district": district,
-        "start_date": start_date,
-        "end_date": end_date
-    })
-    output = []
-    for record in results:
-        ts = extract_valid_datetime(record["timestamp"])
-        if ts:
-            output.append({
-                "timestamp": ts,
-                "id": record["id"],
-                target_field: record[target_field],
-                "parameter": target_field
-            })
-    return output
+    return query, target_field
 
-def get_neighbor_measurements(district, start_date, end_date, prediction_target):
+def _format_measurements(results, target_field):
+    return [
+        {"timestamp": format_timestamp(record["timestamp"]),
+         "id": record["id"],
+         target_field: record[target_field],
+         "parameter": target_field}
+        for record in results
+    ]
+
+def get_measurements(district, start_date, end_date, prediction_target):
     """
-    Fetches atmospheric measurement data for neighboring districts within the given date range.
-    Returns, for each neighbor, the timestamp, id, and target field value.
+    Fetches the requested atmospheric measurement for a given district within the provided date range.
+    Returns:
+      - timestamp (ISO string)
+      - id (measurement id)
+      - the target measurement field under its full name (e.g. "CO_column_number_density")
+      - "parameter": the name of the measurement field.
     """
+    query, target_field = _measurements_query(prediction_target)
+    results = neo4j_connection.execute_query(query, _date_range_parameters(district, start_date, end_date))
+    return _format_measurements(results, target_field)
+
+async def get_measurements_async(district, start_date, end_date, prediction_target):
+    """get_measurements on the async driver."""
+    query, target_field = _measurements_query(prediction_target)
+    results = await async_neo4j_connection.execute_query(query, _date_range_parameters(district, start_date, end_date))
+    return _format_measurements(results, target_field)
+
+def _neighbor_measurements_query(prediction_target):
+    """Cypher query and target field of get_neighbor_measurements."""
     if prediction_target not in MEASUREMENT_TYPES:
         raise ValueError("Invalid prediction_target. Choose from 'CO', 'Ozone', or 'Aerosol'.")
     measurement_type = MEASUREMENT_TYPES[prediction_target]
@@ -102,87 +101,114 @@ def get_neighbor_measurements(district, start_date, end_date, prediction_target)
 
     query = f"""
     MATCH (d:District {{name: $district}})-[:NEIGHBOR_OF]->(n:District)-[:HAS_MEASUREMENT]->(m:{measurement_type})
-    WHERE m.timestamp >= $start_date AND m.timestamp <= $end_date
+    WHERE m.start >= $start_date AND m.start <= $end_date
     RETURN n.name AS neighbor_district,
-           substring(m.timestamp, 0, 19) AS timestamp,
+           m.start AS timestamp,
            m.measurement_id AS id,
            m.{target_field} AS {target_field}
-    ORDER BY n.name, timestamp
+    ORDER BY n.name, m.start
     """
-    results = neo4j_connection.execute_query(query, {
-        "district": district,
-        "start_date": start_date,
-        "end_date": end_date
-    })
+    return query, target_field
+
+def _format_neighbor_measurements(results, target_field):
     neighbors = {}
     for record in results:
-        ts = extract_valid_datetime(record["timestamp"])
-        if ts:
-            entry = {
-                "timestamp": ts,
-                "id": record["id"],
-                target_field: record[target_field],
-                "parameter": target_field
-            }
-            neighbor_name = record["neighbor_district"]
-            if neighbor_name not in neighbors:
-                neighbors[neighbor_name] = []
-            neighbors[neighbor_name].append(entry)
+        entry = {
+            "timestamp": format_timestamp(record["timestamp"]),
+            "id": record["id"],
+            target_field: record[target_field],
+            "parameter": target_field
+        }
+        neighbor_name = record["neighbor_district"]
+        if neighbor_name not in neighbors:
+            neighbors[neighbor_name] = []
+        neighbors[neighbor_name].append(entry)
     return neighbors
 
-def get_landcover_timeseries(district):
+def get_neighbor_measurements(district, start_date, end_date, prediction_target):
     """
-    Retrieves the entire timeseries of landcover data for a given district.
-    Returns only the relevant landcover parameters with descriptive keys.
-    Relevant fields: water, trees, crops, built_area, bare_ground, rangeland.
-    Uses a case-insensitive match on the 'region' property.
+    Fetches atmospheric measurement data for neighboring districts within the given date range.
+    Returns, for each neighbor, the timestamp, id, and target field value.
     """
-    query = """
+    query, target_field = _neighbor_measurements_query(prediction_target)
+    results = neo4j_connection.execute_query(query, _date_range_parameters(district, start_date, end_date))
+    return _format_neighbor_measurements(results, target_field)
+
+async def get_neighbor_measurements_async(district, start_date, end_date, prediction_target):
+    """get_neighbor_measurements on the async driver."""
+    query, target_field = _neighbor_measurements_query(prediction_target)
+    results = await async_neo4j_connection.execute_query(query, _date_range_parameters(district, start_date, end_date))
+    return _format_neighbor_measurements(results, target_field)
+
+LANDCOVER_QUERY = """
     MATCH (l:LandCoverMeasurement)
-    WHERE toLower(l.region) = toLower($district)
-    RETURN l.timestamp AS timestamp,
+    WHERE l.region_lower = toLower($district) AND l.start IS NOT NULL
+    RETURN l.start AS timestamp,
            l.measurement_id AS id,
            { water: l.Water, trees: l.Trees, crops: l.Crops, built_area: l.Built_Area,
              bare_ground: l.Bare_Ground, rangeland: l.Rangeland } AS parameters
-    ORDER BY l.timestamp
+    ORDER BY l.start
     """
-    results = neo4j_connection.execute_query(query, {"district": district})
+
+def _format_landcover(results):
     return [
-        {"timestamp": extract_valid_datetime(record["timestamp"]),
+        {"timestamp": format_timestamp(record["timestamp"]),
          "id": record["id"],
          **record["parameters"]}
-        for record in results if extract_valid_datetime(record["timestamp"])
+        for record in results
     ]
 
-def get_neighbor_landcover_timeseries(district):
+def get_landcover_timeseries(district):
     """
-    Retrieves the entire timeseries of landcover data for all neighboring districts of a given district.
-    Returns a dictionary keyed by neighbor district, each value being a list of measurement objects.
+    Retrieves the entire timeseries of landcover data for a given district.
+    Returns only the relevant landcover parameters with descriptive keys.
+    Relevant fields: water, trees, crops, built_area, bare_ground, rangeland.
+    Uses a case-insensitive match on the region (its indexed lowercase copy, region_lower).
     """
-    query = """
+    results = neo4j_connection.execute_query(LANDCOVER_QUERY, {"district": district})
+    return _format_landcover(results)
+
+async def get_landcover_timeseries_async(district):
+    """get_landcover_timeseries on the async driver."""
+    results = await async_neo4j_connection.execute_query(LANDCOVER_QUERY, {"district": district})
+    return _format_landcover(results)
+
+NEIGHBOR_LANDCOVER_QUERY = """
     MATCH (d:District {name: $district})-[:NEIGHBOR_OF]->(n:District)
     WITH collect(n.name) AS neighborNames
     MATCH (l:LandCoverMeasurement)
-    WHERE l.region IN neighborNames
+    WHERE l.region IN neighborNames AND l.start IS NOT NULL
     RETURN l.region AS neighbor,
-           l.timestamp AS timestamp,
+           l.start AS timestamp,
            l.measurement_id AS id,
            { water: l.Water, trees: l.Trees, crops: l.Crops, built_area: l.Built_Area,
              bare_ground: l.Bare_Ground, rangeland: l.Rangeland } AS parameters
-    ORDER BY l.region, l.timestamp
+    ORDER BY l.region, l.start
     """
-    results = neo4j_connection.execute_query(query, {"district": district})
+
+def _format_neighbor_landcover(results):
     neighbor_landcover = {}
     for record in results:
-        ts = extract_valid_datetime(record["timestamp"])
-        if ts:
-            entry = {
-                "timestamp": ts,
-                "id": record["id"],
-                **record["parameters"]
-            }
-            neighbor = record["neighbor"]
-            if neighbor not in neighbor_landcover:
-                neighbor_landcover[neighbor] = []
-            neighbor_landcover[neighbor].append(entry)
+        entry = {
+            "timestamp": format_timestamp(record["timestamp"]),
+            "id": record["id"],
+            **record["parameters"]
+        }
+        neighbor = record["neighbor"]
+        if neighbor not in neighbor_landcover:
+            neighbor_landcover[neighbor] = []
+        neighbor_landcover[neighbor].append(entry)
     return neighbor_landcover
+
+def get_neighbor_landcover_timeseries(district):
+    """
+    Retrieves the entire timeseries of landcover data for all neighboring districts of a given district.
+    Returns a dictionary keyed by neighbor district, each value being a list of measurement objects.
+    """
+    results = neo4j_connection.execute_query(NEIGHBOR_LANDCOVER_QUERY, {"district": district})
+    return _format_neighbor_landcover(results)
+
+async def get_neighbor_landcover_timeseries_async(district):
+    """get_neighbor_landcover_timeseries on the async driver."""
+    results = await async_neo4j_connection.execute_query(NEIGHBOR_LANDCOVER_QUERY, {"district": district})
+    return _format_neighbor_landcover(results)
@@ -1,10 +1,135 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from neo4j_utilities.neo4j_config import Config
 from neo4j_utilities.query_gpr import (
     get_measurements,
     get_neighbor_measurements,
     get_landcover_timeseries,
-    get_neighbor_landcover_timeseries
+    get_neighbor_landcover_timeseries,
+    get_measurements_async,
+    get_neighbor_measurements_async,
+    get_landcover_timeseries_async,
+    get_neighbor_landcover_timeseries_async,
+    to_local_datetime
 )
 
+ATMOSPHERIC_TYPES = ["CO", "Ozone", "Aerosol"]
+
+# Most queries one request makes: own and neighbour measurements per atmospheric
+# type, plus own and neighbour landcover
+MAX_QUERIES_PER_REQUEST = 2 * len(ATMOSPHERIC_TYPES) + 2
+
+
+def query_pool_size():
+    """
+    Threads of the query pool: NEO4J_QUERY_CONCURRENCY, or by default enough for
+    every request thread of the worker to run all its queries at once. Each request
+    runs one query itself and hands the others to the pool, so requests never wait
+    behind each other's queries.
+    """
+    return Config.NEO4J_QUERY_CONCURRENCY or Config.REQUEST_THREADS * (MAX_QUERIES_PER_REQUEST - 1)
+
+
+def _create_executor():
+    # Threads start on demand, so an idle worker does not hold the full pool
+    return ThreadPoolExecutor(max_workers=query_pool_size(), thread_name_prefix="neo4j-query")
+
+
+# Pool for the independent queries of the worker's requests; the driver is thread-safe
+_executor = _create_executor()
+
+
+def _reset_after_fork():
+    """Forked workers must not inherit the parent's pool threads."""
+    global _executor
+    _executor = _create_executor()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class InvalidRequestError(ValueError):
+    """A /fetch_data body that cannot be answered as given; reported to the client as a 400."""
+
+def parse_date_range(data):
+    """
+    Validates start_date and end_date of a request.
+
+    Returns:
+      - (start, end) naive datetimes.
+
+    Raises:
+      - InvalidRequestError: If a date is missing or not in a supported format.
+    """
+    dates = []
+    for field in ("start_date", "end_date"):
+        if data.get(field) in (None, ""):
+            raise InvalidRequestError(f"{field} is required")
+        try:
+            dates.append(to_local_datetime(data[field], range_end=field == "end_date"))
+        except (TypeError, ValueError):
+            raise InvalidRequestError(
+                f"Invalid {field} {data[field]!r}: expected an ISO date or date-time "
+                "(e.g. 2019-01-01 or 2019-01-01T00:00:00), a year, or a timestamp range"
+            )
+    return tuple(dates)
+
+def _query_plan(data):
+    """
+    The independent queries a request needs.
+
+    Returns:
+      - district (str)
+      - atm_types (list): Atmospheric types in output order, prediction_target first.
+      - queries (list): (slot, sync function, async function, args) tuples; slot is
+          ("atmosphere", type), ("neighbour_atmosphere", type), ("landcover",) or
+          ("neighbour_landcover",).
+    """
+    district = data["district"]
+    start_date, end_date = parse_date_range(data)
+    prediction_target = data["prediction_target"]
+    neighbor_influence = data.get("neighbor_influence", False)
+    landcover_influence = data.get("landcover_influence", False)
+    atmospheric_influence = data.get("atmospheric_influence", False)
+
+    atm_types = [prediction_target]
+    if atmospheric_influence:
+        # Additional atmospheric measurements (those not equal to prediction_target).
+        atm_types += [t for t in ATMOSPHERIC_TYPES if t != prediction_target]
+    queries = []
+    for atm_type in atm_types:
+        queries.append((("atmosphere", atm_type), get_measurements, get_measurements_async,
+                        (district, start_date, end_date, atm_type)))
+        if neighbor_influence:
+            queries.append((("neighbour_atmosphere", atm_type), get_neighbor_measurements,
+                            get_neighbor_measurements_async, (district, start_date, end_date, atm_type)))
+    if landcover_influence:
+        queries.append((("landcover",), get_landcover_timeseries, get_landcover_timeseries_async, (district,)))
+        if neighbor_influence:
+            queries.append((("neighbour_landcover",), get_neighbor_landcover_timeseries,
+                            get_neighbor_landcover_timeseries_async, (district,)))
+    return district, atm_types, queries
+
+def _assemble(district, atm_types, results):
+    """Build the response dict from the query results keyed by slot."""
+    # Build atmosphere output as a dictionary keyed by measurement type.
+    atmosphere = {atm_type: results[("atmosphere", atm_type)] for atm_type in atm_types}
+
+    # Build neighbour atmosphere: a dictionary keyed by neighbor district.
+    neighbour_atmosphere = {}
+    for atm_type in atm_types:
+        for neighbor, meas_list in results.get(("neighbour_atmosphere", atm_type), {}).items():
+            neighbour_atmosphere.setdefault(neighbor, {})[atm_type] = meas_list
+
+    return {
+        "district": district,
+        "landcover": results.get(("landcover",)),
+        "atmosphere": atmosphere,
+        "neighbour_landcover": results.get(("neighbour_landcover",)),
+        "neighbour_atmosphere": neighbour_atmosphere
+    }
+
 def fetch_data_service(data):
     """
     Fetches atmospheric and landcover data for a given district based on input parameters.
@@ -28,49 +153,21 @@ def fetch_data_service(data):
         "neighbour_atmosphere": <dictionary keyed by neighbor district, each with atmospheric types>
       }
     """
-    district = data["district"]
-    start_date = data["start_date"]
-    end_date = data["end_date"]
-    prediction_target = data["prediction_target"]
-    neighbor_influence = data.get("neighbor_influence", False)
-    landcover_influence = data.get("landcover_influence", False)
-    atmospheric_influence = data.get("atmospheric_influence", False)
-    
-    # Fetch primary atmospheric measurements.
-    primary_measurements = get_measurements(district, start_date, end_date, prediction_target)
-    primary_neighbor = (get_neighbor_measurements(district, start_date, end_date, prediction_target)
-                        if neighbor_influence else {})
-
-    # Build atmosphere output as a dictionary keyed by measurement type.
-    atmosphere = {prediction_target: primary_measurements}
-    
-    # Build neighbour atmosphere: a dictionary keyed by neighbor district.
-    neighbour_atmosphere = {}
-    if neighbor_influence:
-        for neighbor, meas_list in primary_neighbor.items():
-            neighbour_atmosphere.setdefault(neighbor, {})[prediction_target] = meas_list
-
-    # If atmospheric_influence is true, fetch additional atmospheric measurements.
-    if atmospheric_influence:
-        all_types = ["CO", "Ozone", "Aerosol"]
-        additional_types = [t for t in all_types if t != prediction_target]
-        for atm_type in additional_types:
-            atm_measurements = get_measurements(district, start_date, end_date, atm_type)
-            atmosphere[atm_type] = atm_measurements
-            if neighbor_influence:
-                add_neigh = get_neighbor_measurements(district, start_date, end_date, atm_type)
-                for neighbor, meas_list in add_neigh.items():
-                    neighbour_atmosphere.setdefault(neighbor, {})[atm_type] = meas_list
-
-    # Fetch landcover data if enabled.
-    landcover = get_landcover_timeseries(district) if landcover_influence else None
-    neighbour_landcover = (get_neighbor_landcover_timeseries(district)
-                           if (landcover_influence and neighbor_influence) else None)
+    district, atm_types, queries = _query_plan(data)
+    # The queries are independent, so they all run at once and the request takes
+    # about as long as the slowest one instead of their sum. The first one runs on
+    # the request thread, which would otherwise only wait.
+    (first_slot, first_func, _, first_args), rest = queries[0], queries[1:]
+    futures = {slot: _executor.submit(func, *args) for slot, func, _, args in rest}
+    results = {first_slot: first_func(*first_args)}
+    results.update({slot: future.result() for slot, future in futures.items()})
+    return _assemble(district, atm_types, results)
 
-    return {
-        "district": district,
-        "landcover": landcover,
-        "atmosphere": atmosphere,
-        "neighbour_landcover": neighbour_landcover,
-        "neighbour_atmosphere": neighbour_atmosphere
-    }
+async def fetch_data_service_async(data):
+    """
+    fetch_data_service on the async driver: the queries overlap on the event loop
+    instead of each taking a pool thread. Same input and output.
+    """
+    district, atm_types, queries = _query_plan(data)
+    values = await asyncio.gather(*(func(*args) for _, _, func, args in queries))
+    return _assemble(district, atm_types, {slot: value for (slot, _, _, _), value in zip(queries, values)})
@@ -0,0 +1,105 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from neo4j_utilities.neo4j_config import Config
+from neo4j_utilities.neo4j_connection import neo4j_connection
+from services.gpr_service import parse_date_range
+
+# Counter node the seeding scripts increment after every load (see
+# data-pipeline/database-seeding/data_version.py).
+DATA_VERSION_NAME = "graph"
+
+DATA_VERSION_QUERY = """
+    OPTIONAL MATCH (v:DataVersion {name: $name})
+    RETURN coalesce(v.version, 0) AS version
+    """
+
+def normalize_request(data):
+    """
+    The fields of a /fetch_data body that determine its response, in canonical form:
+    dates as ISO date-times, flags as booleans with their defaults, unknown keys dropped.
+    Raises InvalidRequestError for invalid dates.
+    """
+    start_date, end_date = parse_date_range(data)
+    return {
+        "district": data["district"],
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "prediction_target": data["prediction_target"],
+        "neighbor_influence": bool(data.get("neighbor_influence", False)),
+        "landcover_influence": bool(data.get("landcover_influence", False)),
+        "atmospheric_influence": bool(data.get("atmospheric_influence", False))
+    }
+
+class ResponseCache:
+    """
+    In-process LRU of /fetch_data responses, one per worker.
+
+    Entries are keyed by the normalized request body and tagged with the graph's
+    data version. A load bumps the version, which turns every older entry into a
+    miss. The version itself is read from Neo4j at most once per version_ttl
+    seconds, so a response can be up to that old after a load.
+    """
+
+    def __init__(self, max_entries=256, version_ttl=30):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def key(self, data):
+        """Canonical SHA-256 of the normalized request body."""
+        canonical = json.dumps(normalize_request(data), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def data_version(self):
+        """Current data version, re-read from Neo4j once version_ttl has passed."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.version_ttl:
+                return self._version
+        records = neo4j_connection.execute_query(DATA_VERSION_QUERY, {"name": DATA_VERSION_NAME})
+        version = records[0]["version"] if records else 0
+        with self._lock:
+            if version != self._version and self._version is not None:
+                logging.info(f"Data version changed from {self._version} to {version}")
+            self._version = version
+            self._version_checked_at = now
+        return version
+
+    @staticmethod
+    def etag(key, version):
+        """ETag of a response: changes with the request and with the data version."""
+        return f"{version}-{key[:32]}"
+
+    def get(self, key, version):
+        """Return the cached response for the key at this data version, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != version:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Initialize the response cache
+response_cache = ResponseCache(
+    max_entries=Config.RESPONSE_CACHE_SIZE,
+    version_ttl=Config.DATA_VERSION_TTL
+)
@@ -0,0 +1,79 @@
+"""
+pytest setup for statistics-service.
+
+Run from backend-apps/statistics-service:
+    python -m pytest tests
+
+The tests replace the drivers' execute_query with in-memory fakes, so they need
+no running Neo4j.
+"""
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+
+import pytest
+from neo4j.time import DateTime
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+# Config reads the environment at import time; the drivers never connect in the tests
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USERNAME", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "test")
+
+from neo4j_utilities.query_gpr import TARGET_FIELD  # noqa: E402
+
+
+class FakeGraph:
+    """
+    Answers the query_gpr queries with records derived from the label and the
+    district, after `latency` seconds (plus up to `jitter`, so concurrent
+    queries finish in shuffled order). Counts the queries it answered.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, version=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.version = version
+        self.queries = 0
+        self._random = random.Random(0)
+
+    def _records(self, query, parameters):
+        if "DataVersion" in query:
+            return [{"version": self.version}]
+        self.queries += 1
+        label = re.search(r":(\w*Measurement)\b", query).group(1)
+        district = (parameters or {}).get("district", "")
+        return [{
+            "timestamp": DateTime(2019, month, 1),
+            "id": f"{label}-{district}-{month}",
+            "neighbor_district": f"{district} neighbour {month % 2}",
+            "neighbor": f"{district} neighbour {month % 2}",
+            "parameters": {"Trees": month / 10},
+            **{field: month * 0.01 for field in TARGET_FIELD.values()}
+        } for month in (1, 2, 3)]
+
+    def _delay(self):
+        return self.latency + self._random.uniform(0, self.jitter)
+
+    def execute_query(self, query, parameters=None, db="neo4j"):
+        time.sleep(self._delay())
+        return self._records(query, parameters)
+
+    async def execute_query_async(self, query, parameters=None, db="neo4j"):
+        await asyncio.sleep(self._delay())
+        return self._records(query, parameters)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    from neo4j_utilities.neo4j_connection import neo4j_connection
+    from neo4j_utilities.async_neo4j_connection import async_neo4j_connection
+    fake = FakeGraph()
+    monkeypatch.setattr(neo4j_connection, "execute_query", fake.execute_query)
+    monkeypatch.setattr(async_neo4j_connection, "execute_query", fake.execute_query_async)
+    return fake
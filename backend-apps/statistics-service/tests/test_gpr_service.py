@@ -0,0 +1,67 @@
+"""Concurrent query execution of fetch_data_service (services/gpr_service.py)."""
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import gpr_service
+from services.gpr_service import (
+    fetch_data_service, fetch_data_service_async, query_pool_size, MAX_QUERIES_PER_REQUEST
+)
+
+ALL_FLAGS = {
+    "district": "Pune",
+    "start_date": "2019-01-01",
+    "end_date": "2019-12-31",
+    "prediction_target": "Ozone",
+    "neighbor_influence": True,
+    "landcover_influence": True,
+    "atmospheric_influence": True
+}
+
+
+def serial(data):
+    """The queries one after another on the calling thread, as before the pool."""
+    district, atm_types, queries = gpr_service._query_plan(data)
+    return gpr_service._assemble(district, atm_types, {slot: func(*args) for slot, func, _, args in queries})
+
+
+@pytest.mark.parametrize("flags", [
+    {},
+    {"neighbor_influence": False},
+    {"landcover_influence": False, "atmospheric_influence": False},
+    {"prediction_target": "CO", "neighbor_influence": False, "landcover_influence": False},
+])
+def test_concurrent_and_async_results_match_serial(graph, flags):
+    graph.jitter = 0.01
+    data = dict(ALL_FLAGS, **flags)
+    expected = serial(data)
+    assert fetch_data_service(data) == expected
+    assert asyncio.run(fetch_data_service_async(data)) == expected
+    assert list(expected["atmosphere"]) == [data["prediction_target"]] + (
+        [t for t in gpr_service.ATMOSPHERIC_TYPES if t != data["prediction_target"]]
+        if data["atmospheric_influence"] else []
+    )
+
+
+def test_all_flags_make_the_most_queries(graph):
+    fetch_data_service(ALL_FLAGS)
+    assert graph.queries == MAX_QUERIES_PER_REQUEST
+
+
+def test_default_pool_fits_every_request_thread():
+    assert query_pool_size() == gpr_service.Config.REQUEST_THREADS * (MAX_QUERIES_PER_REQUEST - 1)
+
+
+def test_concurrent_requests_do_not_queue_behind_each_other(graph):
+    graph.latency = 0.1
+    threads = gpr_service.Config.REQUEST_THREADS
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as requests:
+        list(requests.map(fetch_data_service, [ALL_FLAGS] * threads))
+    elapsed = time.monotonic() - started
+    assert graph.queries == threads * MAX_QUERIES_PER_REQUEST
+    # Every query of every request in flight at once: about one query latency. The
+    # old shared pool of 8 threads took threads * 8 queries / 8 = 0.8 s here.
+    assert elapsed < 0.4
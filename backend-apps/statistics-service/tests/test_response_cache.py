@@ -0,0 +1,149 @@
+"""/fetch_data response cache (services/response_cache.py): keys, data versions and revalidation."""
+import pytest
+
+import app as app_module
+from services import response_cache as response_cache_module
+from services.response_cache import ResponseCache
+from services.gpr_service import InvalidRequestError
+
+REQUEST = {
+    "district": "Pune",
+    "start_date": "2019-01-01",
+    "end_date": "2019-12-31",
+    "prediction_target": "Ozone"
+}
+
+
+class Clock:
+    """Stands in for the time module of response_cache, advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def client(graph, monkeypatch):
+    """Test client whose response cache re-reads the data version on every request."""
+    monkeypatch.setattr(app_module, "response_cache", ResponseCache(max_entries=8, version_ttl=0))
+    monkeypatch.setattr(app_module.Config, "NEO4J_ASYNC", False)
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("variant", [
+    {"start_date": "2019-01-01T00:00:00"},
+    {"neighbor_influence": False, "atmospheric_influence": 0},
+    {"unused": "field"},
+])
+def test_equivalent_requests_share_a_key(variant):
+    cache = ResponseCache()
+    assert cache.key(dict(REQUEST, **variant)) == cache.key(REQUEST)
+
+
+@pytest.mark.parametrize("variant", [
+    {"district": "Nashik"},
+    {"end_date": "2019-06-30"},
+    {"prediction_target": "CO"},
+    {"landcover_influence": True},
+])
+def test_different_requests_have_different_keys(variant):
+    cache = ResponseCache()
+    assert cache.key(dict(REQUEST, **variant)) != cache.key(REQUEST)
+
+
+def test_invalid_dates_are_rejected():
+    with pytest.raises(InvalidRequestError):
+        ResponseCache().key(dict(REQUEST, start_date="yesterday"))
+
+
+def test_entries_of_older_versions_are_misses():
+    cache = ResponseCache()
+    key = cache.key(REQUEST)
+    cache.put(key, 1, {"rows": 1})
+    assert cache.get(key, 1) == {"rows": 1}
+    assert cache.get(key, 2) is None
+    # The stale entry is dropped, not kept for the old version
+    assert cache.get(key, 1) is None
+
+
+def test_lru_bound():
+    cache = ResponseCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, 1, key)
+    cache.get("a", 1)
+    cache.put("c", 1, "c")
+    assert [cache.get(key, 1) for key in ("a", "b", "c")] == ["a", None, "c"]
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(max_entries=0)
+    cache.put("a", 1, "a")
+    assert cache.get("a", 1) is None
+
+
+def test_data_version_is_read_once_per_ttl(graph, clock, monkeypatch):
+    reads = []
+    execute_query = response_cache_module.neo4j_connection.execute_query
+    monkeypatch.setattr(response_cache_module.neo4j_connection, "execute_query",
+                        lambda *args, **kwargs: reads.append(1) or execute_query(*args, **kwargs))
+    cache = ResponseCache(version_ttl=30)
+    assert cache.data_version() == 1
+    graph.version = 2
+    clock.now += 29
+    assert cache.data_version() == 1
+    clock.now += 1
+    assert cache.data_version() == 2
+    assert len(reads) == 2
+
+
+def test_missing_version_node_is_version_zero(monkeypatch):
+    monkeypatch.setattr(response_cache_module.neo4j_connection, "execute_query", lambda *args, **kwargs: [])
+    assert ResponseCache().data_version() == 0
+
+
+def test_repeated_request_is_served_from_cache(client, graph):
+    first = client.post("/fetch_data", json=REQUEST)
+    queries = graph.queries
+    assert first.status_code == 200 and queries > 0
+    second = client.post("/fetch_data", json=dict(REQUEST, start_date="2019-01-01T00:00:00"))
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.headers["Cache-Control"] == "no-cache"
+    assert graph.queries == queries
+
+
+def test_matching_etag_returns_304_without_queries(client, graph):
+    etag = client.post("/fetch_data", json=REQUEST).headers["ETag"]
+    queries = graph.queries
+    response = client.post("/fetch_data", json=REQUEST, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    assert graph.queries == queries
+
+
+def test_data_load_invalidates_cache_and_etag(client, graph):
+    first = client.post("/fetch_data", json=REQUEST)
+    queries = graph.queries
+    graph.version = 2
+    response = client.post("/fetch_data", json=REQUEST, headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert graph.queries == 2 * queries
+
+
+def test_invalid_request_is_400(client, graph):
+    response = client.post("/fetch_data", json=dict(REQUEST, end_date="tomorrow"))
+    assert response.status_code == 400
+    assert "end_date" in response.get_json()["error"]
+    assert graph.queries == 0
@@ -0,0 +1,21 @@
+from neo4j_connection import Neo4jConnection
+
+# Counter node statistics-service tags its cached /fetch_data responses with
+# (see backend-apps/statistics-service/services/response_cache.py).
+DATA_VERSION_NAME = "graph"
+
+def bump_data_version(conn: Neo4jConnection) -> int:
+    """
+    Increments the graph's data version after a load, so that cached responses built
+    from the previous data are no longer served. Returns the new version.
+    """
+    query = """
+    MERGE (v:DataVersion {name: $name})
+    SET v.version = coalesce(v.version, 0) + 1,
+        v.updated_at = datetime()
+    RETURN v.version AS version
+    """
+    records = conn.query(query, parameters={"name": DATA_VERSION_NAME})
+    version = records[0]["version"]
+    print(f"Data version is now {version}")
+    return version
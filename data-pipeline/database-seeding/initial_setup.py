@@ -1,6 +1,7 @@
 import csv
 import json
 from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
 from models import District
 
 def load_districts(file_path: str):
@@ -21,13 +22,12 @@ def load_districts(file_path: str):
 
 def create_district_node(conn: Neo4jConnection, district: District):
     query = """
-    CREATE (d:District {
-      district_id: $district_id,
-      name: $name,
-      centroid_latitude: $centroid_latitude,
-      centroid_longitude: $centroid_longitude,
-      area: $area
-    })
+    MERGE (d:District {district_id: $district_id})
+    SET d.name = $name,
+        d.name_lower = toLower($name),
+        d.centroid_latitude = $centroid_latitude,
+        d.centroid_longitude = $centroid_longitude,
+        d.area = $area
     """
     params = {
         "district_id": district.district_id,
@@ -63,6 +63,9 @@ def main():
     # Create NEIGHBOR_OF relationships based on JSON data.
     create_neighbour_relationships_from_json(conn, "../../boundaries/datasets/district_neighbours.json")
 
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
     # Close the connection.
     conn.close()
 
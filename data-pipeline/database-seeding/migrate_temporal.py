@@ -0,0 +1,68 @@
+from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
+from schema import INDEXES, apply_indexes
+from temporal import MEASUREMENT_LABELS, parse_interval
+
+# Nodes read and updated per transaction.
+BATCH_SIZE = 5000
+
+def create_temporal_indexes(conn: Neo4jConnection):
+    """
+    Creates the range indexes on start and end (declared in schema.py) for every measurement
+    label, so that time-window filters become index range scans. Safe to rerun.
+    """
+    apply_indexes(conn, [index for index in INDEXES if index[2] in (("start",), ("end",))])
+
+def migrate_label(conn: Neo4jConnection, label: str):
+    """
+    Sets the native start/end properties of every node of a label that does not have them yet,
+    parsed from its timestamp string. Nodes whose timestamp cannot be parsed are reported and
+    left unchanged. Returns the number of nodes updated.
+    """
+    read_query = f"""
+    MATCH (m:{label})
+    WHERE m.start IS NULL AND m.timestamp IS NOT NULL AND NOT elementId(m) IN $skipped
+    RETURN elementId(m) AS node_id, m.timestamp AS timestamp
+    LIMIT $batch_size
+    """
+    write_query = """
+    UNWIND $rows AS row
+    MATCH (m) WHERE elementId(m) = row.node_id
+    SET m.start = row.start, m.end = row.end
+    """
+    updated = 0
+    skipped = []
+    while True:
+        records = conn.query(read_query, parameters={"skipped": skipped, "batch_size": BATCH_SIZE})
+        if not records:
+            break
+        rows = []
+        for record in records:
+            start, end = parse_interval(record["timestamp"])
+            if start is None:
+                print(f"Skipping {label} node with unparseable timestamp '{record['timestamp']}'")
+                skipped.append(record["node_id"])
+                continue
+            rows.append({"node_id": record["node_id"], "start": start, "end": end})
+        if rows:
+            conn.query(write_query, parameters={"rows": rows})
+            updated += len(rows)
+    return updated
+
+def main():
+    # Connect to Neo4j.
+    conn = Neo4jConnection()
+
+    create_temporal_indexes(conn)
+    for label in MEASUREMENT_LABELS:
+        updated = migrate_label(conn, label)
+        print(f"{label}: set start/end on {updated} nodes")
+
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
+    # Close the connection.
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,9 @@ class Neo4jConnection:
         with self.driver.session(database=db) as session:
             result = session.run(query, parameters)
             return result.data()
+
+    def explain(self, query: str, parameters: dict = None, db: str = "neo4j"):
+        """Plans a query without running it and returns the plan (a nested dict)."""
+        with self.driver.session(database=db) as session:
+            result = session.run(f"EXPLAIN {query}", parameters)
+            return result.consume().plan
@@ -0,0 +1,130 @@
+from datetime import datetime
+from neo4j_connection import Neo4jConnection
+from temporal import MEASUREMENT_LABELS
+
+# Uniqueness constraints as (name, label, property). Each one is backed by an index,
+# so lookups on these properties (the MERGE targets) are index seeks. District names
+# are not unique keys (initial_setup merges on district_id), so name gets a plain index.
+CONSTRAINTS = [
+    ("district_district_id_unique", "District", "district_id"),
+    ("dataset_dataset_id_unique", "Dataset", "dataset_id"),
+    ("dataversion_name_unique", "DataVersion", "name"),
+] + [(f"{label.lower()}_measurement_id_unique", label, "measurement_id") for label in MEASUREMENT_LABELS]
+
+# Lowercase copies of names matched case-insensitively, as (label, source, target).
+# Filtering on toLower(n.source) cannot use an index; n.target = toLower($value) can.
+NORMALIZED_PROPERTIES = [
+    ("District", "name", "name_lower"),
+] + [(label, "region", "region_lower") for label in MEASUREMENT_LABELS]
+
+# Range indexes as (name, label, properties). District.name anchors the statistics-service
+# queries ({name: $district}); region serves the HAS_MEASUREMENT linking and the
+# neighbour landcover lookup; start/end serve time-window scans.
+INDEXES = [
+    ("district_name", "District", ("name",)),
+    ("district_name_lower", "District", ("name_lower",)),
+]
+for label in MEASUREMENT_LABELS:
+    INDEXES += [
+        (f"{label.lower()}_region", label, ("region",)),
+        (f"{label.lower()}_region_lower", label, ("region_lower",)),
+        (f"{label.lower()}_start", label, ("start",)),
+        (f"{label.lower()}_end", label, ("end",)),
+    ]
+
+# Plan operators that mean a query reads every node of a label (or the whole graph).
+SCAN_OPERATORS = {"NodeByLabelScan", "AllNodesScan"}
+
+# Lookups the seeding scripts and statistics-service run, as (description, query,
+# parameters); verify_index_usage checks none of them scans a label. The measurement
+# checks are the queries of statistics-service's query_gpr, with their return clauses trimmed.
+_WINDOW = {"district": "Pune", "start_date": datetime(2019, 1, 1), "end_date": datetime(2019, 12, 31)}
+INDEX_CHECKS = [
+    ("District by name", "MATCH (d:District {name: $district}) RETURN d", _WINDOW),
+    ("Measurement by id",
+     "MATCH (m:CO_Measurement {measurement_id: $measurement_id}) RETURN m", {"measurement_id": "id"}),
+    ("get_measurements",
+     "MATCH (d:District {name: $district})-[:HAS_MEASUREMENT]->(m:CO_Measurement) "
+     "WHERE m.start >= $start_date AND m.start <= $end_date "
+     "RETURN m.start AS timestamp, m.measurement_id AS id ORDER BY m.start", _WINDOW),
+    ("get_neighbor_measurements",
+     "MATCH (d:District {name: $district})-[:NEIGHBOR_OF]->(n:District)-[:HAS_MEASUREMENT]->(m:CO_Measurement) "
+     "WHERE m.start >= $start_date AND m.start <= $end_date "
+     "RETURN n.name AS neighbor_district, m.start AS timestamp ORDER BY n.name, m.start", _WINDOW),
+    ("get_landcover_timeseries",
+     "MATCH (l:LandCoverMeasurement) WHERE l.region_lower = toLower($district) AND l.start IS NOT NULL "
+     "RETURN l.start AS timestamp ORDER BY l.start", _WINDOW),
+    ("get_neighbor_landcover_timeseries",
+     "MATCH (d:District {name: $district})-[:NEIGHBOR_OF]->(n:District) WITH collect(n.name) AS neighborNames "
+     "MATCH (l:LandCoverMeasurement) WHERE l.region IN neighborNames AND l.start IS NOT NULL "
+     "RETURN l.region AS neighbor, l.start AS timestamp ORDER BY l.region, l.start", _WINDOW),
+]
+
+def apply_constraints(conn: Neo4jConnection, constraints=CONSTRAINTS):
+    """
+    Creates the uniqueness constraints. IF NOT EXISTS makes this idempotent; creating one
+    fails if existing nodes already hold duplicate values, which then need cleaning up first.
+    """
+    for name, label, prop in constraints:
+        conn.query(f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+
+def apply_indexes(conn: Neo4jConnection, indexes=INDEXES):
+    """Creates the range indexes (idempotent) and waits until they are online."""
+    for name, label, props in indexes:
+        columns = ", ".join(f"n.{prop}" for prop in props)
+        conn.query(f"CREATE RANGE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({columns})")
+    conn.query("CALL db.awaitIndexes()")
+
+def backfill_normalized_properties(conn: Neo4jConnection, normalized=NORMALIZED_PROPERTIES):
+    """
+    Sets the lowercase copies on nodes where they are missing or stale. Only those nodes
+    are touched, in batches, so rerunning after a load is cheap.
+    """
+    for label, source, target in normalized:
+        conn.query(f"""
+        MATCH (n:{label})
+        WHERE n.{source} IS NOT NULL AND (n.{target} IS NULL OR n.{target} <> toLower(n.{source}))
+        CALL {{ WITH n SET n.{target} = toLower(n.{source}) }} IN TRANSACTIONS OF 10000 ROWS
+        """)
+
+def plan_operators(plan):
+    """Names of all operators in an EXPLAIN plan, without the runtime suffix (e.g. "@neo4j")."""
+    operators = [plan["operatorType"].split("@")[0]]
+    for child in plan.get("children", []):
+        operators += plan_operators(child)
+    return operators
+
+def verify_index_usage(conn: Neo4jConnection, checks=INDEX_CHECKS):
+    """
+    EXPLAINs each check query and reports whether the planner uses an index for it.
+
+    Returns:
+        list: (description, uses_index, operators) per check; uses_index is False when
+        the plan contains a label or all-nodes scan.
+    """
+    report = []
+    for description, query, parameters in checks:
+        operators = plan_operators(conn.explain(query, parameters=parameters))
+        report.append((description, not SCAN_OPERATORS.intersection(operators), operators))
+    return report
+
+def main():
+    # Connect to Neo4j.
+    conn = Neo4jConnection()
+
+    apply_constraints(conn)
+    backfill_normalized_properties(conn)
+    apply_indexes(conn)
+
+    failures = 0
+    for description, uses_index, operators in verify_index_usage(conn):
+        print(f"{'OK  ' if uses_index else 'SCAN'} {description}: {' -> '.join(operators)}")
+        failures += not uses_index
+
+    # Close the connection.
+    conn.close()
+    if failures:
+        raise SystemExit(f"{failures} queries do not use an index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+# Measurement labels whose timestamp string gets native start/end properties.
+MEASUREMENT_LABELS = ["CO_Measurement", "Ozone_Measurement", "Aerosol_AI_Measurement", "LandCoverMeasurement"]
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_interval(timestamp_str: str):
+    """
+    Parses a measurement timestamp string into its (start, end) datetimes.
+
+    Handles the formats the seeding CSVs use:
+      "2018-10-16T11:02:44 to 2018-10-23T11:02:44" -> both ends of the range
+      "2018-10-16T11:02:44"                         -> start and end are the same instant
+      "2021"                                        -> 2021-01-01T00:00:00 to 2021-12-31T23:59:59
+    The datetimes are naive, so the driver stores them as Neo4j LocalDateTime values.
+    Returns (None, None) if the string cannot be parsed.
+    """
+    if not timestamp_str:
+        return None, None
+    parts = [part.strip() for part in timestamp_str.split(" to ")]
+    try:
+        if len(parts) == 1 and len(parts[0]) == 4 and parts[0].isdigit():
+            year = int(parts[0])
+            return datetime(year, 1, 1), datetime(year, 12, 31, 23, 59, 59)
+        start = datetime.strptime(parts[0][:19], TIMESTAMP_FORMAT)
+        end = datetime.strptime(parts[-1][:19], TIMESTAMP_FORMAT)
+        return start, end
+    except ValueError:
+        return None, None
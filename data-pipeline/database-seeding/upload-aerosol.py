@@ -1,5 +1,7 @@
 import csv
 from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
+from temporal import parse_interval
 from models import Dataset, Aerosol_AI_Measurement  
 
 def safe_float(value, default=None):
@@ -92,7 +94,10 @@ def create_aerosol_measurement_node(conn: Neo4jConnection, measurement: Aerosol_
     query = """
     MERGE (m:Aerosol_AI_Measurement {measurement_id: $measurement_id})
     SET m.region = $region,
+        m.region_lower = toLower($region),
         m.timestamp = $timestamp,
+        m.start = $start,
+        m.end = $end,
         m.dataset = $dataset,
         m.absorbing_aerosol_index = $absorbing_aerosol_index,
         m.sensor_altitude = $sensor_altitude,
@@ -101,10 +106,13 @@ def create_aerosol_measurement_node(conn: Neo4jConnection, measurement: Aerosol_
         m.solar_azimuth_angle = $solar_azimuth_angle,
         m.solar_zenith_angle = $solar_zenith_angle
     """
+    start, end = parse_interval(measurement.timestamp)
     params = {
         "measurement_id": measurement.measurement_id,
         "region": measurement.region,
         "timestamp": measurement.timestamp,
+        "start": start,
+        "end": end,
         "dataset": measurement.dataset,
         "absorbing_aerosol_index": measurement.absorbing_aerosol_index,
         "sensor_altitude": measurement.sensor_altitude,
@@ -161,6 +169,9 @@ def main():
     # Create relationships between the new Aerosol_Measurement nodes and existing Dataset and District nodes.
     create_aerosol_relationships(conn)
 
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
     # Close the connection.
     conn.close()
 
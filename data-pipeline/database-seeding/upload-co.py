@@ -1,5 +1,7 @@
 import csv
 from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
+from temporal import parse_interval
 from models import CO_Measurement, Dataset
 
 def safe_float(value, default=None):
@@ -76,26 +78,34 @@ def create_dataset_node(conn: Neo4jConnection, dataset: Dataset):
     conn.query(query, parameters=params)
 
 def create_measurement_node(conn: Neo4jConnection, measurement: CO_Measurement):
+    """
+    Creates (or merges) a CO_Measurement node. Using MERGE prevents duplicate nodes
+    if the script is run multiple times.
+    """
     query = """
-    CREATE (m:CO_Measurement {
-      measurement_id: $measurement_id,
-      region: $region,
-      timestamp: $timestamp,
-      dataset: $dataset,
-      CO_column_number_density: $CO_column_number_density,
-      H2O_column_number_density: $H2O_column_number_density,
-      cloud_height: $cloud_height,
-      sensor_altitude: $sensor_altitude,
-      sensor_azimuth_angle: $sensor_azimuth_angle,
-      sensor_zenith_angle: $sensor_zenith_angle,
-      solar_azimuth_angle: $solar_azimuth_angle,
-      solar_zenith_angle: $solar_zenith_angle
-    })
+    MERGE (m:CO_Measurement {measurement_id: $measurement_id})
+    SET m.region = $region,
+        m.region_lower = toLower($region),
+        m.timestamp = $timestamp,
+        m.start = $start,
+        m.end = $end,
+        m.dataset = $dataset,
+        m.CO_column_number_density = $CO_column_number_density,
+        m.H2O_column_number_density = $H2O_column_number_density,
+        m.cloud_height = $cloud_height,
+        m.sensor_altitude = $sensor_altitude,
+        m.sensor_azimuth_angle = $sensor_azimuth_angle,
+        m.sensor_zenith_angle = $sensor_zenith_angle,
+        m.solar_azimuth_angle = $solar_azimuth_angle,
+        m.solar_zenith_angle = $solar_zenith_angle
     """
+    start, end = parse_interval(measurement.timestamp)
     params = {
         "measurement_id": measurement.measurement_id,
         "region": measurement.region,
         "timestamp": measurement.timestamp,
+        "start": start,
+        "end": end,
         "dataset": measurement.dataset,
         "CO_column_number_density": measurement.CO_column_number_density,
         "H2O_column_number_density": measurement.H2O_column_number_density,
@@ -159,6 +169,9 @@ def main():
     # Create relationships between District nodes and CO_Measurement nodes.
     create_district_measurement_relationship(conn)
 
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
     # Close the connection.
     conn.close()
 
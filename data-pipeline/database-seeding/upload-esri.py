@@ -1,5 +1,7 @@
 import csv
 from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
+from temporal import parse_interval
 from models import Dataset, LandCoverMeasurement  # Ensure LandCoverMeasurement is defined in your models
 
 def safe_float(value, default=None):
@@ -90,7 +92,10 @@ def create_landcover_measurement_node(conn: Neo4jConnection, measurement: LandCo
     query = """
     MERGE (m:LandCoverMeasurement {measurement_id: $measurement_id})
     SET m.region = $region,
+        m.region_lower = toLower($region),
         m.timestamp = $timestamp,
+        m.start = $start,
+        m.end = $end,
         m.dataset = $dataset,
         m.Water = $Water,
         m.Trees = $Trees,
@@ -102,10 +107,13 @@ def create_landcover_measurement_node(conn: Neo4jConnection, measurement: LandCo
         m.Clouds = $Clouds,
         m.Rangeland = $Rangeland
     """
+    start, end = parse_interval(measurement.timestamp)
     params = {
         "measurement_id": measurement.measurement_id,
         "region": measurement.region,
         "timestamp": measurement.timestamp,
+        "start": start,
+        "end": end,
         "dataset": measurement.dataset,
         "Water": measurement.Water,
         "Trees": measurement.Trees,
@@ -169,6 +177,9 @@ def main():
     # Create relationships linking measurements to their dataset and districts.
     create_landcover_relationships(conn)
 
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
     # Close the connection.
     conn.close()
 
@@ -1,5 +1,7 @@
 import csv
 from neo4j_connection import Neo4jConnection
+from data_version import bump_data_version
+from temporal import parse_interval
 from models import Dataset, Ozone_Measurement  
 
 def safe_float(value, default=None):
@@ -98,7 +100,10 @@ def create_ozone_measurement_node(conn: Neo4jConnection, measurement: Ozone_Meas
     query = """
     MERGE (m:Ozone_Measurement {measurement_id: $measurement_id})
     SET m.region = $region,
+        m.region_lower = toLower($region),
         m.timestamp = $timestamp,
+        m.start = $start,
+        m.end = $end,
         m.dataset = $dataset,
         m.O3_column_number_density = $O3_column_number_density,
         m.O3_column_number_density_amf = $O3_column_number_density_amf,
@@ -110,10 +115,13 @@ def create_ozone_measurement_node(conn: Neo4jConnection, measurement: Ozone_Meas
         m.solar_azimuth_angle = $solar_azimuth_angle,
         m.solar_zenith_angle = $solar_zenith_angle
     """
+    start, end = parse_interval(measurement.timestamp)
     params = {
         "measurement_id": measurement.measurement_id,
         "region": measurement.region,
         "timestamp": measurement.timestamp,
+        "start": start,
+        "end": end,
         "dataset": measurement.dataset,
         "O3_column_number_density": measurement.O3_column_number_density,
         "O3_column_number_density_amf": measurement.O3_column_number_density_amf,
@@ -173,6 +181,9 @@ def main():
     # Create relationships between the new Ozone_Measurement nodes and existing Dataset and District nodes.
     create_ozone_relationships(conn)
 
+    # Invalidate responses cached from the previous data.
+    bump_data_version(conn)
+
     # Close the connection.
     conn.close()
 
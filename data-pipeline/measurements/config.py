@@ -7,6 +7,11 @@ load_dotenv()
 class Settings:
     EE_ACCOUNT = os.getenv("EE_ACCOUNT")
     EE_PRIVATE_KEY_FILE = os.getenv("EE_PRIVATE_KEY_FILE")
+    # Earth Engine call gateway: AIMD concurrency between 1 and the maximum,
+    # starting at the initial value, and retries of quota / transient errors per call
+    EE_INITIAL_CONCURRENCY = int(os.getenv("EE_INITIAL_CONCURRENCY", "4"))
+    EE_MAX_CONCURRENCY = int(os.getenv("EE_MAX_CONCURRENCY", "16"))
+    EE_MAX_RETRIES = int(os.getenv("EE_MAX_RETRIES", "5"))
 
 def initialize_earth_engine():
     try:
@@ -0,0 +1,29 @@
+"""
+The Earth Engine call gateway of backend-apps/gee-service, shared with these scripts.
+
+The module is loaded from the service's file so both use one implementation;
+its settings (EE_INITIAL_CONCURRENCY, EE_MAX_CONCURRENCY, EE_MAX_RETRIES) come
+from this directory's config.Settings.
+"""
+import os
+import sys
+import importlib.util
+
+GATEWAY_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend-apps", "gee-service", "ee_gateway.py"
+))
+
+_spec = importlib.util.spec_from_file_location("_gee_service_ee_gateway", GATEWAY_PATH)
+_gateway = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = _gateway
+_spec.loader.exec_module(_gateway)
+
+EEGateway = _gateway.EEGateway
+DeadlineExceeded = _gateway.DeadlineExceeded
+deadline_scope = _gateway.deadline_scope
+TaskScope = _gateway.TaskScope
+task_scope = _gateway.task_scope
+classify_error = _gateway.classify_error
+QUOTA = _gateway.QUOTA
+TRANSIENT = _gateway.TRANSIENT
+ee_gateway = _gateway.ee_gateway
@@ -3,8 +3,9 @@ import pandas as pd
 import uuid
 from typing import List, Dict, Any
 import json
-from concurrent.futures import ThreadPoolExecutor
 from config import initialize_earth_engine
+from ee_gateway import ee_gateway
+from interval_tasks import run_tasks, select_failed, write_failed, save_measurements
 
 # Initialize Earth Engine (assumes you have a proper config module)
 initialize_earth_engine()
@@ -19,8 +20,13 @@ class ESRILULCDataProcessor:
                 - geojson_path (str): Path to GeoJSON file with district boundaries.
                 Optionally, you can add keys 'start_year' and 'end_year'
                 to limit the processing range (default is 2017 to 2023).
+                - failed_path (str, optional): CSV the tasks that could not be fetched are written to
+                - retry_failed (bool, optional): Only fetch the tasks listed in failed_path and add
+                  them to the existing CSV, to fill the gaps of an earlier run
         """
         self.params = params
+        self.FAILED_PATH = params.get('failed_path', 'datasets/failed_esri_lulc_years.csv')
+        self.RETRY_FAILED = params.get('retry_failed', False)
         self.CONFIG = {
             'ESRI_LULC_COLLECTION': 'projects/sat-io/open-datasets/landcover/ESRI_Global-LULC_10m_TS',
             'SCALE': 10,  # 10 meter resolution for ESRI LULC data.
@@ -104,13 +110,13 @@ class ESRILULCDataProcessor:
             
             # Compute the frequency histogram over the district geometry.
             # The result is a dictionary mapping remapped values (as strings) to pixel counts.
-            histogram = image.reduceRegion(
+            histogram = ee_gateway.call(image.reduceRegion(
                 reducer=ee.Reducer.frequencyHistogram(),
                 geometry=district['geometry'],
                 scale=self.CONFIG['SCALE'],
                 maxPixels=self.CONFIG['MAX_PIXELS'],
                 tileScale=self.CONFIG['TILE_SCALE']
-            ).getInfo()
+            ).getInfo)
             
             # The histogram is usually under the first band key.
             # Assume the image has a single band; get the first key.
@@ -149,23 +155,16 @@ class ESRILULCDataProcessor:
             districts = self._load_districts()
             print(f"Loaded {len(districts)} districts")
             
-            all_data = []
             print(f"Processing data for {len(districts)} districts over {len(years)} years")
+            tasks = [(district, year) for district in districts for year in years]
+            if self.RETRY_FAILED:
+                tasks = select_failed(tasks, self.FAILED_PATH)
+            # Rows that still fail after the gateway's retries are re-queued once, then
+            # written to FAILED_PATH so a later run can fill the gaps
+            all_data, failed = run_tasks(self._get_lulc_data_for_year, tasks)
+            write_failed(self.FAILED_PATH, failed, ['year'])
             
-            # Use ThreadPoolExecutor to process each district-year combination concurrently.
-            with ThreadPoolExecutor() as executor:
-                futures = []
-                for district in districts:
-                    for year in years:
-                        future = executor.submit(self._get_lulc_data_for_year, district, year)
-                        futures.append(future)
-                
-                # Gather results.
-                for future in futures:
-                    result = future.result()
-                    if result:  # Only add valid results.
-                        all_data.append(result)
-            
+            print(f"Earth Engine calls: {ee_gateway.stats()}")
             df = pd.DataFrame(all_data)
             return df
         except Exception as e:
@@ -176,8 +175,7 @@ class ESRILULCDataProcessor:
         """Process data and export the results to a CSV file."""
         df = self.process_data()
         if not df.empty:
-            df.to_csv(filename, index=False)
-            print(f"Exported {len(df)} measurements to {filename}")
+            save_measurements(df, filename, append=self.RETRY_FAILED)
         else:
             print("No data to export")
 
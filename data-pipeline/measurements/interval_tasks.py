@@ -0,0 +1,83 @@
+import os
+import csv
+from typing import Callable, Dict, List, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from ee_gateway import ee_gateway
+
+
+def run_tasks(fetch: Callable[..., Dict], tasks: List[Tuple]) -> Tuple[List[Dict], List[Tuple]]:
+    """
+    Run fetch(district, *args) for every task and collect the rows.
+
+    The pool is sized to the gateway's maximum; the gateway adapts how many calls
+    actually run at once to Earth Engine's quota. fetch returns an empty dict when
+    its call failed even after the gateway's retries. Those tasks are re-queued once
+    at the end of the run, when the quota pressure of the main pass has eased.
+
+    Args:
+        fetch (Callable): Returns the measurement row for one task, {} on failure.
+        tasks (List[Tuple]): (district, *args) tuples.
+
+    Returns:
+        Tuple[List[Dict], List[Tuple]]: The rows, and the tasks that still failed.
+    """
+    rows = []
+    failed = tasks
+    for attempt in range(2):
+        if not failed:
+            break
+        if attempt:
+            print(f"Re-queueing {len(failed)} failed tasks")
+        with ThreadPoolExecutor(max_workers=ee_gateway.max_concurrency) as executor:
+            futures = [(task, executor.submit(fetch, *task)) for task in failed]
+            failed = []
+            # Collect results in task order
+            for task, future in futures:
+                result = future.result()
+                if result:
+                    rows.append(result)
+                else:
+                    failed.append(task)
+    return rows, failed
+
+
+def _task_key(task: Tuple) -> Tuple[str, ...]:
+    district, *args = task
+    return (district['name'],) + tuple(str(arg) for arg in args)
+
+
+def write_failed(path: str, failed: List[Tuple], fields: Sequence[str]):
+    """
+    Write the (district, *args) tasks that could not be fetched to a CSV file, so that
+    a run with retry_failed can fill the gaps. Removes the file when nothing failed.
+    """
+    if not failed:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['district_name'] + list(fields))
+        writer.writerows(_task_key(task) for task in failed)
+    print(f"{len(failed)} measurements could not be fetched; written to {path} (re-run with retry_failed)")
+
+
+def select_failed(tasks: List[Tuple], path: str) -> List[Tuple]:
+    """Keep only the tasks listed in a file written by write_failed."""
+    if not os.path.exists(path):
+        print(f"No failed tasks file at {path}; nothing to retry")
+        return []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        listed = {tuple(row) for row in reader}
+    return [task for task in tasks if _task_key(task) in listed]
+
+
+def save_measurements(df: pd.DataFrame, filename: str, append: bool = False):
+    """Write the measurements to a CSV file, or add them to it when filling gaps."""
+    if append and os.path.exists(filename):
+        df = pd.concat([pd.read_csv(filename), df], ignore_index=True)
+    df.to_csv(filename, index=False)
+    print(f"Exported {len(df)} measurements to {filename}")
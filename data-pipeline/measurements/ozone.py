@@ -3,10 +3,11 @@ import pandas as pd
 import uuid
 from typing import List, Dict, Any
 import json
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta  # for generating monthly intervals
 from config import initialize_earth_engine
+from ee_gateway import ee_gateway
+from interval_tasks import run_tasks, select_failed, write_failed, save_measurements
 
 class O3DataProcessor:
     def __init__(self, params: Dict[str, Any]):
@@ -18,11 +19,16 @@ class O3DataProcessor:
                 - start_date (str): Start date in ISO format (e.g., 'YYYY-MM-DDTHH:MM:SSZ')
                 - end_date (str): End date in ISO format (e.g., 'YYYY-MM-DDTHH:MM:SSZ')
                 - geojson_path (str): Path to GeoJSON file with district boundaries
+                - failed_path (str, optional): CSV the tasks that could not be fetched are written to
+                - retry_failed (bool, optional): Only fetch the tasks listed in failed_path and add
+                  them to the existing CSV, to fill the gaps of an earlier run
         """
         # Initialize Earth Engine
         initialize_earth_engine()
         
         self.params = params
+        self.FAILED_PATH = params.get('failed_path', 'datasets/failed_o3_intervals.csv')
+        self.RETRY_FAILED = params.get('retry_failed', False)
         self.CONFIG = {
             'O3_COLLECTION': 'COPERNICUS/S5P/NRTI/L3_O3',
             'SCALE': 1113,  # meters; using pixel size ~1113.2 meters for O3 data
@@ -105,13 +111,13 @@ class O3DataProcessor:
             measurement_id = str(uuid.uuid4())
             
             # Extract mean values over the district geometry
-            stats = image.reduceRegion(
+            stats = ee_gateway.call(image.reduceRegion(
                 reducer=ee.Reducer.mean(),
                 geometry=district['geometry'],
                 scale=self.CONFIG['SCALE'],
                 maxPixels=self.CONFIG['MAX_PIXELS'],
                 tileScale=self.CONFIG['TILE_SCALE']
-            ).getInfo()
+            ).getInfo)
             
             result = {
                 'district_name': district['name'],
@@ -162,24 +168,17 @@ class O3DataProcessor:
             districts = self._load_districts()
             print(f"Loaded {len(districts)} districts")
             
-            all_data = []
             print(f"Processing data for {len(districts)} districts over {len(intervals)} intervals")
-            with ThreadPoolExecutor() as executor:
-                futures = []
-                # Submit a task for each district and each time interval
-                for district in districts:
-                    for (interval_start, interval_end) in intervals:
-                        future = executor.submit(
-                            self._get_o3_data_for_interval, district, interval_start, interval_end
-                        )
-                        futures.append(future)
-                
-                # Collect results from all futures
-                for future in futures:
-                    result = future.result()
-                    if result:  # Only add if result is not empty
-                        all_data.append(result)
+            tasks = [(district, interval_start, interval_end)
+                     for district in districts for (interval_start, interval_end) in intervals]
+            if self.RETRY_FAILED:
+                tasks = select_failed(tasks, self.FAILED_PATH)
+            # Rows that still fail after the gateway's retries are re-queued once, then
+            # written to FAILED_PATH so a later run can fill the gaps
+            all_data, failed = run_tasks(self._get_o3_data_for_interval, tasks)
+            write_failed(self.FAILED_PATH, failed, ['interval_start', 'interval_end'])
             
+            print(f"Earth Engine calls: {ee_gateway.stats()}")
             return pd.DataFrame(all_data)
         except Exception as e:
             print(f"Error in process_data: {str(e)}")
@@ -189,8 +188,7 @@ class O3DataProcessor:
         """Process data and export the results to a CSV file."""
         df = self.process_data()
         if not df.empty:
-            df.to_csv(filename, index=False)
-            print(f"Exported {len(df)} measurements to {filename}")
+            save_measurements(df, filename, append=self.RETRY_FAILED)
         else:
             print("No data to export")
 
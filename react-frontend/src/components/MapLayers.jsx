@@ -20,6 +20,9 @@ const MapLayers = ({
 
     // Create new layers object
     const newLayers = {};
+    // Layers added in this update by URL: regions of a shared layer (e.g. Ozone,
+    // one layer per month for all regions) have the same URL and draw it once
+    const added = {};
 
     // Add or update layers for selected regions
     selectedRegions.forEach(region => {
@@ -32,10 +35,12 @@ const MapLayers = ({
           map.removeLayer(layers[region]);
         }
 
-        // Create and add new layer
-        const layer = L.tileLayer(url, { opacity: 0.7 });
-        layer.addTo(map);
-        newLayers[region] = layer;
+        // Create and add new layer, unless another region already added it
+        if (!added[url]) {
+          added[url] = L.tileLayer(url, { opacity: 0.7 });
+          added[url].addTo(map);
+        }
+        newLayers[region] = added[url];
       }
     });
 